@@ -0,0 +1,81 @@
+"""
+Benchmark of the time taken to import Otter in the kernel of a notebook being graded.
+
+Each run executes the init cell that the ``GradingPreprocessor`` injects into submissions in a fresh
+interpreter in which the modules that ``ipykernel`` has already imported in a real kernel are
+loaded, and reports the time taken and the top-level packages that the cell imported. Run with
+``python benchmarks/bench_grading_mode_import.py [--repeat R]``.
+
+Compile Otter's bytecode first (``python -m compileall otter``) so that the times do not include
+compiling the source.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from otter.execute.preprocessor import INIT_CELL_SOURCE, STREAM_RESULTS_SOURCE  # noqa: E402
+
+
+KERNEL_PRELOAD_SOURCE = "import ipykernel.ipkernel"
+"""code that imports the modules that are already imported when a kernel starts"""
+
+TIMING_SOURCE = """\
+import json, sys, time
+{preload}
+before = set(sys.modules)
+start = time.perf_counter()
+exec({init_source!r})
+elapsed = time.perf_counter() - start
+imported = sorted({{m.split(".")[0] for m in set(sys.modules) - before}})
+print(json.dumps({{"elapsed": elapsed, "imported": imported}}))
+"""
+
+
+def time_init_cell(init_source):
+    """
+    Return the time in milliseconds taken to execute ``init_source`` in a fresh interpreter and the
+    top-level packages it imported.
+    """
+    source = TIMING_SOURCE.format(preload=KERNEL_PRELOAD_SOURCE, init_source=init_source)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    output = subprocess.run(
+        [sys.executable, "-c", source], check=True, capture_output=True, text=True, env=env).stdout
+    result = json.loads(output.splitlines()[-1])
+    return result["elapsed"] * 1e3, result["imported"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10, help="number of runs to take the median of")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        init_source = INIT_CELL_SOURCE.format(
+            notebook_name="grader",
+            test_dir=os.path.join(temp_dir, "tests"),
+            logging_server_host=os.path.join(temp_dir, "logs.sock"),
+            logging_server_port=None,
+            test_case_timeout=None,
+            fixture_values_path=None,
+            fixture_values_digest=None,
+        ) + STREAM_RESULTS_SOURCE.format(
+            results_stream_path=os.path.join(temp_dir, "results_stream.pkl").replace("\\", "\\\\"))
+
+        times, imported = [], []
+        for _ in range(args.repeat):
+            elapsed, imported = time_init_cell(init_source)
+            times.append(elapsed)
+
+        print(f"init cell: {statistics.median(times):8.1f} ms (median of {args.repeat})")
+        print(f"imported:  {', '.join(imported)}")
+
+
+if __name__ == "__main__":
+    main()
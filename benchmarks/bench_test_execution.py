@@ -0,0 +1,149 @@
+"""
+Microbenchmark of the per-case overhead of running OK-formatted and exception-based test files.
+
+Each test file has a number of trivial cases so that the measured time is almost entirely harness
+overhead. The exception-based file is also run with cases that each receive a set of fixtures (a
+number, a list, a NumPy array, and a pandas DataFrame) to measure the cost of copying their values. Run with ``python benchmarks/bench_test_execution.py [--cases N] [--repeat R]``.
+
+To compare two versions of Otter, run the benchmark on the first with ``--save-baseline PATH`` and
+on the second with ``--baseline PATH``; the times saved in ``PATH`` are reported next to the new
+ones with the speedup of each. Baselines are only comparable on the same machine and with the same
+``--cases``.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from textwrap import dedent
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from otter.nbmeta_config import NBMetadataConfig  # noqa: E402
+from otter.test_files import clear_test_file_cache, create_test_file  # noqa: E402
+from otter.test_files.exception_test import clear_fixture_values  # noqa: E402
+
+
+def write_ok_test_file(path, n_cases):
+    cases = ",\n".join(
+        f"{{'code': '>>> assert x + {i} == {i + 1}\\n>>> x\\n1', 'hidden': False}}"
+        for i in range(n_cases))
+    with open(path, "w") as f:
+        f.write(
+            f"OK_FORMAT = True\n\ntest = {{'name': 'q1', 'points': 1, 'suites': [{{'type': "
+            f"'doctest', 'cases': [{cases}]}}]}}\n")
+
+
+def write_exception_test_file(path, n_cases):
+    cases = "\n".join(dedent(f"""\
+        @test_case(points=1)
+        def test_{i}(x):
+            assert x + {i} == {i + 1}
+        """) for i in range(n_cases))
+    with open(path, "w") as f:
+        f.write(f"from otter.test_files import test_case\n\nOK_FORMAT = False\n\nname = 'q1'\n\n{cases}")
+
+
+def write_fixture_test_file(path, n_cases):
+    cases = "\n".join(dedent(f"""\
+        @test_case(points=1)
+        def test_{i}(x, n, values, arr, df):
+            assert x + n + {i} == {i + 2}
+        """) for i in range(n_cases))
+    with open(path, "w") as f:
+        f.write(dedent("""\
+            import numpy as np
+            import pandas as pd
+
+            from otter.test_files import fixture, test_case
+
+            OK_FORMAT = False
+
+            name = 'q1'
+
+            @fixture()
+            def n():
+                return 1
+
+            @fixture()
+            def values():
+                return list(range(100))
+
+            @fixture()
+            def arr():
+                return np.arange(10000, dtype=float)
+
+            @fixture()
+            def df():
+                return pd.DataFrame({"a": range(1000), "b": [str(i) for i in range(1000)]})
+
+        """) + cases)
+
+
+def time_runs(path, n_cases, repeat):
+    """
+    Return the best per-case time in microseconds of running the test file at ``path``.
+    """
+    test_file = create_test_file(path, NBMetadataConfig())
+    best = float("inf")
+    for _ in range(repeat):
+        test_file.test_case_results = []
+        start = time.perf_counter()
+        test_file.run({"x": 1})
+        best = min(best, time.perf_counter() - start)
+        assert test_file.passed_all, test_file.summary()
+    return best / n_cases * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cases", type=int, default=200, help="number of cases per test file")
+    parser.add_argument("--repeat", type=int, default=20, help="number of runs to take the best of")
+    parser.add_argument("--save-baseline", help="path to save the times to as a JSON baseline")
+    parser.add_argument("--baseline", help="path to a JSON baseline to compare the times to")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["cases"] != args.cases:
+            parser.error(f"the baseline was run with --cases {baseline['cases']}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        clear_test_file_cache()
+
+        ok_path = os.path.join(temp_dir, "ok_q1.py")
+        write_ok_test_file(ok_path, args.cases)
+
+        exc_path = os.path.join(temp_dir, "exception_q1.py")
+        write_exception_test_file(exc_path, args.cases)
+
+        fixture_path = os.path.join(temp_dir, "fixture_q1.py")
+        write_fixture_test_file(fixture_path, args.cases)
+
+        clear_fixture_values()
+        times = {
+            "OK-formatted": time_runs(ok_path, args.cases, args.repeat),
+            "exception-based": time_runs(exc_path, args.cases, args.repeat),
+            "with fixtures": time_runs(fixture_path, args.cases, args.repeat),
+        }
+
+    print(f"cases per test file: {args.cases}")
+    for name, us in times.items():
+        line = f"{name + ':':<17}{us:8.1f} us/case"
+        if baseline is not None and name in baseline["times"]:
+            before = baseline["times"][name]
+            line += f" (baseline {before:8.1f} us/case, {before / us:5.2f}x)"
+        print(line)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"cases": args.cases, "times": times}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
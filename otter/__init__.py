@@ -1,6 +1,15 @@
 """Otter's Python API"""
 
-from . import api
+import importlib
+
 from .check import logs
 from .check.notebook import Notebook
 from .version import __version__
+
+
+def __getattr__(name):
+    # otter.api imports the grading and export machinery, which notebooks that only import
+    # otter.Notebook (including every notebook being graded) do not need
+    if name == "api":
+        return importlib.import_module(".api", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,17 +2,9 @@
 
 __all__ = ["export_notebook", "grade_submission"]
 
-import os
-
-from contextlib import redirect_stdout
-
-try:
-    from contextlib import nullcontext
-except ImportError:
-    from .utils import nullcontext  # nullcontext is new in Python 3.7
-
 from .export import export_notebook
-from .run import main as run_grader
+from .run import capture_run_output, main as run_grader
+from .utils import nullcontext
 
 
 def grade_submission(submission_path, ag_path="autograder.zip", quiet=False, debug=False):
@@ -25,12 +17,14 @@ def grade_submission(submission_path, ag_path="autograder.zip", quiet=False, deb
     not run environment setup files (e.g. ``setup.sh``) or install requirements, so any requirements 
     should be available in the environment being used for grading. 
 
-    Print statements executed during grading can be suppressed with ``quiet``.
+    Output printed by Otter during grading can be suppressed with ``quiet``. Only the output of the
+    calling thread or ``asyncio`` task is suppressed (``sys.stdout`` is not redirected), so
+    submissions can be graded concurrently in the same process.
 
     Args:
         submission_path (``str``): path to submission file
         ag_path (``str``): path to autograder zip file
-        quiet (``bool``, optional): whether to suppress print statements during grading; default 
+        quiet (``bool``, optional): whether to suppress Otter's output during grading; default 
             ``False``
         debug (``bool``, optional): whether to run the submission in debug mode (without ignoring
             errors)
@@ -39,17 +33,7 @@ def grade_submission(submission_path, ag_path="autograder.zip", quiet=False, deb
         ``otter.test_files.GradingResults``: the results object produced during the grading of the
             submission.
     """
-    if quiet:
-        f = open(os.devnull, "w")
-        cm = redirect_stdout(f)
-    else:
-        cm = nullcontext()
-
+    cm = capture_run_output() if quiet else nullcontext()
     with cm:
-        results = run_grader(
+        return run_grader(
             submission_path, autograder=ag_path, output_dir=None, no_logo=True, debug=debug)
-
-    if quiet:
-        f.close()
-
-    return results
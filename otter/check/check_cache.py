@@ -0,0 +1,324 @@
+"""Reusing the results of checks whose tests read variables that have not changed"""
+
+import ast
+import copy
+import doctest
+import hashlib
+import os
+import pickle
+import sys
+import types
+
+from typing import Any, Dict, Optional, Set, Tuple
+
+from ..execute import Checker
+from ..nbmeta_config import NBMetadataConfig
+from ..test_files import create_test_file, TestFile
+from ..test_files.exception_test import ExceptionTestFile, parametrized_test_case
+from ..test_files.ok_test import OKTestFile
+from ..utils import loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+_MAX_FUNCTION_DEPTH = 3
+"""the depth to which the global variables referenced by functions are hashed"""
+
+_PRIMITIVE_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+
+def _get_names(source: str) -> Tuple[Set[str], Set[str]]:
+    """
+    Get the names that are loaded and the names that are assigned in a piece of Python code.
+    """
+    loaded, stored = set(), set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Name):
+            (loaded if isinstance(node.ctx, ast.Load) else stored).add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            stored.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            stored.update((a.asname or a.name).split(".")[0] for a in node.names)
+
+    return loaded, stored
+
+
+def get_referenced_names(test_file: TestFile) -> Optional[Set[str]]:
+    """
+    Statically determine the names of the global variables that a test file reads.
+
+    For OK-format tests, these are the names loaded by the test cases' doctests; for
+    exception-based tests, these are the parameters of the test case functions that are filled in
+    from the global environment.
+
+    Args:
+        test_file (``otter.test_files.TestFile``): the test file
+
+    Returns:
+        ``set[str] | None``: the names, or ``None`` if they cannot be determined (e.g. because a
+        test case receives the whole environment)
+    """
+    names = set()
+    if isinstance(test_file, OKTestFile):
+        parser = doctest.DocTestParser()
+        try:
+            for tc in test_file.test_cases:
+                # the examples in a test case share a namespace
+                assigned = set()
+                for example in parser.get_examples(tc.body):
+                    loaded, stored = _get_names(example.source)
+                    names |= loaded - assigned
+                    assigned |= stored
+        except (SyntaxError, ValueError):
+            return None
+
+    elif isinstance(test_file, ExceptionTestFile):
+        for tc in test_file.test_cases:
+            params = set(tc.body._get_func_params()) - set(test_file.fixtures)
+            if isinstance(tc.body, parametrized_test_case):
+                params -= set(tc.body.inputs)
+            if "env" in params:
+                return None
+            names |= params
+
+    else:
+        return None
+
+    return names
+
+
+def _hash_function(hasher, func: types.FunctionType, global_env: Dict[str, Any], depth: int) -> bool:
+    """
+    Hash a function's code, defaults, and closure and the global variables it references.
+    """
+    code = func.__code__
+    hasher.update(code.co_code)
+    if not _hash_value(hasher, (code.co_consts, func.__defaults__), global_env, depth + 1):
+        return False
+
+    for cell in func.__closure__ or ():
+        try:
+            contents = cell.cell_contents
+        except ValueError:
+            continue
+        if not _hash_value(hasher, contents, global_env, depth + 1):
+            return False
+
+    for name in code.co_names:
+        if name in func.__globals__:
+            hasher.update(name.encode())
+
+            # a recursive function's code has already been hashed
+            if func.__globals__[name] is func:
+                continue
+
+            if not _hash_value(hasher, func.__globals__[name], global_env, depth + 1):
+                return False
+
+    return True
+
+
+def _hash_value(hasher, value: Any, global_env: Dict[str, Any], depth: int = 0) -> bool:
+    """
+    Update a hash with a value. Primitives, NumPy arrays, and pandas objects are hashed directly
+    from their data; containers are hashed recursively; functions are hashed with the globals they
+    reference; and all other values are pickled, along with the methods of their class if it was
+    defined in the notebook. Functions nested more than ``_MAX_FUNCTION_DEPTH`` deep can't be
+    hashed.
+
+    Returns:
+        ``bool``: whether the value could be hashed
+    """
+    hasher.update(type(value).__qualname__.encode())
+
+    if isinstance(value, _PRIMITIVE_TYPES):
+        hasher.update(repr(value).encode())
+        return True
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+        hasher.update(str(len(items)).encode())
+        return all(_hash_value(hasher, v, global_env, depth) for v in items)
+
+    if isinstance(value, dict):
+        hasher.update(str(len(value)).encode())
+        return all(
+            _hash_value(hasher, k, global_env, depth) and _hash_value(hasher, v, global_env, depth)
+            for k, v in value.items())
+
+    if isinstance(value, types.ModuleType):
+        hasher.update(value.__name__.encode())
+        return True
+
+    if isinstance(value, types.FunctionType):
+        # functions nested too deeply to follow can't be shown to be unchanged
+        if depth > _MAX_FUNCTION_DEPTH:
+            return False
+        return _hash_function(hasher, value, global_env, depth)
+
+    # only check for array and data frame types if their libraries have already been imported
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(value, np.ndarray) and value.dtype != object:
+        hasher.update(f"{value.dtype.str}{value.shape}".encode())
+        hasher.update(np.ascontiguousarray(value).view(np.uint8).data)
+        return True
+
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(value, (pd.DataFrame, pd.Series)):
+        try:
+            hasher.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+            if isinstance(value, pd.DataFrame):
+                hasher.update(repr((list(value.columns), list(value.dtypes))).encode())
+            else:
+                hasher.update(repr((value.name, value.dtype)).encode())
+            return True
+        except TypeError:
+            pass
+
+    # instances of classes defined in the notebook are pickled by reference to the class, so the
+    # class's methods are hashed too
+    cls = type(value)
+    if cls.__module__ == "__main__":
+        for klass in cls.__mro__:
+            if klass.__module__ != "__main__":
+                continue
+            for name, attr in sorted(vars(klass).items()):
+                if isinstance(attr, (staticmethod, classmethod)):
+                    attr = attr.__func__
+                elif isinstance(attr, property):
+                    attr = attr.fget
+                if isinstance(attr, types.FunctionType):
+                    hasher.update(name.encode())
+                    if depth + 1 > _MAX_FUNCTION_DEPTH or \
+                            not _hash_function(hasher, attr, global_env, depth + 1):
+                        return False
+
+    try:
+        hasher.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        return True
+    except Exception:
+        return False
+
+
+def hash_variables(names: Set[str], global_env: Dict[str, Any]) -> Optional[str]:
+    """
+    Hash the values of variables in a global environment. Variables that are not defined are
+    hashed as missing.
+
+    Args:
+        names (``set[str]``): the names of the variables
+        global_env (``dict[str, object]``): the global environment
+
+    Returns:
+        ``str | None``: the hash, or ``None`` if any of the values could not be hashed
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for name in sorted(names):
+        hasher.update(name.encode())
+        if name not in global_env:
+            hasher.update(b"\0missing")
+        elif not _hash_value(hasher, global_env[name], global_env):
+            return None
+
+    return hasher.hexdigest()
+
+
+class CheckCache:
+    """
+    A cache of the results of ``Notebook.check`` keyed by the hashes of the variables that each
+    test reads.
+
+    When a test is checked again and the values of all of the global variables that it references
+    (see ``get_referenced_names``) have the same hash as when it was last run, and the test file
+    has not changed, the previous result is returned instead of running the test again. Tests that
+    are not deterministic given those variables (e.g. tests that read files) should not be checked
+    with a cache.
+    """
+
+    _entries: Dict[Tuple[str, Optional[str]], Tuple[str, TestFile]]
+    """the hash and result of the last run of each test, keyed by test path and name"""
+
+    _referenced_names: Dict[Tuple[str, Optional[str]], Tuple[str, Optional[Set[str]]]]
+    """the version and referenced names of each test file, keyed by test path and name"""
+
+    def __init__(self):
+        self._entries = {}
+        self._referenced_names = {}
+
+    @staticmethod
+    def _get_test_file_version(
+        test_path: str,
+        nbmeta_config: NBMetadataConfig,
+        test_name: Optional[str],
+    ) -> str:
+        """
+        Get a string that changes when the test file (or the notebook metadata test) changes.
+        """
+        stat = os.stat(test_path)
+        spec = (nbmeta_config.tests or {}).get(test_name) if test_name is not None else None
+        return f"{stat.st_mtime_ns}-{stat.st_size}-{spec!r}"
+
+    def _get_digest(
+        self,
+        key: Tuple[str, Optional[str]],
+        nbmeta_config: NBMetadataConfig,
+        global_env: Dict[str, Any],
+    ) -> Optional[str]:
+        """
+        Hash the version of a test file and the values of the variables it reads, parsing the test
+        file only if it has changed since it was last parsed.
+        """
+        test_path, test_name = key
+        version = self._get_test_file_version(test_path, nbmeta_config, test_name)
+        if key not in self._referenced_names or self._referenced_names[key][0] != version:
+            test_file = create_test_file(test_path, nbmeta_config, test_name)
+            self._referenced_names[key] = (version, get_referenced_names(test_file))
+
+        names = self._referenced_names[key][1]
+        if names is None:
+            return None
+
+        digest = hash_variables(names, global_env)
+        return None if digest is None else f"{version}-{digest}"
+
+    def check(
+        self,
+        test_path: str,
+        nbmeta_config: NBMetadataConfig,
+        test_name: Optional[str],
+        global_env: Dict[str, Any],
+    ) -> TestFile:
+        """
+        Run a test with ``Checker.check``, or return its previous result if the variables it reads
+        have not changed. Returned results that came from the cache have ``from_cache`` set.
+
+        Args:
+            test_path (``str``): the path to the test file
+            nbmeta_config (``otter.nbmeta_config.NBMetadataConfig``): the notebook metadata config
+            test_name (``str | None``): the name of the test, for notebook metadata tests
+            global_env (``dict[str, object]``): the global environment to run the test against
+
+        Returns:
+            ``otter.test_files.TestFile``: the result
+        """
+        key = (os.path.abspath(test_path), test_name)
+
+        try:
+            digest = self._get_digest(key, nbmeta_config, global_env)
+        except Exception as e:
+            LOGGER.debug(f"Could not hash the variables read by {test_path}: {e}")
+            digest = None
+
+        if digest is not None and key in self._entries and self._entries[key][0] == digest:
+            LOGGER.debug(f"Using cached result for {test_path}")
+            result = copy.copy(self._entries[key][1])
+            result.from_cache = True
+            return result
+
+        result = Checker.check(test_path, nbmeta_config, test_name, global_env)
+        if digest is not None:
+            self._entries[key] = (digest, result)
+        else:
+            self._entries.pop(key, None)
+
+        return result
@@ -1,16 +1,32 @@
 """Logging for Otter Check"""
 
+import copy
 import datetime as dt
+import json
 import os
+import shutil
+import struct
 import types
 import tempfile
 
+from dataclasses import dataclass
 from enum import Enum, auto
-from typing import List, Optional, TYPE_CHECKING
+from typing import BinaryIO, Callable, Dict, List, Optional, TYPE_CHECKING
 
 from ..utils import import_or_raise, QuestionNotInLogException
 
 
+LOG_FORMAT_MAGIC = b"OTTER_LOG\x00v2\n"
+"""the bytes at the start of a log in the indexed format; logs without them are legacy logs, which
+are streams of pickled entries"""
+
+_RECORD_HEADER_LENGTH = struct.Struct(">I")
+"""the struct packing the length of the JSON header at the start of each record of an indexed log"""
+
+_MIN_COMPACTION_BYTES = 1 << 20
+"""the minimum number of bytes of superseded shelves in a log for it to be compacted"""
+
+
 class EventType(Enum):
     """
     Enum of event types for log entries
@@ -44,6 +60,268 @@ class EventType(Enum):
     """PDF export of a notebook (not used during a submission export)"""
 
 
+@dataclass
+class LogIndexRecord:
+    """
+    A dataclass representing the header of a record in an indexed log, which can be read without
+    unpickling the record's entry.
+
+    An indexed log starts with ``LOG_FORMAT_MAGIC`` and is followed by records, each of which is
+    the length of its header, its JSON header, and (for entry records) the pickled ``LogEntry``
+    without its shelf followed by the bytes of the shelf. Tombstone records mark the shelf of an
+    earlier entry as superseded, so that shelves can be deleted without rewriting the log.
+    """
+
+    offset: int
+    """the offset of the record in the log"""
+
+    header_size: int
+    """the number of bytes of the record's header, including its length"""
+
+    kind: str
+    """the kind of record: ``"entry"`` or ``"tombstone"``"""
+
+    entry_size: int = 0
+    """the number of bytes of the pickled entry"""
+
+    shelf_size: int = 0
+    """the number of bytes of the entry's shelf"""
+
+    event_type: Optional[str] = None
+    """the name of the entry's ``EventType``"""
+
+    question: Optional[str] = None
+    """the entry's question"""
+
+    timestamp: Optional[str] = None
+    """the entry's timestamp in ISO format"""
+
+    shelved_variables: Optional[List[str]] = None
+    """the names of the variables in the entry's shelf, if known"""
+
+    superseded: Optional[int] = None
+    """the offset of the entry whose shelf a tombstone supersedes"""
+
+    @property
+    def payload_offset(self) -> int:
+        """
+        ``int``: the offset of the pickled entry (or the end of a tombstone record)
+        """
+        return self.offset + self.header_size
+
+    @property
+    def end(self) -> int:
+        """
+        ``int``: the offset of the end of the record
+        """
+        return self.payload_offset + self.entry_size + self.shelf_size
+
+    def dump_header(self) -> bytes:
+        """
+        Serialize the header of this record, excluding its position in the log.
+
+        Returns:
+            ``bytes``: the header
+        """
+        header = {k: v for k, v in self.__dict__.items()
+            if k not in {"offset", "header_size"} and v is not None}
+        return json.dumps(header).encode()
+
+
+def _write_record(file: BinaryIO, record: LogIndexRecord, payload: bytes = b""):
+    """
+    Write a record to a log opened for appending, setting its offset.
+    """
+    if file.tell() == 0:
+        file.write(LOG_FORMAT_MAGIC)
+
+    header = record.dump_header()
+    record.offset = file.tell()
+    record.header_size = _RECORD_HEADER_LENGTH.size + len(header)
+    file.write(_RECORD_HEADER_LENGTH.pack(len(header)) + header + payload)
+
+
+def _is_indexed_log(filename: str) -> bool:
+    """
+    Determine whether a log is in the indexed format. Empty and missing logs are considered indexed
+    because entries written to them are.
+    """
+    try:
+        with open(filename, "rb") as f:
+            start = f.read(len(LOG_FORMAT_MAGIC))
+    except FileNotFoundError:
+        return True
+
+    return start == b"" or start == LOG_FORMAT_MAGIC
+
+
+def read_log_index(filename: str) -> List[LogIndexRecord]:
+    """
+    Read the headers of the records in an indexed log without unpickling any entries.
+
+    Only the headers of the records are read, seeking past the pickled entries and shelves. A
+    record at the end of the log that is only partially written is ignored.
+
+    Args:
+        filename (``str``): the path to the log
+
+    Returns:
+        ``list[LogIndexRecord]``: the records in the log, in the order they were written
+
+    Raises:
+        ``ValueError``: if the log is not in the indexed format
+    """
+    size = os.path.getsize(filename)
+
+    records = []
+    with open(filename, "rb") as f:
+        if f.read(len(LOG_FORMAT_MAGIC)) != LOG_FORMAT_MAGIC:
+            raise ValueError(f"Log {filename} is not in the indexed format")
+
+        while True:
+            offset = f.tell()
+            length = f.read(_RECORD_HEADER_LENGTH.size)
+            if len(length) < _RECORD_HEADER_LENGTH.size:
+                break
+
+            header_length = _RECORD_HEADER_LENGTH.unpack(length)[0]
+            header = f.read(header_length)
+            if len(header) < header_length:
+                break
+
+            record = LogIndexRecord(
+                offset=offset, header_size=f.tell() - offset, **json.loads(header))
+            if record.end > size:
+                break
+
+            records.append(record)
+            f.seek(record.end)
+
+    return records
+
+
+def _get_superseded_offsets(records: List[LogIndexRecord]) -> Dict[int, LogIndexRecord]:
+    """
+    Get the entry records of a log index whose shelves have been superseded, keyed by offset.
+    """
+    entries = {r.offset: r for r in records if r.kind == "entry"}
+    return {r.superseded: entries[r.superseded] for r in records
+        if r.kind == "tombstone" and r.superseded in entries}
+
+
+def _read_indexed_log(filename: str) -> List["LogEntry"]:
+    """
+    Read the entries of an indexed log, skipping over superseded shelves.
+    """
+    dill = import_or_raise("dill")
+
+    records = read_log_index(filename)
+    superseded = _get_superseded_offsets(records)
+
+    entries = []
+    with open(filename, "rb") as f:
+        for record in records:
+            if record.kind != "entry":
+                continue
+
+            f.seek(record.payload_offset)
+            entry = dill.loads(f.read(record.entry_size))
+            entry.shelf = None
+            if record.shelf_size and record.offset not in superseded:
+                entry.shelf = f.read(record.shelf_size)
+
+            entries.append(entry)
+
+    return entries
+
+
+def _load_indexed_entry(filename: str, record: LogIndexRecord) -> "LogEntry":
+    """
+    Load the entry of a single record of an indexed log, including its shelf.
+    """
+    dill = import_or_raise("dill")
+
+    with open(filename, "rb") as f:
+        f.seek(record.payload_offset)
+        entry = dill.loads(f.read(record.entry_size))
+        entry.shelf = f.read(record.shelf_size) if record.shelf_size else None
+
+    return entry
+
+
+def _read_legacy_log(filename: str) -> List["LogEntry"]:
+    """
+    Read the entries of a log written before logs were indexed, which is a stream of pickled
+    entries.
+    """
+    dill = import_or_raise("dill")
+
+    entries = []
+    with open(filename, "rb") as f:
+        while True:
+            try:
+                entries.append(dill.load(f))
+            except EOFError:
+                break
+
+    return entries
+
+
+def _rewrite_log(filename: str, write: Callable[[BinaryIO], None]):
+    """
+    Replace a log with a new file written by ``write``.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        shutil.copymode(filename, temp_path)
+        os.replace(temp_path, filename)
+
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _convert_legacy_log(filename: str):
+    """
+    Rewrite a log written before logs were indexed in the indexed format.
+    """
+    entries = _read_legacy_log(filename)
+
+    def write(f):
+        for entry in entries:
+            entry._write_to(f)
+
+    _rewrite_log(filename, write)
+
+
+def _compact_log(filename: str):
+    """
+    Rewrite an indexed log without its superseded shelves and tombstones. The pickled entries and
+    shelves are copied without being unpickled.
+    """
+    records = read_log_index(filename)
+    superseded = _get_superseded_offsets(records)
+
+    def write(f):
+        with open(filename, "rb") as src:
+            for record in records:
+                if record.kind != "entry":
+                    continue
+
+                src.seek(record.payload_offset)
+                payload = src.read(record.entry_size + record.shelf_size)
+                if record.offset in superseded:
+                    record.shelf_size, record.shelved_variables = 0, None
+                    payload = payload[:record.entry_size]
+
+                _write_record(f, record, payload)
+
+    _rewrite_log(filename, write)
+
+
 class LogEntry:
     """
     An entry in Otter's log. Tracks event type, grading results, success of operation, and errors
@@ -83,6 +361,9 @@ class LogEntry:
     timestamp: dt.datetime
     """timestamp of event in UTC"""
 
+    shelved_variables: Optional[List[str]] = None
+    """the names of the variables in ``shelf`` if it was created by ``shelve``"""
+
     def __init__(
         self,
         event_type: EventType,
@@ -98,6 +379,7 @@ class LogEntry:
         self.event_type = event_type
         self.shelf = shelf
         self.not_shelved = []
+        self.shelved_variables = None
         self.results = results
         self.question = question
         self.timestamp = dt.datetime.utcnow()
@@ -146,18 +428,43 @@ class LogEntry:
         if self.error is not None:
             raise self.error
 
+    def _write_to(self, file):
+        """
+        Write this entry as a record of an indexed log opened for appending.
+        """
+        dill = import_or_raise("dill")
+
+        entry = copy.copy(self)
+        entry.shelf = None
+        payload = dill.dumps(entry)
+        shelf = self.shelf or b""
+
+        _write_record(file, LogIndexRecord(
+            offset = 0,
+            header_size = 0,
+            kind = "entry",
+            entry_size = len(payload),
+            shelf_size = len(shelf),
+            event_type = self.event_type.name,
+            question = self.question,
+            timestamp = self.timestamp.isoformat(),
+            shelved_variables = self.shelved_variables if self.shelf else None,
+        ), payload + shelf)
+
     def flush_to_file(self, filename):
         """
-        Appends this log entry (pickled) to a file
+        Appends this log entry (pickled) to a file. If the file is a log written before logs were
+        indexed, it is first converted to the indexed format.
 
         Args:
             filename (``str``): the path to the file to append this entry
         """
-        dill = import_or_raise("dill")
-
         try:
-            file = open(filename, "ab+")
-            dill.dump(self, file)
+            if not _is_indexed_log(filename):
+                _convert_legacy_log(filename)
+
+            with open(filename, "ab") as file:
+                self._write_to(file)
 
         except OSError:
             raise Exception(
@@ -165,10 +472,6 @@ class LogEntry:
                 "instructor before continuing on this assignment."
             )
 
-        finally:
-            if "file" in locals():
-                file.close()
-
     def shelve(self, env, delete=False, filename=None, ignore_modules=[], variables=None):
         """
         Stores an environment ``env`` in this log entry using dill as a ``bytes`` object in this entry
@@ -176,8 +479,9 @@ class LogEntry:
         the ``not_shelved`` attribute.
 
         If ``delete`` is ``True``, old environments in the log at ``filename`` for this question are
-        cleared before writing ``env``. Any module names in ``ignore_modules`` will have their functions
-        ignored during pickling. 
+        cleared before writing ``env`` by appending tombstones for them to the log, and the log is
+        compacted once the cleared environments take up most of it. Any module names in
+        ``ignore_modules`` will have their functions ignored during pickling.
 
         Args:
             env (``dict``): the environment to pickle
@@ -190,52 +494,49 @@ class LogEntry:
         Returns:
             ``LogEntry``: this entry
         """
-        dill = import_or_raise("dill")
-
-        # delete old entry without reading entire log
+        # supersede old shelves using the log's index instead of rewriting the log
+        variables_stored = None
         if delete:
             assert filename, "old env deletion indicated but no log filename provided"
-            try:                
-                # copy the existing log to a temporary file so that we can edit the original
-                with tempfile.TemporaryFile() as tf:
-                    with open(filename, "rb") as f:
-                        tf.write(f.read())
-                    tf.seek(0)
-                    os.system(f"rm -f {filename}")
-                    while True:
-                        try:
-                            entry = dill.load(tf)
-
-                            if entry.question == self.question and entry.shelf is not None:
-
-                                # only edit variables if it's not provided
-                                if variables is None:
-                                    variables = list(entry.unshelve().keys())
-                                    variables_stored = None
-                                else:
-                                    variables_stored = list(entry.unshelve().keys())
-
-                                entry.shelf = None
-
-                            entry.flush_to_file(filename)
-
-                            del locals()["entry"]
-
-                        except EOFError:
-                            break
-
-            except FileNotFoundError:
-                pass
-
-        try:
-            if isinstance(variables_stored, list):
-                variables = {k : v for k, v in variables.items() if k in variables_stored}
-        except UnboundLocalError:
-            pass
+            if os.path.isfile(filename):
+                if not _is_indexed_log(filename):
+                    _convert_legacy_log(filename)
+
+                records = read_log_index(filename)
+                superseded = _get_superseded_offsets(records)
+                old_shelves = [r for r in records if r.kind == "entry" and r.shelf_size and \
+                    r.question == self.question and r.offset not in superseded]
+
+                if old_shelves:
+                    # the names of the shelved variables are in the index unless the shelf was
+                    # converted from a legacy log
+                    variables_stored = old_shelves[-1].shelved_variables
+                    if variables_stored is None:
+                        variables_stored = list(
+                            _load_indexed_entry(filename, old_shelves[-1]).unshelve().keys())
+
+                    # only edit variables if it's not provided
+                    if variables is None:
+                        variables, variables_stored = variables_stored, None
+
+                    with open(filename, "ab") as f:
+                        for record in old_shelves:
+                            tombstone = LogIndexRecord(
+                                offset=0, header_size=0, kind="tombstone", superseded=record.offset)
+                            _write_record(f, tombstone)
+
+                    superseded_bytes = sum(r.shelf_size for r in superseded.values()) + \
+                        sum(r.shelf_size for r in old_shelves)
+                    if superseded_bytes >= max(_MIN_COMPACTION_BYTES, os.path.getsize(filename) // 2):
+                        _compact_log(filename)
+
+        if isinstance(variables_stored, list):
+            variables = {k : v for k, v in variables.items() if k in variables_stored}
 
         shelf_contents, not_shelved = LogEntry.shelve_environment(env, variables=variables, ignore_modules=ignore_modules)
         self.shelf = shelf_contents
         self.not_shelved = not_shelved
+        self.shelved_variables = [k for k in env if k not in not_shelved]
         return self
 
     def unshelve(self, global_env={}):
@@ -288,7 +589,8 @@ class LogEntry:
     @staticmethod
     def log_from_file(filename, ascending=True):
         """
-        Reads a log file and returns a sorted list of the log entries pickled in that file
+        Reads a log file and returns a sorted list of the log entries pickled in that file. Both
+        indexed logs and logs written before logs were indexed can be read.
 
         Args:
             filename (``str``): the path to the log
@@ -298,25 +600,15 @@ class LogEntry:
         Returns:
             ``list[LogEntry]``: the sorted log
         """
-        dill = import_or_raise("dill")
-
-        try:
-            file = open(filename, "rb")
-
-            log = []
-            while True:
-                try:
-                    log.append(dill.load(file))
-                except EOFError:
-                    break
-
-            log = list(sorted(log, key = lambda l: l.timestamp, reverse = not ascending))
+        if not os.path.isfile(filename):
+            raise FileNotFoundError(f"No such log: {filename}")
 
-            return log
+        if _is_indexed_log(filename):
+            log = _read_indexed_log(filename)
+        else:
+            log = _read_legacy_log(filename)
 
-        finally:
-            if "file" in locals():
-                file.close()
+        return list(sorted(log, key = lambda l: l.timestamp, reverse = not ascending))
 
     @staticmethod
     def shelve_environment(env, variables=None, ignore_modules=[]):
@@ -3,7 +3,6 @@
 import datetime as dt
 import inspect
 import json
-import nbformat as nbf
 import os
 import warnings
 import zipfile
@@ -11,7 +10,7 @@ import zipfile
 from glob import glob
 from IPython.display import display, HTML
 from textwrap import indent
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
 
 from .logs import LogEntry, EventType, Log
 from .utils import (
@@ -32,7 +31,7 @@ from ..export import export_notebook
 from ..nbmeta_config import NBMetadataConfig
 from ..plugins import PluginCollection
 from ..test_files import GradingResults
-from ..utils import Loggable
+from ..utils import load_notebook, Loggable
 
 
 _OTTER_LOG_FILENAME = ".OTTER_LOG"
@@ -52,6 +51,8 @@ class Notebook(Loggable):
             this information is automatically parsed from IPython on creation
         jupyterlite (``bool | None``): whether this notebook is being run on JupyterLite; if
             ``None``, this information is automatically parsed from IPython on creation
+        cache_checks (``bool``): whether to reuse the result of a check if the variables that the
+            test reads have not changed since it was last run; see ``otter.check.check_cache``
     """
 
     _grading_mode = False
@@ -90,6 +91,9 @@ class Notebook(Loggable):
     _vars_to_store: Optional[Dict[str, str]] = None
     """a map of var names -> type name to use when serializing environments"""
 
+    _check_cache: Optional["CheckCache"]
+    """the cache of check results, if checks are cached"""
+
     @logs_event(EventType.INIT)
     def __init__(
         self,
@@ -98,6 +102,7 @@ class Notebook(Loggable):
         tests_url_prefix=None,
         colab=None,
         jupyterlite=None,
+        cache_checks=False,
     ):
         global _SHELVE
 
@@ -122,6 +127,10 @@ class Notebook(Loggable):
         self._tests_url_prefix = tests_url_prefix
         self._addl_files = []
         self._plugin_collections = {}
+        self._check_cache = None
+        if cache_checks:
+            from .check_cache import CheckCache
+            self._check_cache = CheckCache()
 
         # assume using otter service if there is a .otter file
         otter_configs = glob("*.otter")
@@ -140,8 +149,7 @@ class Notebook(Loggable):
             self._notebook = self._config["notebook"]
 
         if self._notebook:
-            self._nbmeta_config = NBMetadataConfig.from_notebook(
-                nbf.read(self._notebook, nbf.NO_CONVERT))
+            self._nbmeta_config = NBMetadataConfig.from_notebook(load_notebook(self._notebook))
         else:
             self._nbmeta_config = NBMetadataConfig()
 
@@ -276,8 +284,14 @@ class Notebook(Loggable):
             global_env = inspect.currentframe().f_back.f_back.f_globals
 
         # run the check
-        self._logger.debug(f"Calling checker")
-        result = Checker.check(test_path, self._nbmeta_config, test_name, global_env)
+        # results are not cached in grading mode because the checker must track every result
+        if self._check_cache is not None and not type(self)._grading_mode:
+            self._logger.debug(f"Calling checker with cache")
+            result = self._check_cache.check(
+                test_path, self._nbmeta_config, test_name, global_env)
+        else:
+            self._logger.debug(f"Calling checker")
+            result = Checker.check(test_path, self._nbmeta_config, test_name, global_env)
 
         return LoggedEventReturnValue(result, question=question, shelve_env=global_env)
 
@@ -563,3 +577,7 @@ class Notebook(Loggable):
                     results.append((test_name, result))
 
         return LoggedEventReturnValue(GradingResults(results))
+
+
+if TYPE_CHECKING:
+    from .check_cache import CheckCache
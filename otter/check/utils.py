@@ -1,7 +1,5 @@
 """Utilities for Otter Check"""
 
-import ipylab
-import nbformat as nbf
 import os
 import sys
 import tempfile
@@ -13,7 +11,6 @@ from enum import Enum
 from glob import glob
 from IPython import get_ipython
 from IPython.display import display, Javascript
-from ipywidgets import Button, HTML, Output, VBox
 from subprocess import run, PIPE
 from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TYPE_CHECKING, TypeVar, Union
 
@@ -49,6 +46,7 @@ def save_notebook(filename: str, timeout: Union[int, float] = 10) -> bool:
 
         # For JupyterLab
         try:
+            import ipylab
             app = ipylab.JupyterFrontEnd()
             app.commands.execute("docmanager:save")
         except: pass
@@ -341,6 +339,8 @@ def display_pdf_confirmation_widget(message: Optional[str], pdf_error: Optional[
         message (``str | None``): a custom message to use
         callback (``callable``): a callback function to execute after the user ACKs
     """
+    from ipywidgets import Button, HTML, Output, VBox
+
     o = Output()
     def wrapped_callback(*args):
         with o: callback()
@@ -139,6 +139,8 @@ defaults = grade.__kwdefaults__
 @click.option("--no-network", is_flag=True, help="Disable networking in the containers")
 @click.option("--no-kill", is_flag=True, help="Do not kill containers after grading")
 @click.option("--debug", is_flag=True, help="Run in debug mode (without ignoring errors thrown during execution)")
+@click.option("--snapshot-environments", is_flag=True, help="Save the environment of each submission after it is executed")
+@click.option("--tests-only", is_flag=True, help="Run the tests against saved environment snapshots instead of executing the submissions")
 @click.option("--prune", is_flag=True, help="Prune all of Otter's grading images")
 @click.option("-f", "--force", is_flag=True, help="Force action (don't ask for confirmation)")
 def grade_cli(*args, **kwargs):
@@ -1,17 +1,345 @@
 """Execution and grading internals for Otter-Grader"""
 
-import nbformat
+import asyncio
+import functools
 import os
 import pickle
 import tempfile
 
-from traitlets.config import Config
+from typing import AsyncIterator, Iterable, Optional, Tuple
 
 from .checker import Checker
-from .logging import start_server
+from .fail_fast import GradingAbortedError
+from .from_log import grade_log, grade_logs
+from .logging import get_shared_server_address
+from .zygote import grade_notebooks_with_shared_prefixes
 
 from ..test_files import GradingResults
-from ..utils import NBFORMAT_VERSION
+from ..utils import load_notebook, loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+
+class _NotebookGrader:
+    """
+    The state of grading a single submission, shared by ``grade_notebook`` and
+    ``grade_notebook_async``.
+
+    Creating a grader loads the submission, runs the ``before_execution`` plugin event, and
+    configures the preprocessors that add Otter's cells to the notebook and execute it. See
+    ``grade_notebook`` for a description of the arguments; if ``stable_names`` is true, the cells
+    added to the notebook are the same for every submission.
+    """
+
+    def __init__(
+        self,
+        submission_path,
+        *,
+        tests_glob=[],
+        ignore_errors=True,
+        script=False,
+        cwd=None,
+        test_dir=None,
+        seed=None,
+        seed_variable=None,
+        log=None,
+        variables=None,
+        plugin_collection=None,
+        force_python3_kernel=True,
+        snapshot_dir=None,
+        test_workers=None,
+        sample_resources=False,
+        test_case_timeout=None,
+        slim=False,
+        max_cell_output_size=None,
+        max_output_size=None,
+        discard_outputs=False,
+        notebook=None,
+        results_stream_path=None,
+        abort_on_critical_error=False,
+        max_consecutive_errors=None,
+        max_kernel_restarts=0,
+        fixture_cache_dir=None,
+        stable_names=False,
+    ):
+        import nbformat
+
+        from traitlets.config import Config
+
+        from .fail_fast import FailFastRules
+        from .kernelspec import CachedKernelSpecKernelManager
+        from .preprocessor import GradingPreprocessor
+        from .recovery import RecoveringExecutePreprocessor
+        from .resources import can_sample_resources, get_kernel_pid, ResourceSampler
+        from .slimming import slim_notebook
+        from .snapshot import get_snapshot_path
+
+        if notebook is not None:
+            nb = notebook
+
+        elif not script:
+            nb = load_notebook(submission_path)
+
+        else:
+            with open(submission_path) as f:
+                nb = f.read()
+
+            nb = nbformat.v4.new_notebook(cells=[nbformat.v4.new_code_cell(nb)])
+
+        if plugin_collection is not None:
+            nb = plugin_collection.before_execution(nb)
+
+        if slim and not script:
+            slim_notebook(nb)
+
+        self.nb = nb
+        self.plugin_collection = plugin_collection
+        self.sampler = None
+
+        # start the kernel in cwd instead of the working directory of this process, which may be
+        # shared by concurrent gradings
+        self.resources = {"metadata": {"path": cwd}} if cwd else {}
+
+        c = Config()
+
+        host, port = get_shared_server_address()
+
+        self.results_handle, self.results_file = tempfile.mkstemp(suffix=".pkl")
+
+        # a path that differs between submissions would make their init cells differ
+        self.results_stream_path, self._owns_results_stream = None, False
+        if not stable_names:
+            if results_stream_path is None:
+                results_stream_path, self._owns_results_stream = self.results_file + ".stream", True
+            self._start_results_stream(results_stream_path, tests_glob, cwd)
+
+        # GradingPreprocessor config
+        c.GradingPreprocessor.cwd = cwd
+        c.GradingPreprocessor.test_dir = test_dir
+        c.GradingPreprocessor.tests_glob = tests_glob
+        c.GradingPreprocessor.results_path = self.results_file
+        c.GradingPreprocessor.results_stream_path = self.results_stream_path
+        c.GradingPreprocessor.seed = seed
+        c.GradingPreprocessor.seed_variable = seed_variable
+        c.GradingPreprocessor.otter_log = log
+        c.GradingPreprocessor.variables = variables
+        c.GradingPreprocessor.logging_server_host = host
+        c.GradingPreprocessor.logging_server_port = port
+        c.GradingPreprocessor.force_python3_kernel = force_python3_kernel
+        c.GradingPreprocessor.test_workers = test_workers
+        c.GradingPreprocessor.test_case_timeout = test_case_timeout
+        c.GradingPreprocessor.stable_names = stable_names
+        self.fixture_values_path = None
+        if fixture_cache_dir is not None:
+            self._write_fixture_values(fixture_cache_dir, tests_glob, cwd)
+            c.GradingPreprocessor.fixture_values_path = self.fixture_values_path
+            c.GradingPreprocessor.fixture_values_digest = self.fixture_values_digest
+        if snapshot_dir is not None:
+            c.GradingPreprocessor.snapshot_path = \
+                os.path.abspath(get_snapshot_path(snapshot_dir, submission_path))
+
+        # ExecutePreprocessor config
+        c.ExecutePreprocessor.allow_errors = ignore_errors
+        c.ExecutePreprocessor.kernel_manager_class = CachedKernelSpecKernelManager
+        c.BoundedExecutePreprocessor.max_cell_output_size = max_cell_output_size
+        c.BoundedExecutePreprocessor.max_output_size = max_output_size
+        c.BoundedExecutePreprocessor.discard_outputs = discard_outputs
+        c.RecoveringExecutePreprocessor.max_kernel_restarts = max_kernel_restarts
+
+        self.gp = GradingPreprocessor(config=c)
+        self.ep = RecoveringExecutePreprocessor(config=c)
+
+        cell_executed_hooks = []
+        if sample_resources and can_sample_resources():
+            def start_sampler(**kwargs):
+                pid = get_kernel_pid(self.ep.km)
+                if pid is not None:
+                    self.sampler = ResourceSampler(pid)
+                    self.sampler.start()
+
+            def sample_after_last_cell(cell_index, **kwargs):
+                # take a final sample before the kernel is shut down
+                if self.sampler is not None and cell_index == len(self.ep.nb.cells) - 1:
+                    self.sampler.sample()
+
+            self.ep.on_notebook_start = start_sampler
+            cell_executed_hooks.append(sample_after_last_cell)
+
+        fail_fast_rules = FailFastRules(abort_on_critical_error, max_consecutive_errors)
+        if fail_fast_rules.enabled:
+            cell_executed_hooks.append(fail_fast_rules.check_cell)
+
+        if cell_executed_hooks:
+            def on_cell_executed(**kwargs):
+                for hook in cell_executed_hooks:
+                    hook(**kwargs)
+
+            self.ep.on_cell_executed = on_cell_executed
+
+    @staticmethod
+    def _load_test_files(tests_glob, cwd):
+        """
+        Load the test files that will be run in the notebook, resolving relative paths against
+        ``cwd``.
+        """
+        from ..nbmeta_config import NBMetadataConfig
+        from ..test_files import create_test_file
+
+        test_files = []
+        for test_path in tests_glob:
+            if cwd and not os.path.isabs(test_path):
+                test_path = os.path.join(cwd, test_path)
+            test_files.append(create_test_file(test_path, NBMetadataConfig()))
+
+        return test_files
+
+    def _write_fixture_values(self, cache_dir, tests_glob, cwd):
+        """
+        Compute the values of the persisted fixtures of the test files in this process, using and
+        updating ``cache_dir``, and write them to a file that the kernel loads; see
+        ``otter.test_files.exception_test.write_fixture_values``.
+        """
+        from ..test_files.exception_test import write_fixture_values
+
+        handle, path = tempfile.mkstemp(suffix=".pkl")
+        os.close(handle)
+        try:
+            self.fixture_values_digest = write_fixture_values(
+                self._load_test_files(tests_glob, cwd), os.path.abspath(cache_dir), path)
+            self.fixture_values_path = path
+
+        except Exception as e:
+            LOGGER.warning(f"Could not compute persisted fixture values: {e}")
+            os.remove(path)
+
+    def _start_results_stream(self, path, tests_glob, cwd):
+        """
+        Write the header of the results stream, which contains the test files that will be run.
+        """
+        from .results_stream import start_results_stream
+
+        try:
+            start_results_stream(path, self._load_test_files(tests_glob, cwd))
+            self.results_stream_path = path
+
+        except Exception as e:
+            LOGGER.warning(f"Could not start results stream {path}: {e}")
+
+    def stop(self):
+        """
+        Clean up the grading preprocessor and stop sampling resources after the notebook has been
+        executed.
+        """
+        self.gp.cleanup()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+    def get_results(self, executed_nb):
+        """
+        Read the results written by the executed notebook and run the ``after_grading`` plugin
+        event.
+
+        Args:
+            executed_nb (``nbformat.NotebookNode``): the executed notebook
+
+        Returns:
+            ``otter.test_files.GradingResults``: the results of grading
+        """
+        try:
+            with open(self.results_file, "rb") as f:
+                results = pickle.load(f)
+        except Exception as e:
+            results = self.recover_results(e)
+            if results is None:
+                results = GradingResults.without_results(e)
+
+        if not isinstance(results, GradingResults):
+            raise TypeError("Results deserialized from grading notebook were not a GradingResults instance")
+
+        return self._finish_results(results, executed_nb)
+
+    def recover_results(self, error):
+        """
+        Assemble partial results from the results stream after grading ended abnormally. See
+        ``otter.execute.results_stream.recover_results``.
+
+        Args:
+            error (``Exception``): the error that ended grading
+
+        Returns:
+            ``otter.test_files.GradingResults | None``: the partial results, or ``None`` if there
+            are none
+        """
+        from .fail_fast import ABORTED_MESSAGE, GradingAbortedError
+        from .results_stream import recover_results, UNREACHED_MESSAGE
+
+        if self.results_stream_path is None:
+            return None
+
+        message = ABORTED_MESSAGE if isinstance(error, GradingAbortedError) else UNREACHED_MESSAGE
+        results = recover_results(self.results_stream_path, error, message)
+        if results is not None:
+            LOGGER.warning(f"Grading ended early ({error}); recovered partial results")
+
+        return results
+
+    def get_partial_results(self, error, executed_nb):
+        """
+        Get the partial results of a submission whose kernel died, timed out, or was aborted by a
+        fail-fast rule, if any tests were expected to run, and run the ``after_grading`` plugin
+        event.
+
+        Args:
+            error (``Exception``): the error that ended grading
+            executed_nb (``nbformat.NotebookNode``): the partially-executed notebook
+
+        Returns:
+            ``otter.test_files.GradingResults | None``: the partial results, or ``None`` if there
+            are none
+        """
+        results = self.recover_results(error)
+        if results is None:
+            return None
+        return self._finish_results(results, executed_nb)
+
+    def _finish_results(self, results, executed_nb):
+        """
+        Add the executed notebook, cell timings, and resource usage to a results object and run
+        the ``after_grading`` plugin event.
+        """
+        from .preprocessor import CELL_METADATA_KEY
+        from .timing import resolve_cell_indices
+
+        results.notebook = executed_nb
+        results.kernel_crashes = list(self.ep.kernel_crashes)
+        if results.kernel_crashes:
+            crashes = f"The kernel crashed {len(results.kernel_crashes)} time(s) while executing " \
+                "the submission and was restarted; cells after a crash were executed without " \
+                "the variables defined before it."
+            results.output = f"{results.output}\n\n{crashes}" if results.output else crashes
+
+        results.cell_timings = \
+            resolve_cell_indices(results.cell_timings, executed_nb, CELL_METADATA_KEY)
+        if self.sampler is not None:
+            results.resource_usage = self.sampler.get_usage()
+
+        if self.plugin_collection is not None:
+            self.plugin_collection.run("after_grading", results)
+
+        return results
+
+    def cleanup(self):
+        """
+        Remove the results file, the fixture values file, and, if it was created by this grader,
+        the results stream file.
+        """
+        os.close(self.results_handle)
+        os.remove(self.results_file)
+        if self._owns_results_stream and self.results_stream_path is not None:
+            os.remove(self.results_stream_path)
+        if self.fixture_values_path is not None:
+            os.remove(self.fixture_values_path)
 
 
 def grade_notebook(
@@ -28,10 +356,29 @@ def grade_notebook(
     variables=None,
     plugin_collection=None,
     force_python3_kernel=True,
+    snapshot_dir=None,
+    test_workers=None,
+    sample_resources=False,
+    test_case_timeout=None,
+    slim=False,
+    max_cell_output_size=None,
+    max_output_size=None,
+    discard_outputs=False,
+    notebook=None,
+    results_stream_path=None,
+    abort_on_critical_error=False,
+    max_consecutive_errors=None,
+    max_kernel_restarts=0,
+    fixture_cache_dir=None,
 ):
     """
     Grade an assignment file and return grade information.
 
+    The results of each check run by the submission are streamed out of the kernel as they are
+    computed (see ``otter.execute.results_stream``), so if the kernel dies, execution times out, or
+    a fail-fast rule aborts execution, the results of the checks that were run are returned, with
+    the remaining tests failed, instead of raising an error.
+
     Args:
         submission_path (``str``): path to a single notebook or Python script
         tests_glob (``list[str]``): paths of test files that should be run; tests that are included
@@ -39,8 +386,8 @@ def grade_notebook(
             the submission
         ignore_errors (``bool``): whether errors in execution should be ignored
         script (``bool``): whether the ``submission_path`` is a Python script
-        cwd (``str``): working directory of execution to be appended to ``sys.path`` before
-            executing the submission
+        cwd (``str``): working directory of execution, in which the kernel is started and which is
+            appended to ``sys.path`` before executing the submission
         test_dir (``str``): path to directory of tests in the grading environment
         seed (``int``): random seed for intercell seeding
         seed_variable (``str|None``): a variable name to override with the seed
@@ -50,76 +397,181 @@ def grade_notebook(
             checking values deserialized from ``log``
         plugin_collection (``otter.plugins.PluginCollection``): a set of plugins to run the
             ``before_execution`` and ``after_grading`` events on this submission
+        force_python3_kernel (``bool``): whether to force the notebook to be executed with the
+            ``python3`` kernel
+        snapshot_dir (``str | None``): a directory in which to persist the post-execution global
+            environment of the submission, keyed by the hash of the submission file; see
+            ``otter.execute.snapshot``
+        test_workers (``int | None``): if specified, the tests that have not already been run by
+            the submission are each run in a forked child process of the kernel, with at most this
+            many running at once, so that they cannot affect each other's environment
+        sample_resources (``bool``): whether to sample the peak memory, CPU time, and number of
+            child processes used by the kernel while executing the submission; resources can only
+            be sampled on platforms with ``/proc``
+        test_case_timeout (``int | float | None``): the default number of seconds after which a
+            test case is interrupted and failed; test cases can override this with their own
+            timeouts
+        slim (``bool``): whether to remove the outputs, attachments, and oversized metadata from
+            the notebook before executing it; see ``otter.execute.slimming``
+        max_cell_output_size (``int | None``): the maximum number of characters of output to
+            capture from each cell of the executed notebook; outputs past this limit are truncated
+        max_output_size (``int | None``): the maximum number of characters of output to capture
+            from the whole executed notebook
+        discard_outputs (``bool``): whether to discard all outputs of the executed notebook
+        notebook (``nbformat.NotebookNode | None``): the already-parsed notebook at
+            ``submission_path``, if it has been loaded; this notebook is modified during grading
+        results_stream_path (``str | None``): the path at which to write the results stream; if
+            unspecified, a temporary file is used and removed after grading
+        abort_on_critical_error (``bool``): whether to stop executing the submission if a cell
+            tagged ``otter_critical`` raises an error; see ``otter.execute.fail_fast``
+        max_consecutive_errors (``int | None``): if specified, the number of consecutive cells that
+            must raise errors to stop executing the submission
+        max_kernel_restarts (``int``): the maximum number of times to restart the kernel and
+            continue executing the submission if the kernel dies; see ``otter.execute.recovery``
+        fixture_cache_dir (``str | None``): a directory in which to persist the values of test
+            file fixtures so that they are computed once for all submissions; the values are
+            computed by this process, outside of the kernel, and the kernel is never given this
+            directory; see ``otter.test_files.fixture``
 
     Returns:
         ``otter.test_files.GradingResults``: the results of grading
     """
-    from nbconvert.preprocessors import ExecutePreprocessor
-    from .preprocessor import GradingPreprocessor
+    grader = _NotebookGrader(
+        submission_path,
+        tests_glob = tests_glob,
+        ignore_errors = ignore_errors,
+        script = script,
+        cwd = cwd,
+        test_dir = test_dir,
+        seed = seed,
+        seed_variable = seed_variable,
+        log = log,
+        variables = variables,
+        plugin_collection = plugin_collection,
+        force_python3_kernel = force_python3_kernel,
+        snapshot_dir = snapshot_dir,
+        test_workers = test_workers,
+        sample_resources = sample_resources,
+        test_case_timeout = test_case_timeout,
+        slim = slim,
+        max_cell_output_size = max_cell_output_size,
+        max_output_size = max_output_size,
+        discard_outputs = discard_outputs,
+        notebook = notebook,
+        results_stream_path = results_stream_path,
+        abort_on_critical_error = abort_on_critical_error,
+        max_consecutive_errors = max_consecutive_errors,
+        max_kernel_restarts = max_kernel_restarts,
+        fixture_cache_dir = fixture_cache_dir,
+    )
+
+    from nbclient.exceptions import CellTimeoutError, DeadKernelError
+
+    try:
+        try:
+            nb, _ = grader.gp.preprocess(grader.nb)
+            executed_nb, _ = grader.ep.preprocess(nb, grader.resources)
 
-    if not script:
-        nb = nbformat.read(submission_path, as_version=NBFORMAT_VERSION)
+        except (CellTimeoutError, DeadKernelError, GradingAbortedError) as e:
+            results = grader.get_partial_results(e, nb)
+            if results is None:
+                raise
+            return results
 
-    else:
-        with open(submission_path) as f:
-            nb = f.read()
+        finally:
+            grader.stop()
 
-        nb = nbformat.v4.new_notebook(cells=[nbformat.v4.new_code_cell(nb)])
+        return grader.get_results(executed_nb)
 
-    if plugin_collection is not None:
-        nb = plugin_collection.before_execution(nb)
+    finally:
+        grader.cleanup()
 
-    results_handle, results_file = tempfile.mkstemp(suffix=".pkl")
 
-    try:
-        c = Config()
+async def _run_in_thread(func, *args, **kwargs):
+    """
+    Run a blocking function in the event loop's default executor so that it does not stall other
+    gradings running on the loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
 
-        (host, port), stop_server = start_server()
 
+async def grade_notebook_async(submission_path, **kwargs):
+    """
+    Grade an assignment file and return grade information, executing it with ``nbclient``'s
+    asynchronous API.
+
+    Because the kernel is driven from the event loop instead of blocking the calling thread, many
+    submissions can be graded concurrently in a single process; see ``grade_notebooks_async``. The
+    blocking steps before and after execution (loading the submission and test files, computing
+    persisted fixtures, preprocessing the notebook, and reading the results) are run in the event
+    loop's default executor.
+
+    Args:
+        submission_path (``str``): path to a single notebook or Python script
+        **kwargs: the keyword arguments accepted by ``grade_notebook``
+
+    Returns:
+        ``otter.test_files.GradingResults``: the results of grading
+    """
+    from nbclient.exceptions import CellTimeoutError, DeadKernelError
+
+    grader = await _run_in_thread(_NotebookGrader, submission_path, **kwargs)
+
+    try:
         try:
-            # GradingPreprocessor config
-            c.GradingPreprocessor.cwd = cwd
-            c.GradingPreprocessor.test_dir = test_dir
-            c.GradingPreprocessor.tests_glob = tests_glob
-            c.GradingPreprocessor.results_path = results_file
-            c.GradingPreprocessor.seed = seed
-            c.GradingPreprocessor.seed_variable = seed_variable
-            c.GradingPreprocessor.otter_log = log
-            c.GradingPreprocessor.variables = variables
-            c.GradingPreprocessor.logging_server_host = host
-            c.GradingPreprocessor.logging_server_port = port
-            c.GradingPreprocessor.force_python3_kernel = force_python3_kernel
-
-            # ExecutePreprocessor config
-            c.ExecutePreprocessor.allow_errors = ignore_errors
-
-            gp = GradingPreprocessor(config=c)
-            ep = ExecutePreprocessor(config=c)
-
-            nb, _ = gp.preprocess(nb)
-            executed_nb, _ = ep.preprocess(nb)
+            nb, _ = await _run_in_thread(grader.gp.preprocess, grader.nb)
+            grader.ep.nb = nb
+            grader.ep.resources = grader.resources
+            executed_nb = await grader.ep.async_execute()
+
+        except (CellTimeoutError, DeadKernelError, GradingAbortedError) as e:
+            results = await _run_in_thread(grader.get_partial_results, e, nb)
+            if results is None:
+                raise
+            return results
 
         finally:
-            stop_server()
-            gp.cleanup()
+            await _run_in_thread(grader.stop)
 
-        os.close(results_handle)
+        return await _run_in_thread(grader.get_results, executed_nb)
 
-        try:
-            with open(results_file, "rb") as f:
-                results = pickle.load(f)
-        except Exception as e:
-            results = GradingResults.without_results(e)
+    finally:
+        await _run_in_thread(grader.cleanup)
 
-        if not isinstance(results, GradingResults):
-            raise TypeError("Results deserialized from grading notebook were not a GradingResults instance")
 
-        results.notebook = executed_nb
+async def grade_notebooks_async(
+    submission_paths: Iterable[str],
+    max_concurrency: Optional[int] = None,
+    **kwargs,
+) -> AsyncIterator[Tuple[str, GradingResults]]:
+    """
+    Grade many assignment files concurrently from a single event loop, yielding the results of
+    each as soon as it finishes.
 
-        if plugin_collection is not None:
-            plugin_collection.run("after_grading", results)
+    At most ``max_concurrency`` kernels are running at once. If grading a submission raises an
+    error, it is logged and the submission's results are created with
+    ``GradingResults.without_results``.
 
-        return results
+    Args:
+        submission_paths (``Iterable[str]``): paths to the notebooks or Python scripts to grade
+        max_concurrency (``int | None``): the maximum number of submissions to grade at once;
+            defaults to the number of CPUs
+        **kwargs: the keyword arguments accepted by ``grade_notebook``, used for every submission
 
-    finally:
-        os.remove(results_file)
+    Yields:
+        ``tuple[str, otter.test_files.GradingResults]``: the path to each submission and its
+        results, in the order in which they finish
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or os.cpu_count() or 1)
+
+    async def grade(submission_path):
+        async with semaphore:
+            try:
+                return submission_path, await grade_notebook_async(submission_path, **kwargs)
+            except Exception as e:
+                LOGGER.error(f"Error encountered while grading {submission_path}: {e}")
+                return submission_path, GradingResults.without_results(e)
+
+    for future in asyncio.as_completed([grade(p) for p in submission_paths]):
+        yield await future
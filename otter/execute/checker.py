@@ -1,46 +1,147 @@
 """Class for running tests from test files"""
 
 import inspect
+import os
 
-from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
 
+from .isolation import can_fork, run_test_files_in_forks
+from .results_stream import append_to_results_stream, read_results_stream
 from ..test_files import create_test_file, TestFile
 from ..nbmeta_config import NBMetadataConfig
+from ..utils import loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+
+class _CheckerSession:
+    """
+    The tracking state of a ``Checker`` session; see ``Checker.session``.
+    """
+
+    _track_results: bool
+    """whether the results of checks are being tracked"""
+
+    _test_files: List[TestFile]
+    """the tracked test files"""
+
+    _stream_path: Optional[str]
+    """the path to a results stream file to append tracked test files to"""
+
+    def __init__(self):
+        self._track_results = False
+        self._test_files = []
+        self._stream_path = None
+
+
+_SESSION: ContextVar[Optional[_CheckerSession]] = ContextVar("checker_session", default=None)
+"""the ``Checker`` session of the current context, if any"""
 
 
 class Checker:
     """
     A class for running and optionally tracking checks against test files.
 
-    This class is not meant to be instantiated and is composed solely of class methods.
+    This class is not meant to be instantiated and is composed solely of class methods. By default,
+    tracking state is stored on the class and shared by the whole process; ``Checker.session``
+    scopes it to the current thread or ``asyncio`` task instead.
     """
 
     _track_results = False
     _test_files = []
+    _stream_path = None
 
     def __new__(cls, *args, **kwargs):
         raise NotImplementedError("The Checker class cannot be instantiated")
 
+    @classmethod
+    def _get_state(cls):
+        """
+        Get the object holding the tracking state of the current context: the active session if
+        there is one, otherwise this class.
+        """
+        session = _SESSION.get()
+        return cls if session is None else session
+
+    @classmethod
+    @contextmanager
+    def session(cls):
+        """
+        A context manager that gives the current thread or ``asyncio`` task its own tracking state
+        (with tracking disabled and no results) until it exits, so that checks run by concurrent
+        gradings in the same process do not affect each other.
+        """
+        token = _SESSION.set(_CheckerSession())
+        try:
+            yield
+        finally:
+            _SESSION.reset(token)
+
     @classmethod
     def enable_tracking(cls):
         """
         Enable the tracking of test results from calls to ``check``.
         """
-        cls._track_results = True
+        cls._get_state()._track_results = True
 
     @classmethod
     def disable_tracking(cls):
         """
         Disable the tracking of test results from calls to ``check``.
         """
-        cls._track_results = False
+        cls._get_state()._track_results = False
+
+    @classmethod
+    def stream_results(cls, path: Optional[str]):
+        """
+        Append each tracked test file to the results stream file at ``path`` as soon as it has been
+        run, so that its results can be recovered if grading ends before they are exported. See
+        ``otter.execute.results_stream``.
+
+        Args:
+            path (``str | None``): the path to the stream file, or ``None`` to stop streaming
+        """
+        cls._get_state()._stream_path = path
+
+    @classmethod
+    def load_streamed_results(cls):
+        """
+        Add the test files in the results stream to the tracked results, if tracking is enabled,
+        so that the results of checks run before the kernel was restarted are not lost.
+        """
+        state = cls._get_state()
+        if not state._track_results or state._stream_path is None or \
+                not os.path.isfile(state._stream_path):
+            return
+
+        _, test_files = read_results_stream(state._stream_path)
+        state._test_files.extend(test_files)
+
+    @classmethod
+    def _track(cls, test_files: List[TestFile]):
+        """
+        Add test files to the tracked results and results stream, if tracking is enabled.
+        """
+        state = cls._get_state()
+        if not state._track_results:
+            return
+
+        state._test_files.extend(test_files)
+        if state._stream_path is not None:
+            try:
+                append_to_results_stream(state._stream_path, test_files)
+            except Exception as e:
+                LOGGER.warning(f"Could not append results to stream {state._stream_path}: {e}")
 
     @classmethod
     def get_results(cls):
         """
         Get a pointer to the list into which check results are being collected.
         """
-        return cls._test_files
+        return cls._get_state()._test_files
 
     @classmethod
     def clear_results(cls):
@@ -50,7 +151,7 @@ class Checker:
         Does not affect the original list, only overwrites the field in the ``Checker`` class that
         points to it.
         """
-        cls._test_files = []
+        cls._get_state()._test_files = []
 
     @classmethod
     def check(
@@ -81,11 +182,18 @@ class Checker:
 
         test.run(global_env)
 
-        if cls._track_results:
-            cls._test_files.append(test)
+        cls._track([test])
 
         return test
 
+    @classmethod
+    def _already_checked(cls, test_path):
+        """
+        Determine whether the specified test file has already been run.
+        """
+        return any(
+            test_path in tf.path or tf.path in test_path for tf in cls._get_state()._test_files)
+
     @classmethod
     def check_if_not_already_checked(cls, test_path, global_env=None):
         """
@@ -103,10 +211,54 @@ class Checker:
             ``otter.test_files.abstract_test.TestFile``: result of running the tests in the 
             given global environment
         """
-        if any(test_path in tf.path or tf.path in test_path for tf in cls._test_files):
+        if cls._already_checked(test_path):
             return
 
         if global_env is None:
             global_env = inspect.currentframe().f_back.f_globals
 
         return cls.check(test_path, NBMetadataConfig(), global_env=global_env)
+
+    @classmethod
+    def check_isolated_if_not_already_checked(
+        cls,
+        test_paths: List[str],
+        max_workers: int,
+        global_env: Optional[Dict[str, Any]] = None,
+    ) -> List[TestFile]:
+        """
+        Run each of the specified tests that has not already been run in its own forked child
+        process, with at most ``max_workers`` processes running at once.
+
+        Each test sees a copy-on-write view of the global environment, so tests cannot affect each
+        other by mutating it. If processes cannot be forked on this platform, the tests are run one
+        after another in this process.
+
+        This method only works with test files.
+
+        Args:
+            test_paths (``list[str]``): paths to test files
+            max_workers (``int``): the maximum number of child processes to run at once
+            global_env (``dict``, optional): the global environment in which to run the tests; if
+                unspecified, the calling frame's global environment is used
+
+        Returns:
+            ``list[otter.test_files.abstract_test.TestFile]``: the results of running the tests
+            that had not already been run
+        """
+        if global_env is None:
+            global_env = inspect.currentframe().f_back.f_globals
+
+        test_paths = [tp for tp in test_paths if not cls._already_checked(tp)]
+
+        if not can_fork():
+            LOGGER.warning("Forking is not supported on this platform; running tests in sequence")
+            return [
+                cls.check(tp, NBMetadataConfig(), global_env=global_env) for tp in test_paths]
+
+        test_files = [create_test_file(tp, NBMetadataConfig()) for tp in test_paths]
+        test_files = run_test_files_in_forks(test_files, global_env, max_workers)
+
+        cls._track(test_files)
+
+        return test_files
@@ -0,0 +1,98 @@
+"""Aborting the execution of submissions that fail catastrophically"""
+
+from typing import Any, Dict, Optional
+
+from ..utils import loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+CRITICAL_CELL_TAG = "otter_critical"
+"""the tag of cells whose errors abort grading if ``abort_on_critical_error`` is true"""
+
+ABORTED_MESSAGE = "❌ Test was not run because grading was aborted after the submission failed " \
+    "catastrophically"
+"""the failure message of test cases in test files that were not run before grading was aborted"""
+
+
+class GradingAbortedError(Exception):
+    """
+    An error raised to stop executing a submission when one of its fail-fast rules is triggered.
+    """
+
+
+class FailFastRules:
+    """
+    Rules for aborting the execution of a submission whose cells fail in a way that makes grading
+    the rest of it pointless (e.g. a setup cell that raises a ``ModuleNotFoundError``, after which
+    every other cell also errors).
+
+    ``check_cell`` is an ``on_cell_executed`` hook for an ``ExecutePreprocessor``; it raises a
+    ``GradingAbortedError`` when a rule is triggered, which stops execution and shuts down the
+    kernel.
+
+    Args:
+        abort_on_critical_error (``bool``): whether to abort if a cell tagged ``otter_critical``
+            raises an error
+        max_consecutive_errors (``int | None``): the number of consecutive cells that must raise
+            errors to abort
+    """
+
+    abort_on_critical_error: bool
+    """whether to abort if a cell tagged ``otter_critical`` raises an error"""
+
+    max_consecutive_errors: Optional[int]
+    """the number of consecutive cells that must raise errors to abort"""
+
+    _consecutive_errors: int
+    """the number of consecutive cells that have raised errors"""
+
+    def __init__(self, abort_on_critical_error: bool, max_consecutive_errors: Optional[int]):
+        if max_consecutive_errors is not None and max_consecutive_errors < 1:
+            raise ValueError("max_consecutive_errors must be at least 1")
+
+        self.abort_on_critical_error = abort_on_critical_error
+        self.max_consecutive_errors = max_consecutive_errors
+        self._consecutive_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        """
+        ``bool``: whether any rules are enabled
+        """
+        return self.abort_on_critical_error or self.max_consecutive_errors is not None
+
+    def check_cell(self, cell: Dict[str, Any], execute_reply: Optional[Dict[str, Any]], **kwargs):
+        """
+        Check whether the execution of a cell triggers any rules.
+
+        Args:
+            cell (``nbformat.NotebookNode``): the executed cell
+            execute_reply (``dict[str, object] | None``): the kernel's reply to the execution
+                request, or ``None`` if the cell was not executed
+
+        Raises:
+            ``GradingAbortedError``: if a rule is triggered
+        """
+        if execute_reply is None:
+            return
+
+        content = execute_reply["content"]
+        if content["status"] != "error":
+            self._consecutive_errors = 0
+            return
+
+        self._consecutive_errors += 1
+        error = f"{content.get('ename')}: {content.get('evalue')}"
+
+        if self.abort_on_critical_error and \
+                CRITICAL_CELL_TAG in cell.get("metadata", {}).get("tags", []):
+            LOGGER.debug(f"Aborting grading after a cell tagged {CRITICAL_CELL_TAG} raised {error}")
+            raise GradingAbortedError(f"A cell tagged {CRITICAL_CELL_TAG} raised {error}")
+
+        if self.max_consecutive_errors is not None and \
+                self._consecutive_errors >= self.max_consecutive_errors:
+            LOGGER.debug(f"Aborting grading after {self._consecutive_errors} consecutive errors")
+            raise GradingAbortedError(
+                f"{self._consecutive_errors} consecutive cells raised errors; the last raised "
+                f"{error}")
@@ -0,0 +1,153 @@
+"""Grading submissions from the environments serialized in their logs without executing them"""
+
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from .checker import Checker
+from ..check.logs import Log
+from ..nbmeta_config import NBMetadataConfig
+from ..test_files import GradingResults, TestFile
+from ..utils import get_variable_type, loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+
+def filter_variables(
+    shelf: Dict[str, Any],
+    variables: Optional[Dict[str, str]],
+) -> Dict[str, Any]:
+    """
+    Remove the variables in an environment deserialized from a log whose names are not in
+    ``variables`` or whose types do not match the type strings in ``variables``, in place.
+
+    Args:
+        shelf (``dict[str, object]``): the deserialized environment
+        variables (``dict[str, str] | None``): map of variable names to type strings; if ``None``,
+            no variables are removed
+
+    Returns:
+        ``dict[str, object]``: the same environment
+    """
+    if variables is None:
+        return shelf
+
+    for k in list(shelf):
+        if k not in variables:
+            del shelf[k]
+            LOGGER.debug(f"Removed variable not listed in variables: {k}")
+
+        elif variables[k] != get_variable_type(shelf[k]):
+            del shelf[k]
+            LOGGER.debug(f"Removed variable of different type than expected: {k}")
+
+    return shelf
+
+
+def _new_namespace(setup_source: Optional[str]) -> Dict[str, Any]:
+    """
+    Create an empty global environment, executing ``setup_source`` in it if specified.
+    """
+    env = {"__name__": "__main__"}
+    if setup_source:
+        exec(compile(setup_source, "<setup>", "exec"), env)
+    return env
+
+
+def grade_log(
+    log: Log,
+    *,
+    tests_glob: List[str],
+    variables: Optional[Dict[str, str]] = None,
+    setup_source: Optional[str] = None,
+    test_case_timeout: Optional[Union[int, float]] = None,
+) -> GradingResults:
+    """
+    Grade a submission by running the tests of each question in the log against the environment
+    serialized when that question was last checked, without executing the submission.
+
+    Each question's environment is deserialized into a fresh namespace in which ``setup_source``
+    has been executed, so no state is shared between questions. Tests in ``tests_glob`` whose
+    questions are not in the log are run against a namespace with only ``setup_source``.
+
+    Args:
+        log (``otter.check.logs.Log``): the log of the submission
+        tests_glob (``list[str]``): paths to the test files to run; the name of each file (without
+            its extension) is the name of its question
+        variables (``dict[str, str] | None``): map of variable names to type strings used to filter
+            the deserialized environments; see ``filter_variables``
+        setup_source (``str | None``): code to execute in each namespace before the environment is
+            deserialized into it (e.g. the import statements of the assignment), since modules are
+            not serialized in logs
+        test_case_timeout (``int | float | None``): the default number of seconds after which a
+            test case is interrupted and failed
+
+    Returns:
+        ``otter.test_files.GradingResults``: the results of grading
+    """
+    test_paths = {os.path.splitext(os.path.basename(tp))[0]: tp for tp in tests_glob}
+    nbmeta_config = NBMetadataConfig()
+
+    with Checker.session(), TestFile.default_timeout_context(test_case_timeout):
+        Checker.enable_tracking()
+
+        logged_questions = []
+        for entry in log.question_iterator():
+            if entry.question not in test_paths:
+                LOGGER.warning(f"No test file found for question in log: {entry.question}")
+                continue
+
+            env = _new_namespace(setup_source)
+            env.update(filter_variables(entry.unshelve(env), variables))
+            Checker.check(test_paths[entry.question], nbmeta_config, global_env=env)
+            logged_questions.append(entry.question)
+
+        LOGGER.debug(f"Questions executed from log: {', '.join(logged_questions)}")
+
+        env = _new_namespace(setup_source)
+        for test_path in tests_glob:
+            Checker.check_if_not_already_checked(test_path, global_env=env)
+
+        return GradingResults(Checker.get_results())
+
+
+def _grade_log_file(log_path: str, kwargs: Dict[str, Any]) -> GradingResults:
+    """
+    Load and grade a single log in a worker process, converting errors into results.
+    """
+    try:
+        return grade_log(Log.from_file(log_path, ascending=False), **kwargs)
+    except Exception as e:
+        LOGGER.error(f"Error encountered while grading {log_path}: {e}")
+        return GradingResults.without_results(e)
+
+
+def grade_logs(
+    log_paths: List[str],
+    *,
+    max_workers: int = 1,
+    chunksize: int = 16,
+    **kwargs,
+) -> Dict[str, GradingResults]:
+    """
+    Grade many submissions from their logs with ``grade_log``, loading and grading batches of logs
+    in a small number of worker processes instead of starting a kernel for each submission.
+
+    Running the tests in workers keeps the code deserialized from the logs out of the calling
+    process; each worker parses each test file only once and reuses it for every log it grades.
+
+    Args:
+        log_paths (``list[str]``): paths to the logs
+        max_workers (``int``): the number of worker processes
+        chunksize (``int``): the number of logs sent to a worker at a time
+        **kwargs: the keyword arguments accepted by ``grade_log``, used for every log
+
+    Returns:
+        ``dict[str, otter.test_files.GradingResults]``: the results of each log, keyed by its path
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            _grade_log_file, log_paths, [kwargs] * len(log_paths), chunksize=chunksize)
+        return dict(zip(log_paths, results))
@@ -0,0 +1,116 @@
+"""Running test files in isolated, forked child processes"""
+
+import multiprocessing as mp
+
+from multiprocessing.connection import wait
+from typing import Any, Dict, List
+
+from ..test_files import TestCaseResult, TestFile
+from ..utils import loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+
+def can_fork() -> bool:
+    """
+    Determine whether test files can be run in forked child processes on this platform.
+
+    Returns:
+        ``bool``: whether the ``fork`` start method is available
+    """
+    return "fork" in mp.get_all_start_methods()
+
+
+def _run_test_file(test_file: TestFile, global_env: Dict[str, Any], conn):
+    """
+    Run a test file in a forked child process and send it back to the parent.
+
+    Args:
+        test_file (``TestFile``): the test file to run
+        global_env (``dict[str, object]``): the (copy-on-write) global environment to run it in
+        conn (``multiprocessing.connection.Connection``): the connection to send the test file over
+    """
+    try:
+        test_file.run(global_env)
+        conn.send(test_file)
+    finally:
+        conn.close()
+        loggers.flush_logs()
+
+
+def _fail_test_file(test_file: TestFile, message: str) -> TestFile:
+    """
+    Mark every test case in a test file as failed with the provided message.
+
+    Args:
+        test_file (``TestFile``): the test file
+        message (``str``): the failure message
+
+    Returns:
+        ``TestFile``: the test file
+    """
+    test_file.test_case_results = [
+        TestCaseResult(test_case=tc, message=message, passed=False) for tc in test_file.test_cases]
+    return test_file
+
+
+def run_test_files_in_forks(
+    test_files: List[TestFile],
+    global_env: Dict[str, Any],
+    max_workers: int,
+) -> List[TestFile]:
+    """
+    Run each test file in its own forked child process, with at most ``max_workers`` children
+    running at a time.
+
+    Each child gets a copy-on-write view of ``global_env``, so changes that a test makes to the
+    environment are not seen by any other test. A test file whose child process exits without
+    sending back its results (e.g. because the process crashed) has all of its test cases failed.
+
+    Args:
+        test_files (``list[TestFile]``): the test files to run
+        global_env (``dict[str, object]``): the global environment to run the tests in
+        max_workers (``int``): the maximum number of child processes to run at once
+
+    Returns:
+        ``list[TestFile]``: the test files with results, in the same order as ``test_files``
+    """
+    ctx = mp.get_context("fork")
+
+    # send any buffered logs before forking so that they are not sent by each child
+    loggers.flush_logs()
+
+    results: List[TestFile] = [None] * len(test_files)
+    pending = list(enumerate(test_files))
+    running = {}
+    while pending or running:
+        while pending and len(running) < max(max_workers, 1):
+            i, test_file = pending.pop(0)
+            recv_conn, send_conn = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_run_test_file, args=(test_file, global_env, send_conn))
+            proc.start()
+            send_conn.close()
+            running[recv_conn] = (i, proc)
+            LOGGER.debug(f"Running test file {test_file.path} in child process {proc.pid}")
+
+        for conn in wait(list(running)):
+            i, proc = running.pop(conn)
+            try:
+                results[i] = conn.recv()
+
+            except EOFError:
+                proc.join()
+                LOGGER.debug(
+                    f"Child process for test file {test_files[i].path} exited with code "
+                    f"{proc.exitcode} without sending results")
+                results[i] = _fail_test_file(
+                    test_files[i],
+                    f"❌ Test process exited unexpectedly with code {proc.exitcode}",
+                )
+
+            finally:
+                conn.close()
+                proc.join()
+
+    return results
@@ -0,0 +1,97 @@
+"""Resolving the kernelspecs of grading kernels once per process"""
+
+import copy
+import threading
+import time
+
+from jupyter_client.kernelspec import KernelSpec, KernelSpecManager, NoSuchKernel
+from jupyter_client.manager import AsyncKernelManager
+from traitlets import default
+from typing import Dict
+
+from ..utils import loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+_KERNEL_SPECS: Dict[str, KernelSpec] = {}
+"""the kernelspecs resolved in this process, keyed by kernel name"""
+
+_KERNEL_SPECS_LOCK = threading.Lock()
+"""a lock that prevents the same kernelspec from being resolved by more than one thread"""
+
+
+def _find_kernel_spec(kernel_name: str) -> KernelSpec:
+    """
+    Find a kernelspec in the Jupyter data directories, falling back to ``nb_conda_kernels`` (if
+    it is installed) for the kernels of conda environments.
+    """
+    try:
+        return KernelSpecManager().get_kernel_spec(kernel_name)
+
+    except NoSuchKernel:
+        try:
+            from nb_conda_kernels import CondaKernelSpecManager
+        except ImportError:
+            CondaKernelSpecManager = None
+
+        if CondaKernelSpecManager is None:
+            raise
+
+        # listing the kernels of conda environments runs conda, so it is only done if the kernel
+        # is not in the data directories
+        return CondaKernelSpecManager().get_kernel_spec(kernel_name)
+
+
+def resolve_kernel_spec(kernel_name: str) -> KernelSpec:
+    """
+    Get the kernelspec of a kernel, resolving it the first time it is requested in this process
+    and returning a copy of the cached kernelspec afterwards. The time taken to resolve the
+    kernelspec is logged.
+
+    Args:
+        kernel_name (``str``): the name of the kernel
+
+    Returns:
+        ``jupyter_client.kernelspec.KernelSpec``: the kernelspec
+
+    Raises:
+        ``jupyter_client.kernelspec.NoSuchKernel``: if there is no kernel with that name
+    """
+    with _KERNEL_SPECS_LOCK:
+        if kernel_name not in _KERNEL_SPECS:
+            start = time.perf_counter()
+            _KERNEL_SPECS[kernel_name] = _find_kernel_spec(kernel_name)
+            LOGGER.info(
+                f"Resolved kernelspec {kernel_name} in {time.perf_counter() - start:.3f}s: "
+                f"{_KERNEL_SPECS[kernel_name].resource_dir}")
+
+        return copy.deepcopy(_KERNEL_SPECS[kernel_name])
+
+
+def clear_kernel_spec_cache():
+    """
+    Remove all kernelspecs resolved in this process from the cache.
+    """
+    with _KERNEL_SPECS_LOCK:
+        _KERNEL_SPECS.clear()
+
+
+class CachedKernelSpecManager(KernelSpecManager):
+    """
+    A ``KernelSpecManager`` that gets kernelspecs with ``resolve_kernel_spec``.
+    """
+
+    def get_kernel_spec(self, kernel_name: str) -> KernelSpec:
+        return resolve_kernel_spec(kernel_name)
+
+
+class CachedKernelSpecKernelManager(AsyncKernelManager):
+    """
+    An ``AsyncKernelManager`` that launches kernels from kernelspecs resolved with
+    ``resolve_kernel_spec`` instead of searching for the kernelspec each time a kernel is started.
+    """
+
+    @default("kernel_spec_manager")
+    def _kernel_spec_manager_default(self) -> KernelSpecManager:
+        return CachedKernelSpecManager(data_dir=self.data_dir)
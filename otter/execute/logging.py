@@ -1,18 +1,26 @@
 """A logging server for receiving logs from the grading process"""
 
+import atexit
+import os
 import pickle
 import logging
 import logging.handlers
+import selectors
 import socket
 import socketserver
 import struct
+import tempfile
 import threading
 
+from typing import Optional, Tuple, Union
+
 from ..utils import loggers
 
 
 LOGGER = loggers.get_logger(__name__)
 
+_UNIX_SOCKETS_SUPPORTED = hasattr(socket, "AF_UNIX") and hasattr(socketserver, "UnixStreamServer")
+
 
 class LogLevelFilter(logging.Filter):
     """
@@ -28,28 +36,28 @@ class LogRecordStreamHandler(socketserver.StreamRequestHandler):
     """
     A handler for a streaming logging request.
 
-    Copied from https://docs.python.org/3/howto/logging-cookbook.html#sending-and-receiving-logging-events-across-a-network.
+    Adapted from https://docs.python.org/3/howto/logging-cookbook.html#sending-and-receiving-logging-events-across-a-network.
     """
 
     filter = LogLevelFilter()
 
     def handle(self):
         """
-        Handle multiple requests - each expected to be a 4-byte length,
-        followed by the LogRecord in pickle format. Logs the record
-        according to whatever policy is configured locally.
+        Handle multiple requests - each expected to be a 4-byte length, followed by either a single
+        ``LogRecord`` or a batch of ``LogRecord``s in pickle format. Logs the records according to
+        whatever policy is configured locally.
         """
         while True:
-            chunk = self.connection.recv(4)
+            chunk = self.rfile.read(4)
             if len(chunk) < 4:
                 break
-            slen = struct.unpack('>L', chunk)[0]
-            chunk = self.connection.recv(slen)
-            while len(chunk) < slen:
-                chunk = chunk + self.connection.recv(slen - len(chunk))
+            slen = struct.unpack(">L", chunk)[0]
+            chunk = self.rfile.read(slen)
+            if len(chunk) < slen:
+                break
             obj = self.unpickle(chunk)
-            record = logging.makeLogRecord(obj)
-            self.handle_log_record(record)
+            for record_dict in (obj if isinstance(obj, list) else [obj]):
+                self.handle_log_record(logging.makeLogRecord(record_dict))
 
     def unpickle(self, data):
         return pickle.loads(data)
@@ -60,55 +68,154 @@ class LogRecordStreamHandler(socketserver.StreamRequestHandler):
             logger.handle(record)
 
 
-class LogRecordSocketReceiver(socketserver.ThreadingTCPServer):
+class _LogRecordReceiverMixin:
     """
-    Simple TCP socket-based logging receiver.
+    A mixin for socket servers that receive logs in a background thread until stopped.
 
-    Copied from https://docs.python.org/3/howto/logging-cookbook.html#sending-and-receiving-logging-events-across-a-network.
+    Instead of polling with a timeout, the serving thread waits on both the server socket and a
+    wake-up socket, so stopping the server takes effect immediately.
     """
 
-    allow_reuse_address = True
-    abort = False
+    daemon_threads = True
+    block_on_close = False
 
-    def __init__(
-            self,
-            host="localhost",
-            port=0,
-            handler=LogRecordStreamHandler,
-        ):
-        super().__init__((host, port), handler)
+    _thread: Optional[threading.Thread] = None
+    """the thread serving requests"""
+
+    _wakeup: Optional[Tuple[socket.socket, socket.socket]] = None
+    """the read and write ends of the wake-up socket pair"""
 
     def serve_until_stopped(self):
-        import select
-        abort = False
-        while not abort:
-            rd = None
-            try:
-                rd, _, _ = select.select([self.socket.fileno()], [], [], 1)
-            except socket.error:
-                pass
-            if rd:
-                self.handle_request()
-            abort = self.abort
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.socket, selectors.EVENT_READ)
+            selector.register(self._wakeup[0], selectors.EVENT_READ)
+            while True:
+                ready = [key.fileobj for key, _ in selector.select()]
+                if self._wakeup[0] in ready:
+                    break
+                if self.socket in ready:
+                    self._handle_request_noblock()
+
+    def start(self):
+        """
+        Start serving requests in a background thread.
+        """
+        self._wakeup = socket.socketpair()
+        self._thread = threading.Thread(target=self.serve_until_stopped, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop serving requests, join the background thread, and close the server.
+        """
+        if self._thread is None:
+            return
+        self._wakeup[1].send(b"\0")
+        self._thread.join()
+        self._thread = None
+        for sock in self._wakeup:
+            sock.close()
+        self.server_close()
+
+    @property
+    def running(self):
+        """
+        ``bool``: whether the server is currently serving requests
+        """
+        return self._thread is not None
+
+
+if _UNIX_SOCKETS_SUPPORTED:
+
+    class LogRecordSocketReceiver(_LogRecordReceiverMixin, socketserver.ThreadingUnixStreamServer):
+        """
+        A Unix socket-based logging receiver.
+
+        The socket is created in a new temporary directory which is removed when the server is
+        closed.
+        """
+
+        def __init__(self, handler=LogRecordStreamHandler):
+            self._socket_dir = tempfile.mkdtemp()
+            super().__init__(os.path.join(self._socket_dir, "logs.sock"), handler)
+
+        def server_close(self):
+            super().server_close()
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)
+            os.rmdir(self._socket_dir)
+
+        @property
+        def sender_address(self):
+            """
+            ``tuple[str, None]``: the arguments to pass to ``loggers.send_logs`` to connect to
+            this server
+            """
+            return self.server_address, None
+
+else:
+
+    class LogRecordSocketReceiver(_LogRecordReceiverMixin, socketserver.ThreadingTCPServer):
+        """
+        A TCP socket-based logging receiver for platforms without Unix sockets.
+        """
+
+        allow_reuse_address = True
+
+        def __init__(self, host="localhost", port=0, handler=LogRecordStreamHandler):
+            super().__init__((host, port), handler)
+
+        @property
+        def sender_address(self):
+            """
+            ``tuple[str, int]``: the arguments to pass to ``loggers.send_logs`` to connect to this
+            server
+            """
+            return self.server_address
+
+
+_shared_server: Optional[LogRecordSocketReceiver] = None
+"""the server shared by all grading processes in this process"""
+
+_shared_server_lock = threading.Lock()
 
 
 def start_server():
     """
-    Start a TCP socket for receiving logs from the notebook being executed. Returns a tuple of
-    ``((server host, server port), stop server callback)``.
+    Start a socket for receiving logs from the notebook being executed. Returns a tuple of
+    ``((server host or socket path, server port or None), stop server callback)``.
 
     Returns:
-        ``tuple[tuple[str, int], callable]``: a tuple containing a tuple with the server host and
-            port as its first element and a callback to stop the server as its second
+        ``tuple[tuple[str, int | None], callable]``: a tuple containing a tuple with the server
+            address as its first element and a callback to stop the server as its second
     """
-    tcpserver = LogRecordSocketReceiver()
-    host, port = tcpserver.server_address
-    LOGGER.debug(f"Starting execution logging TCP server in background at {host}:{port}")
-    t = threading.Thread(target=tcpserver.serve_until_stopped)
-    t.start()
+    server = LogRecordSocketReceiver()
+    LOGGER.debug(f"Starting execution logging server in background at {server.server_address}")
+    server.start()
 
     def stop_server():
-        LOGGER.debug("Stopping execution logging TCP server")
-        tcpserver.abort = True
+        LOGGER.debug("Stopping execution logging server")
+        server.stop()
+
+    return server.sender_address, stop_server
+
+
+def get_shared_server_address() -> Tuple[str, Union[int, None]]:
+    """
+    Return the address of a logging server that is shared by all notebooks executed in this
+    process, starting it if it is not already running. The server is stopped when the process exits.
+
+    Returns:
+        ``tuple[str, int | None]``: the server host or socket path and the server port or ``None``
+    """
+    global _shared_server
+
+    with _shared_server_lock:
+        if _shared_server is None or not _shared_server.running:
+            _shared_server = LogRecordSocketReceiver()
+            LOGGER.debug(
+                f"Starting shared execution logging server at {_shared_server.server_address}")
+            _shared_server.start()
+            atexit.register(_shared_server.stop)
 
-    return tcpserver.server_address, stop_server
+        return _shared_server.sender_address
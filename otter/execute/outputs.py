@@ -0,0 +1,128 @@
+"""Limiting the outputs captured while executing a submission"""
+
+import json
+import nbformat as nbf
+
+from nbconvert.preprocessors import ExecutePreprocessor
+from traitlets import Bool, Integer
+from typing import Any, Dict, Set
+
+
+TRUNCATION_MESSAGE = "\n[Output truncated: exceeded the limit of {limit} characters {scope}]\n"
+"""the text of the stream output added to a cell when its output is truncated"""
+
+
+def get_output_size(msg: Dict[str, Any]) -> int:
+    """
+    Estimate the size of the output created by a kernel message as the number of characters in its
+    text, display data, or traceback.
+
+    Args:
+        msg (``dict[str, object]``): the kernel message
+
+    Returns:
+        ``int``: the size of the output
+    """
+    content = msg["content"]
+    if msg["msg_type"] == "stream":
+        return len(content.get("text", ""))
+    if msg["msg_type"] == "error":
+        return sum(len(line) for line in content.get("traceback", []))
+    return sum(
+        len(v) if isinstance(v, str) else len(json.dumps(v))
+        for v in content.get("data", {}).values())
+
+
+class BoundedExecutePreprocessor(ExecutePreprocessor):
+    """
+    An ``ExecutePreprocessor`` that limits the size of the outputs captured from the kernel.
+
+    Once the outputs captured for a cell (or for the whole notebook) reach their limit, the part of
+    a stream output that fits is kept, a stream output indicating that the output was truncated is
+    added to the cell, and all further outputs of the cell (or notebook) are discarded. If
+    ``discard_outputs`` is true, no outputs are captured at all.
+    """
+
+    max_cell_output_size = Integer(
+        None,
+        allow_none=True,
+        help="the maximum number of characters of output to capture from each cell",
+    ).tag(config=True)
+
+    max_output_size = Integer(
+        None,
+        allow_none=True,
+        help="the maximum number of characters of output to capture from the whole notebook",
+    ).tag(config=True)
+
+    discard_outputs = Bool(
+        False,
+        help="whether to discard all outputs",
+    ).tag(config=True)
+
+    _cell_output_sizes: Dict[int, int]
+    """the size of the outputs captured from each cell"""
+
+    _total_output_size: int
+    """the size of the outputs captured from the notebook"""
+
+    _truncated_cells: Set[int]
+    """the indices of the cells whose outputs have been truncated"""
+
+    _notebook_truncated: bool
+    """whether the outputs of the notebook have been truncated"""
+
+    def reset_execution_trackers(self):
+        super().reset_execution_trackers()
+        self._cell_output_sizes = {}
+        self._total_output_size = 0
+        self._truncated_cells = set()
+        self._notebook_truncated = False
+
+    def _truncate(self, outs, msg, display_id, cell_index, remaining, message):
+        """
+        Keep the part of a stream output that fits in the remaining space and add a truncation
+        message to a cell's outputs.
+        """
+        if msg["msg_type"] == "stream" and remaining > 0:
+            msg = {**msg, "content": {**msg["content"], "text": msg["content"]["text"][:remaining]}}
+            super().output(outs, msg, display_id, cell_index)
+
+        outs.append(nbf.v4.new_output("stream", name="stderr", text=message))
+        self._truncated_cells.add(cell_index)
+
+    def output(self, outs, msg, display_id, cell_index):
+        if self.discard_outputs:
+            return None
+
+        # outputs captured by widgets are not added to the cell
+        parent_msg_id = msg["parent_header"].get("msg_id")
+        if self.output_hook_stack[parent_msg_id]:
+            return super().output(outs, msg, display_id, cell_index)
+
+        if self._notebook_truncated or cell_index in self._truncated_cells:
+            return None
+
+        size, cell_size = get_output_size(msg), self._cell_output_sizes.get(cell_index, 0)
+        cell_remaining = notebook_remaining = None
+        if self.max_cell_output_size is not None:
+            cell_remaining = self.max_cell_output_size - cell_size
+        if self.max_output_size is not None:
+            notebook_remaining = self.max_output_size - self._total_output_size
+
+        if notebook_remaining is not None and size > notebook_remaining and \
+                (cell_remaining is None or notebook_remaining < cell_remaining):
+            message = TRUNCATION_MESSAGE.format(limit=self.max_output_size, scope="per notebook")
+            self._truncate(outs, msg, display_id, cell_index, notebook_remaining, message)
+            self._notebook_truncated = True
+            return None
+
+        if cell_remaining is not None and size > cell_remaining:
+            message = TRUNCATION_MESSAGE.format(limit=self.max_cell_output_size, scope="per cell")
+            self._truncate(outs, msg, display_id, cell_index, cell_remaining, message)
+            self._total_output_size += cell_remaining
+            return None
+
+        self._cell_output_sizes[cell_index] = cell_size + size
+        self._total_output_size += size
+        return super().output(outs, msg, display_id, cell_index)
@@ -8,15 +8,18 @@ import tempfile
 from nbconvert.exporters import PythonExporter
 from nbconvert.preprocessors import Preprocessor
 from textwrap import dedent
-from traitlets import Bool, Dict, Instance, Integer, List, Unicode
+from traitlets import Bool, Dict, Float, Instance, Integer, List, Unicode
 from typing import Optional, Tuple
 
+from .timing import stamp_cell_indices
 from ..check.logs import Log
 from ..utils import id_generator
 
 
 CELL_METADATA_KEY = "otter"
 IGNORE_CELL_TAG = "otter_ignore"
+STABLE_NAME_SUFFIX = "OTTER"
+REPLAY_METADATA_KEY = "replay_on_restart"
 
 
 INIT_CELL_SOURCE = """\
@@ -27,23 +30,65 @@ from otter import Notebook as {notebook_name}
 import logging
 from otter.utils import loggers
 loggers.set_level(logging.DEBUG)
-loggers.send_logs("{logging_server_host}", {logging_server_port})
+loggers.send_logs(r"{logging_server_host}", {logging_server_port})
+
+# set the default timeout for test cases
+from otter.test_files import TestFile
+TestFile.default_timeout = {test_case_timeout}
+
+# load the values of persisted fixtures, which were computed outside of the kernel
+from otter.test_files.exception_test import load_fixture_values
+load_fixture_values({fixture_values_path}, {fixture_values_digest})
+
+# record the time taken to execute each cell
+from otter.execute.timing import record_cell_timings
+record_cell_timings()
+"""
+
+STREAM_RESULTS_SOURCE = """
+# stream the result of each check so that it can be recovered if grading ends early
+from otter.execute import Checker
+Checker.stream_results("{results_stream_path}")
+
+# restore the results streamed before the kernel was restarted, if it was
+Checker.load_streamed_results()
 """
 
 EXPORT_CELL_SOURCE = """\
+from otter.utils import loggers
+loggers.flush_logs()
+
 from otter.execute import Checker
-for t in {tests_glob_json}:
-    Checker.check_if_not_already_checked(t)
+{check_tests_source}
 
 from otter.test_files import GradingResults
 results = GradingResults(Checker.get_results())
 
+from otter.execute.timing import get_cell_timings
+results.cell_timings = get_cell_timings()
+
 import pickle
 with open("{results_path}", "wb") as f:
     pickle.dump(results, f)
 """
 
 
+CHECK_TESTS_SOURCE = """\
+for t in {tests_glob_json}:
+    Checker.check_if_not_already_checked(t)
+"""
+
+CHECK_TESTS_ISOLATED_SOURCE = """\
+Checker.check_isolated_if_not_already_checked({tests_glob_json}, {test_workers})
+"""
+
+
+SNAPSHOT_CELL_SOURCE = """\
+from otter.execute.snapshot import write_snapshot
+write_snapshot("{snapshot_path}", globals())
+"""
+
+
 class GradingPreprocessor(Preprocessor):
 
     cwd = Unicode(allow_none=True).tag(config=True)
@@ -54,6 +99,8 @@ class GradingPreprocessor(Preprocessor):
 
     results_path = Unicode().tag(config=True)
 
+    results_stream_path = Unicode(allow_none=True).tag(config=True)
+
     seed = Integer(allow_none=True).tag(config=True)
 
     seed_variable = Unicode(allow_none=True).tag(config=True)
@@ -68,16 +115,46 @@ class GradingPreprocessor(Preprocessor):
 
     logging_server_host = Unicode().tag(config=True)
 
-    logging_server_port = Integer().tag(config=True)
+    logging_server_port = Integer(allow_none=True).tag(config=True)
 
     force_python3_kernel = Bool().tag(config=True)
 
+    snapshot_path = Unicode(allow_none=True).tag(config=True)
+
+    test_workers = Integer(allow_none=True).tag(config=True)
+
+    test_case_timeout = Float(allow_none=True).tag(config=True)
+
+    fixture_values_path = Unicode(allow_none=True).tag(config=True)
+
+    fixture_values_digest = Unicode(allow_none=True).tag(config=True)
+
+    stable_names = Bool(False).tag(config=True)
+    """whether to use the same names for the variables in the cells added to every notebook, so
+    that identical submissions produce identical cells"""
+
+    def _get_name(self, prefix):
+        """
+        Get the name of a variable used by the cells added to the notebook.
+        """
+        return f"{prefix}_{STABLE_NAME_SUFFIX if self.stable_names else id_generator()}"
+
+    @staticmethod
+    def _new_replayed_cell(source):
+        """
+        Create a code cell that is executed again if the kernel is restarted after crashing; see
+        ``otter.execute.recovery``.
+        """
+        return nbf.v4.new_code_cell(
+            source, metadata={CELL_METADATA_KEY: {REPLAY_METADATA_KEY: True}})
+
     @property
     def from_log(self):
         return self.otter_log is not None
 
     def preprocess(self, nb, resources = None):
-        self._notebook_name = f"notebook_{id_generator()}"
+        self._notebook_name = self._get_name("notebook")
+        stamp_cell_indices(nb, CELL_METADATA_KEY)
         self.filter_ignored_cells(nb)
         self.logging_transform(nb)
         self.add_checks(nb)
@@ -88,14 +165,33 @@ class GradingPreprocessor(Preprocessor):
         return nb, resources
 
     def add_init_and_export_cells(self, nb):
-        nb.cells.insert(0, nbf.v4.new_code_cell(INIT_CELL_SOURCE.format(
+        init_source = INIT_CELL_SOURCE.format(
             notebook_name = self._notebook_name,
             test_dir = self.test_dir,
             logging_server_host = self.logging_server_host,
             logging_server_port = self.logging_server_port,
-        )))
+            test_case_timeout = self.test_case_timeout,
+            fixture_values_path = repr(self.fixture_values_path or None),
+            fixture_values_digest = repr(self.fixture_values_digest or None),
+        )
+        if self.results_stream_path:
+            init_source += STREAM_RESULTS_SOURCE.format(
+                results_stream_path = self.results_stream_path.replace("\\", "\\\\"))
+        nb.cells.insert(0, self._new_replayed_cell(init_source))
+        if self.snapshot_path:
+            nb.cells.append(nbf.v4.new_code_cell(SNAPSHOT_CELL_SOURCE.format(
+                snapshot_path = self.snapshot_path.replace("\\", "\\\\"),
+            )))
+        if self.test_workers:
+            check_tests_source = CHECK_TESTS_ISOLATED_SOURCE.format(
+                tests_glob_json = json.dumps(self.tests_glob),
+                test_workers = self.test_workers,
+            )
+        else:
+            check_tests_source = CHECK_TESTS_SOURCE.format(
+                tests_glob_json = json.dumps(self.tests_glob))
         nb.cells.append(nbf.v4.new_code_cell(EXPORT_CELL_SOURCE.format(
-            tests_glob_json = json.dumps(self.tests_glob),
+            check_tests_source = check_tests_source,
             # ensure that "\" is properly-escaped for Windows paths since this is going to be
             # rendered into a string literal
             results_path = self.results_path.replace("\\", "\\\\"),
@@ -104,7 +200,7 @@ class GradingPreprocessor(Preprocessor):
     def add_cwd_to_path(self, nb):
         if self.cwd:
             nb.cells.insert(
-                0, nbf.v4.new_code_cell(f"import sys\nsys.path.append(r\"{self.cwd}\")"))
+                0, self._new_replayed_cell(f"import sys\nsys.path.append(r\"{self.cwd}\")"))
 
     def add_seeds(self, nb):
         if self.seed is None or self.from_log: return
@@ -112,9 +208,9 @@ class GradingPreprocessor(Preprocessor):
         skip_first = False
         if self.seed_variable is None:
             skip_first = True
-            np_name, rand_name = f"np_{id_generator()}", f"random_{id_generator()}"
+            np_name, rand_name = self._get_name("np"), self._get_name("random")
             nb.cells.insert(
-                0, nbf.v4.new_code_cell(f"import numpy as {np_name}\nimport random as {rand_name}"))
+                0, self._new_replayed_cell(f"import numpy as {np_name}\nimport random as {rand_name}"))
             do_seed = f"{np_name}.random.seed({self.seed})\n{rand_name}.seed({self.seed})"
 
         else:
@@ -168,7 +264,7 @@ class GradingPreprocessor(Preprocessor):
             import json
             from otter import Notebook
             from otter.check.logs import Log
-            from otter.utils import get_variable_type
+            from otter.execute.from_log import filter_variables
 
             variables = json.loads(\"\"\"{json.dumps(self.variables)}\"\"\")
             log = Log.from_file("{log_fn}")
@@ -176,15 +272,8 @@ class GradingPreprocessor(Preprocessor):
             grader = Notebook()
 
             for entry in log.question_iterator():
-                shelf = entry.unshelve(globals())
-
-                if variables is not None:
-                    for k, v in shelf.items():
-                        full_type = get_variable_type(v)
-                        if not (k in variables and variables[k] == full_type):
-                            del shelf[k]
-                            print(f"Found variable of different type than expected: {{k}}")
-
+                # removed variables are logged through the logging server set up by the init cell
+                shelf = filter_variables(entry.unshelve(globals()), variables)
                 globals().update(shelf)
                 grader.check(entry.question)
                 logged_questions.append(entry.question)
@@ -211,7 +300,9 @@ class GradingPreprocessor(Preprocessor):
 
 
 class ImportCollector(ast.NodeVisitor):
-    imports = []
+
+    def __init__(self):
+        self.imports = []
 
     def visit_Import(self, node):
         self.imports.append(node)
@@ -0,0 +1,110 @@
+"""Restarting the kernel and continuing execution when it crashes while executing a submission"""
+
+import nbformat as nbf
+
+from dataclasses import dataclass
+from nbclient.exceptions import DeadKernelError
+from nbclient.util import ensure_async, run_sync
+from traitlets import Integer
+from typing import List, Optional
+
+from .outputs import BoundedExecutePreprocessor
+from .preprocessor import CELL_METADATA_KEY, REPLAY_METADATA_KEY
+from .timing import CELL_INDEX_METADATA_KEY
+from ..utils import loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+KERNEL_CRASH_MESSAGE = "\n[The kernel crashed while executing this cell and was restarted; the " \
+    "variables defined before this cell were lost]\n"
+"""the text of the stream output added to the cell that was executing when the kernel crashed"""
+
+
+@dataclass
+class KernelCrash:
+    """
+    A dataclass representing a crash of the kernel executing a submission.
+    """
+
+    cell_index: Optional[int]
+    """the index of the cell in the submission that was executing, if it was a submission cell"""
+
+    message: str
+    """the message of the error raised when the crash was detected"""
+
+
+class RecoveringExecutePreprocessor(BoundedExecutePreprocessor):
+    """
+    A ``BoundedExecutePreprocessor`` that restarts the kernel if it dies while executing a cell
+    (e.g. because of a segfault in a C extension or because it was killed for using too much
+    memory) and continues executing the notebook.
+
+    When the kernel is restarted, the cells that were marked by the ``GradingPreprocessor`` to be
+    replayed (i.e. the cells that set up grading) are executed again, the cell that crashed is
+    skipped, and execution resumes with the next cell. Each crash is recorded in
+    ``kernel_crashes``. The global environment of the submission is not restored, so later cells
+    that depend on it may raise errors. If the kernel dies more than ``max_kernel_restarts``
+    times, the ``DeadKernelError`` is raised.
+    """
+
+    max_kernel_restarts = Integer(
+        0,
+        help="the maximum number of times to restart the kernel if it dies",
+    ).tag(config=True)
+
+    kernel_crashes: List[KernelCrash]
+    """the crashes of the kernel that were recovered from"""
+
+    _replay_sources: List[str]
+    """the sources of the executed cells to replay when the kernel is restarted"""
+
+    def reset_execution_trackers(self):
+        super().reset_execution_trackers()
+        self.kernel_crashes = []
+        self._replay_sources = []
+
+    async def _restart_kernel(self):
+        """
+        Restart the dead kernel, wait for it to be ready, and replay the cells that set up grading.
+        """
+        await ensure_async(self.km.restart_kernel(now=True))
+        await ensure_async(self.kc.wait_for_ready(timeout=self.startup_timeout))
+
+        for source in self._replay_sources:
+            msg_id = await ensure_async(self.kc.execute(source, store_history=False))
+            reply = await self.async_wait_for_reply(msg_id)
+            if reply is not None and reply["content"]["status"] == "error":
+                LOGGER.warning(
+                    f"Replaying a setup cell after restarting the kernel raised "
+                    f"{reply['content'].get('ename')}: {reply['content'].get('evalue')}")
+
+    async def async_execute_cell(self, cell, cell_index, execution_count=None, store_history=True):
+        try:
+            cell = await super().async_execute_cell(
+                cell, cell_index, execution_count=execution_count, store_history=store_history)
+
+        except DeadKernelError as e:
+            if len(self.kernel_crashes) >= self.max_kernel_restarts:
+                raise
+
+            otter_metadata = cell.get("metadata", {}).get(CELL_METADATA_KEY, {})
+            self.kernel_crashes.append(KernelCrash(
+                cell_index = otter_metadata.get(CELL_INDEX_METADATA_KEY),
+                message = str(e),
+            ))
+            LOGGER.warning(
+                f"The kernel died while executing cell {cell_index}; restarting it "
+                f"({len(self.kernel_crashes)} of {self.max_kernel_restarts} restarts)")
+
+            await self._restart_kernel()
+            cell.outputs.append(nbf.v4.new_output("stream", name="stderr", text=KERNEL_CRASH_MESSAGE))
+            return cell
+
+        if cell.get("metadata", {}).get(CELL_METADATA_KEY, {}).get(REPLAY_METADATA_KEY):
+            self._replay_sources.append(cell.source)
+
+        return cell
+
+    # the synchronous wrapper in nbclient wraps its own async_execute_cell
+    execute_cell = run_sync(async_execute_cell)
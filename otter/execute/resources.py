@@ -0,0 +1,217 @@
+"""Sampling the resources used by the process tree of the kernel executing a submission"""
+
+import os
+import threading
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from ..utils import loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+SAMPLING_INTERVAL = 0.1
+"""the number of seconds between samples of the kernel's process tree"""
+
+_PROC_DIR = "/proc"
+
+
+@dataclass
+class ResourceUsage:
+    """
+    A dataclass representing the resources used by the kernel that executed a submission and all
+    of its child processes.
+    """
+
+    peak_rss: int
+    """the peak resident set size of the process tree, in bytes"""
+
+    cpu_time: float
+    """the user and system CPU time used by the process tree, in seconds"""
+
+    num_child_processes: int
+    """the number of child processes of the kernel that were observed"""
+
+
+def can_sample_resources() -> bool:
+    """
+    Determine whether process resources can be sampled on this platform (i.e. whether ``/proc`` is
+    available).
+
+    Returns:
+        ``bool``: whether resources can be sampled
+    """
+    return os.path.isfile(os.path.join(_PROC_DIR, "self", "stat"))
+
+
+def _read_stat(pid: int) -> Optional[List[str]]:
+    """
+    Read the fields of ``/proc/[pid]/stat`` that follow the command name, or ``None`` if the process
+    no longer exists.
+    """
+    try:
+        with open(os.path.join(_PROC_DIR, str(pid), "stat")) as f:
+            stat = f.read()
+    except OSError:
+        return None
+
+    # the command name is in parentheses and may itself contain spaces and parentheses
+    return stat[stat.rindex(")") + 2:].split()
+
+
+def _read_peak_rss(pid: int) -> int:
+    """
+    Read the peak resident set size of a single process in bytes from ``/proc/[pid]/status``.
+    """
+    try:
+        with open(os.path.join(_PROC_DIR, str(pid), "status")) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+class ResourceSampler:
+    """
+    Periodically samples the memory and CPU time used by a process and its descendants in a
+    background thread.
+
+    Memory is sampled, so the peak resident set size of short-lived child processes may be missed;
+    the CPU time of child processes that have exited is included via the cumulative times of their
+    parents.
+
+    Args:
+        pid (``int``): the PID of the root process
+        interval (``float``): the number of seconds between samples
+    """
+
+    pid: int
+    """the PID of the root process"""
+
+    interval: float
+    """the number of seconds between samples"""
+
+    _peak_rss: int
+    """the peak resident set size of the process tree observed so far, in bytes"""
+
+    _cpu_time: float
+    """the CPU time used by the process tree at the last sample, in seconds"""
+
+    _child_pids: Set[int]
+    """the PIDs of all descendants of the root process observed so far"""
+
+    def __init__(self, pid: int, interval: float = SAMPLING_INTERVAL):
+        self.pid = pid
+        self.interval = interval
+        self._peak_rss = 0
+        self._cpu_time = 0.0
+        self._child_pids = set()
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _get_process_tree(self) -> Dict[int, List[str]]:
+        """
+        Read the stat fields of the root process and all of its living descendants.
+        """
+        stats: Dict[int, List[str]] = {}
+        children: Dict[int, List[int]] = {}
+        for entry in os.listdir(_PROC_DIR):
+            if not entry.isdigit():
+                continue
+            fields = _read_stat(int(entry))
+            if fields is not None:
+                stats[int(entry)] = fields
+                children.setdefault(int(fields[1]), []).append(int(entry))
+
+        tree, to_visit = {}, [self.pid]
+        while to_visit:
+            pid = to_visit.pop()
+            if pid in stats:
+                tree[pid] = stats[pid]
+                to_visit.extend(children.get(pid, []))
+
+        return tree
+
+    def sample(self):
+        """
+        Take a single sample of the process tree.
+        """
+        tree = self._get_process_tree()
+        if not tree:
+            return
+
+        rss, ticks = 0, 0
+        for fields in tree.values():
+            # utime, stime, cutime, and cstime are fields 14-17 and rss is field 24 of the stat
+            # file; the fields here start at field 3
+            ticks += sum(int(f) for f in fields[11:15])
+            rss += int(fields[21]) * self._page_size
+
+        with self._lock:
+            self._peak_rss = max(self._peak_rss, rss, _read_peak_rss(self.pid))
+            self._cpu_time = max(self._cpu_time, ticks / self._clock_ticks)
+            self._child_pids.update(pid for pid in tree if pid != self.pid)
+
+    def _sample_until_stopped(self):
+        while not self._stopped.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                LOGGER.debug(f"Could not sample resources of process {self.pid}: {e}")
+            self._stopped.wait(self.interval)
+
+    def start(self):
+        """
+        Start sampling in a background thread.
+        """
+        self._thread = threading.Thread(target=self._sample_until_stopped, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop sampling and join the background thread.
+        """
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def get_usage(self) -> ResourceUsage:
+        """
+        Return the resources used by the process tree as of the last sample.
+
+        Returns:
+            ``ResourceUsage``: the resource usage
+        """
+        with self._lock:
+            return ResourceUsage(
+                peak_rss = self._peak_rss,
+                cpu_time = self._cpu_time,
+                num_child_processes = len(self._child_pids),
+            )
+
+
+def get_kernel_pid(kernel_manager) -> Optional[int]:
+    """
+    Get the PID of the kernel process started by a ``jupyter_client`` kernel manager, if it is a
+    local process.
+
+    Args:
+        kernel_manager (``jupyter_client.KernelManager``): the kernel manager
+
+    Returns:
+        ``int | None``: the PID of the kernel
+    """
+    provisioner = getattr(kernel_manager, "provisioner", None)
+    pid = getattr(provisioner, "pid", None)
+    if pid is None:
+        pid = getattr(getattr(kernel_manager, "kernel", None), "pid", None)
+    return pid
+
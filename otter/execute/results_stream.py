@@ -0,0 +1,124 @@
+"""Streaming the result of each check out of the kernel as soon as it is available"""
+
+import os
+import pickle
+
+from typing import List, Optional, Tuple
+
+from .isolation import _fail_test_file
+
+from ..test_files import GradingResults, TestFile
+from ..utils import loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+RESULTS_STREAM_FILENAME = "results_stream.pkl"
+"""the name of the results stream file in the autograder's results directory"""
+
+UNREACHED_MESSAGE = "❌ Test was not run because grading ended before it was reached"
+"""the failure message of test cases in test files that were not run before grading ended"""
+
+
+def start_results_stream(path: str, test_files: List[TestFile]):
+    """
+    Create a results stream file, replacing any existing file, whose header is the list of test
+    files that are expected to be run.
+
+    Args:
+        path (``str``): the path to the stream file
+        test_files (``list[TestFile]``): the test files, without results
+    """
+    with open(path, "wb") as f:
+        pickle.dump(test_files, f)
+
+
+def append_to_results_stream(path: str, test_files: List[TestFile]):
+    """
+    Append the results of running some test files to a results stream file.
+
+    Each call appends a single record and closes the file, so the records written before the
+    process writing them is killed are preserved.
+
+    Args:
+        path (``str``): the path to the stream file
+        test_files (``list[TestFile]``): the test files, with results
+    """
+    with open(path, "ab") as f:
+        pickle.dump(test_files, f)
+
+
+def read_results_stream(path: str) -> Tuple[List[TestFile], List[TestFile]]:
+    """
+    Read the expected test files and the test files with results from a results stream file.
+
+    A record that was only partially written (e.g. because the process writing it was killed) and
+    any records after it are ignored.
+
+    Args:
+        path (``str``): the path to the stream file
+
+    Returns:
+        ``tuple[list[TestFile], list[TestFile]]``: the expected test files and the test files with
+        results, in the order in which they were run
+    """
+    records = []
+    with open(path, "rb") as f:
+        while True:
+            try:
+                records.append(pickle.load(f))
+            except EOFError:
+                break
+            except Exception as e:
+                LOGGER.debug(f"Could not read a record from results stream {path}: {e}")
+                break
+
+    if not records:
+        return [], []
+
+    return records[0], [tf for record in records[1:] for tf in record]
+
+
+def recover_results(
+    path: str,
+    error: Exception,
+    message: str = UNREACHED_MESSAGE,
+) -> Optional[GradingResults]:
+    """
+    Assemble partial results from a results stream file after grading ended abnormally.
+
+    Test files that were run have their streamed results; test files in the header that were not
+    run have all of their test cases failed with ``message``. If the same test file was run more than once, its last
+    results are used.
+
+    Args:
+        path (``str``): the path to the stream file
+        error (``Exception``): the error that ended grading
+        message (``str``): the failure message of the test cases that were not run
+
+    Returns:
+        ``otter.test_files.GradingResults | None``: the partial results, or ``None`` if the stream
+        file does not exist or is empty
+    """
+    if not os.path.isfile(path):
+        return None
+
+    expected, run = read_results_stream(path)
+    if not expected and not run:
+        return None
+
+    test_files = {tf.name: tf for tf in expected}
+    reached = {tf.name: tf for tf in run}
+    for name, tf in test_files.items():
+        if name not in reached:
+            test_files[name] = _fail_test_file(tf, message)
+
+    test_files.update(reached)
+    LOGGER.debug(
+        f"Recovered the results of {len(reached)} of {len(test_files)} tests from results stream")
+
+    results = GradingResults(list(test_files.values()))
+    results.termination_error = error
+    results.output = f"Grading ended before all tests were run ({type(error).__name__}: " \
+        f"{error}); tests that were not run received no credit."
+    return results
@@ -0,0 +1,111 @@
+"""Removing data that is not needed to execute a submission from notebooks"""
+
+import json
+import shutil
+
+from typing import Any, Dict
+
+from ..utils import loggers, NOTEBOOK_METADATA_KEY
+
+
+LOGGER = loggers.get_logger(__name__)
+
+MAX_METADATA_SIZE = 64 * 1024
+"""the maximum size, in bytes of JSON, of a metadata value that is kept in a slimmed notebook"""
+
+_PRESERVED_METADATA_KEYS = {NOTEBOOK_METADATA_KEY, "kernelspec", "language_info", "jupytext"}
+"""metadata keys that are never removed because they are needed to execute and grade submissions"""
+
+
+def _slim_metadata(metadata: Dict[str, Any], max_size: int) -> int:
+    """
+    Remove the values in a metadata dictionary whose JSON representations are larger than
+    ``max_size`` bytes, except for those in ``_PRESERVED_METADATA_KEYS``.
+
+    Returns:
+        ``int``: the number of values removed
+    """
+    to_remove = []
+    for key, value in metadata.items():
+        if key in _PRESERVED_METADATA_KEYS:
+            continue
+        try:
+            size = len(json.dumps(value))
+        except (TypeError, ValueError):
+            continue
+        if size > max_size:
+            to_remove.append(key)
+
+    for key in to_remove:
+        del metadata[key]
+
+    return len(to_remove)
+
+
+def slim_notebook(nb: Dict[str, Any], max_metadata_size: int = MAX_METADATA_SIZE) -> Dict[str, Any]:
+    """
+    Remove the outputs, execution counts, attachments, and oversized metadata from a notebook in
+    place.
+
+    None of this data is needed to execute a submission, since executing it replaces the outputs,
+    but submissions that contain large outputs (e.g. images) can be many times the size of their
+    source. Slimmed notebooks should not be used to generate PDFs.
+
+    This function works on both ``nbformat.NotebookNode`` objects and the dictionaries created by
+    parsing notebook JSON, and does not validate the notebook.
+
+    Args:
+        nb (``nbformat.NotebookNode | dict[str, object]``): the notebook
+        max_metadata_size (``int``): the maximum size, in bytes of JSON, of notebook and cell
+            metadata values to keep
+
+    Returns:
+        ``nbformat.NotebookNode | dict[str, object]``: the same notebook
+    """
+    num_metadata = _slim_metadata(nb.get("metadata", {}), max_metadata_size)
+    num_outputs = 0
+    for cell in nb.get("cells", []):
+        if cell.get("cell_type") == "code":
+            num_outputs += len(cell.get("outputs", []))
+            cell["outputs"] = []
+            cell["execution_count"] = None
+
+        cell.pop("attachments", None)
+        num_metadata += _slim_metadata(cell.get("metadata", {}), max_metadata_size)
+
+    LOGGER.debug(f"Removed {num_outputs} outputs and {num_metadata} metadata values from notebook")
+    return nb
+
+
+def slim_notebook_file(src: str, dst: str, max_metadata_size: int = MAX_METADATA_SIZE) -> bool:
+    """
+    Write a slimmed copy of the notebook at ``src`` to ``dst``. See ``slim_notebook``.
+
+    If ``src`` cannot be parsed as a notebook, it is copied to ``dst`` unchanged so that any errors
+    are reported when the submission is executed.
+
+    Args:
+        src (``str``): the path to the notebook
+        dst (``str``): the path at which to write the slimmed notebook
+        max_metadata_size (``int``): the maximum size, in bytes of JSON, of notebook and cell
+            metadata values to keep
+
+    Returns:
+        ``bool``: whether the notebook was slimmed
+    """
+    try:
+        with open(src, encoding="utf-8") as f:
+            nb = json.load(f)
+        if not isinstance(nb, dict):
+            raise ValueError("Notebook JSON is not an object")
+
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        LOGGER.debug(f"Could not slim notebook {src}: {e}")
+        shutil.copyfile(src, dst)
+        return False
+
+    slim_notebook(nb, max_metadata_size)
+    with open(dst, "w", encoding="utf-8") as f:
+        json.dump(nb, f, ensure_ascii=False)
+
+    return True
@@ -0,0 +1,170 @@
+"""Post-execution environment snapshots for re-running tests without re-executing submissions"""
+
+import hashlib
+import importlib
+import os
+import types
+
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, TYPE_CHECKING, Union
+
+from .checker import Checker
+
+from ..check.logs import LogEntry
+from ..nbmeta_config import NBMetadataConfig
+from ..test_files import GradingResults, TestFile
+from ..utils import import_or_raise, locked_chdir, loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+SNAPSHOT_EXTENSION = ".pkl"
+"""the extension of environment snapshot files"""
+
+_IGNORED_NAMES = {"In", "Out", "get_ipython", "exit", "quit"}
+"""names of IPython-injected globals that are never included in a snapshot"""
+
+
+def hash_submission(submission_path: str) -> str:
+    """
+    Compute the key used to identify the environment snapshot of a submission, which is the SHA-256
+    hash of the submission file's contents.
+
+    Args:
+        submission_path (``str``): the path to the submission
+
+    Returns:
+        ``str``: the hex digest of the hash
+    """
+    h = hashlib.sha256()
+    with open(submission_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def get_snapshot_path(snapshot_dir: str, submission_path: str) -> str:
+    """
+    Determine the path of the environment snapshot for a submission in ``snapshot_dir``.
+
+    Args:
+        snapshot_dir (``str``): the directory of snapshots
+        submission_path (``str``): the path to the submission
+
+    Returns:
+        ``str``: the path to the snapshot file
+    """
+    return os.path.join(snapshot_dir, hash_submission(submission_path) + SNAPSHOT_EXTENSION)
+
+
+def write_snapshot(path: str, env: Dict[str, Any]) -> List[str]:
+    """
+    Serialize a global environment to a snapshot file at ``path``.
+
+    Variables are filtered with ``LogEntry.shelve_environment``. Because modules cannot be shelved,
+    the names that modules are bound to are recorded separately so that they can be re-imported when
+    the snapshot is loaded.
+
+    Args:
+        path (``str``): the path at which to write the snapshot
+        env (``dict[str, object]``): the environment to snapshot
+
+    Returns:
+        ``list[str]``: the names of variables that were not included in the snapshot
+    """
+    dill = import_or_raise("dill")
+
+    env = {k: v for k, v in env.items() if not k.startswith("_") and k not in _IGNORED_NAMES}
+    modules = {k: v.__name__ for k, v in env.items() if isinstance(v, types.ModuleType)}
+    shelf, not_shelved = LogEntry.shelve_environment(env)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        dill.dump({"shelf": shelf, "modules": modules}, f)
+
+    return [k for k in not_shelved if k not in modules]
+
+
+def load_snapshot(path: str) -> Dict[str, Any]:
+    """
+    Load a global environment from a snapshot file written by ``write_snapshot``.
+
+    Modules that cannot be re-imported are omitted from the environment.
+
+    Args:
+        path (``str``): the path to the snapshot
+
+    Returns:
+        ``dict[str, object]``: the environment
+    """
+    dill = import_or_raise("dill")
+
+    with open(path, "rb") as f:
+        snapshot = dill.load(f)
+
+    env = {}
+    for name, module in snapshot["modules"].items():
+        try:
+            env[name] = importlib.import_module(module)
+        except ImportError:
+            LOGGER.warning(f"Could not import module '{module}' from environment snapshot")
+
+    shelf = dill.loads(snapshot["shelf"])
+    env.update(shelf)
+
+    # point the globals of functions defined in the submission at the loaded environment
+    for v in shelf.values():
+        if type(v) == types.FunctionType:
+            v.__globals__.update(env)
+
+    return env
+
+
+def grade_snapshot(
+    snapshot_path: str,
+    *,
+    tests_glob: List[str],
+    plugin_collection: Optional["PluginCollection"] = None,
+    test_case_timeout: Optional[Union[int, float]] = None,
+    cwd: Optional[str] = None,
+) -> GradingResults:
+    """
+    Grade a submission by running tests against its environment snapshot instead of re-executing it.
+
+    Only the final state of the environment is available, so tests that the submission ran against
+    intermediate states (e.g. with ``grader.check`` calls) are run against the final environment.
+
+    Args:
+        snapshot_path (``str``): the path to the snapshot
+        tests_glob (``list[str]``): paths of test files that should be run
+        plugin_collection (``otter.plugins.PluginCollection``): a set of plugins to run the
+            ``after_grading`` event on
+        test_case_timeout (``int | float | None``): the default number of seconds after which a
+            test case is interrupted and failed
+        cwd (``str | None``): the working directory in which to run the tests, as the submission
+            was executed in it; relative paths in ``tests_glob`` are resolved against the current
+            working directory
+
+    Returns:
+        ``otter.test_files.GradingResults``: the results of grading
+    """
+    LOGGER.debug(f"Loading environment snapshot: {snapshot_path}")
+    env = load_snapshot(snapshot_path)
+
+    tests_glob = [os.path.abspath(p) for p in tests_glob]
+    with Checker.session(), TestFile.default_timeout_context(test_case_timeout), \
+            (locked_chdir(cwd) if cwd is not None else nullcontext()):
+        test_files = []
+        for test_path in sorted(tests_glob):
+            test_files.append(Checker.check(test_path, NBMetadataConfig(), global_env=env))
+
+    results = GradingResults(test_files)
+
+    if plugin_collection is not None:
+        plugin_collection.run("after_grading", results)
+
+    return results
+
+
+if TYPE_CHECKING:
+    from ..plugins import PluginCollection
@@ -0,0 +1,141 @@
+"""Recording the time taken to execute each cell of a submission"""
+
+import time
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+
+CELL_INDEX_METADATA_KEY = "cell_index"
+"""the key in a cell's Otter metadata that stores the index of the cell in the submission"""
+
+
+@dataclass
+class CellTiming:
+    """
+    A dataclass representing the time taken to execute a single cell.
+    """
+
+    execution_count: int
+    """the execution count of the cell in the kernel"""
+
+    wall_time: float
+    """the wall time taken to execute the cell, in seconds"""
+
+    cpu_time: float
+    """the CPU time used by the kernel while executing the cell, in seconds"""
+
+    cell_index: Optional[int] = None
+    """the index of the cell in the submission notebook"""
+
+
+_start: Optional[Tuple[float, float]] = None
+"""the wall and CPU times at which the currently-executing cell was started"""
+
+_timings: List[CellTiming] = []
+"""the timings of the cells executed since ``record_cell_timings`` was called"""
+
+
+def _pre_run_cell(*args):
+    global _start
+    _start = (time.perf_counter(), time.process_time())
+
+
+def _post_run_cell(result):
+    global _start
+    from ..utils import loggers
+
+    # send the logs emitted by the cell so that they are not lost if the kernel dies
+    loggers.flush_logs()
+
+    if _start is None or result.execution_count is None:
+        return
+
+    start_wall, start_cpu = _start
+    _timings.append(CellTiming(
+        execution_count = result.execution_count,
+        wall_time = time.perf_counter() - start_wall,
+        cpu_time = time.process_time() - start_cpu,
+    ))
+    _start = None
+
+
+def record_cell_timings():
+    """
+    Start recording the wall and CPU time taken to execute each cell in the current IPython kernel.
+
+    This function is called in the kernel executing a submission; it has no effect if the code is
+    not being run by IPython.
+    """
+    try:
+        from IPython import get_ipython
+    except ImportError:  # pragma: no cover
+        return
+
+    ipython = get_ipython()
+    if ipython is None:
+        return
+
+    _timings.clear()
+    ipython.events.register("pre_run_cell", _pre_run_cell)
+    ipython.events.register("post_run_cell", _post_run_cell)
+
+
+def get_cell_timings() -> List[CellTiming]:
+    """
+    Return the timings of the cells executed since ``record_cell_timings`` was called.
+
+    Returns:
+        ``list[CellTiming]``: the cell timings
+    """
+    return list(_timings)
+
+
+def stamp_cell_indices(nb: "nbf.NotebookNode", metadata_key: str):
+    """
+    Store the index of each cell in a notebook in the cell's metadata so that cells from the
+    submission can be identified after other cells have been added to or removed from the notebook.
+
+    Args:
+        nb (``nbformat.NotebookNode``): the notebook
+        metadata_key (``str``): the key of Otter's metadata in each cell
+    """
+    for i, cell in enumerate(nb.cells):
+        cell.setdefault("metadata", {}).setdefault(metadata_key, {})[CELL_INDEX_METADATA_KEY] = i
+
+
+def resolve_cell_indices(
+    timings: List[CellTiming],
+    nb: "nbf.NotebookNode",
+    metadata_key: str,
+) -> List[CellTiming]:
+    """
+    Set the submission cell index of each timing using the execution counts of the cells in an
+    executed notebook whose cells were stamped with ``stamp_cell_indices``. Timings of cells that
+    were not in the submission are dropped.
+
+    Args:
+        timings (``list[CellTiming]``): the cell timings
+        nb (``nbformat.NotebookNode``): the executed notebook
+        metadata_key (``str``): the key of Otter's metadata in each cell
+
+    Returns:
+        ``list[CellTiming]``: the timings of the submission's cells
+    """
+    indices: Dict[int, int] = {}
+    for cell in nb.cells:
+        idx = cell.get("metadata", {}).get(metadata_key, {}).get(CELL_INDEX_METADATA_KEY)
+        if cell.cell_type == "code" and idx is not None and cell.get("execution_count") is not None:
+            indices[cell.execution_count] = idx
+
+    resolved = []
+    for timing in timings:
+        if timing.execution_count in indices:
+            timing.cell_index = indices[timing.execution_count]
+            resolved.append(timing)
+
+    return resolved
+
+
+if TYPE_CHECKING:
+    import nbformat as nbf
@@ -0,0 +1,445 @@
+"""Executing the shared leading cells of many submissions once and forking for the rest"""
+
+import multiprocessing
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import traceback
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+from ...test_files import GradingResults
+from ...utils import loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+_UNSUPPORTED_ARGUMENTS = {
+    "sample_resources",
+    "max_cell_output_size",
+    "max_output_size",
+    "discard_outputs",
+    "notebook",
+    "abort_on_critical_error",
+    "max_consecutive_errors",
+    "max_kernel_restarts",
+    "fixture_cache_dir",
+    "results_stream_path",
+}
+"""arguments of ``grade_notebook`` that cannot be used when grading from a zygote"""
+
+
+@dataclass
+class PrefixNode:
+    """
+    A node in the tree of the code cells of a group of submissions. Each path from the root to a
+    node is a sequence of cells that begins at least one submission; submissions whose cells are
+    identical up to a node share that node and all of its ancestors.
+    """
+
+    source: Optional[str] = None
+    """the source of the cell executed to reach this node, or ``None`` for the root"""
+
+    children: Dict[str, "PrefixNode"] = field(default_factory=dict)
+    """the nodes of the cells that follow this one, keyed by their source"""
+
+    submissions: List[int] = field(default_factory=list)
+    """the indices of the submissions whose last cell is this one"""
+
+    def iter_submissions(self):
+        """
+        Yield the indices of all submissions whose cells pass through this node.
+        """
+        yield from self.submissions
+        for child in self.children.values():
+            yield from child.iter_submissions()
+
+
+def build_prefix_tree(cell_sources: List[List[str]]) -> PrefixNode:
+    """
+    Build the tree of the code cells of a group of submissions.
+
+    Args:
+        cell_sources (``list[list[str]]``): the sources of the code cells of each submission
+
+    Returns:
+        ``PrefixNode``: the root of the tree
+    """
+    root = PrefixNode()
+    for i, sources in enumerate(cell_sources):
+        node = root
+        for source in sources:
+            node = node.children.setdefault(source, PrefixNode(source=source))
+        node.submissions.append(i)
+
+    return root
+
+
+def _create_shell():
+    """
+    Create the IPython shell that executes cells in the zygote, capturing execution results and
+    tracebacks as notebook outputs.
+    """
+    import nbformat as nbf
+
+    from IPython.core.displayhook import DisplayHook
+    from IPython.core.interactiveshell import InteractiveShell
+    from traitlets.config import Config
+
+    class CapturingDisplayHook(DisplayHook):
+
+        def write_output_prompt(self):
+            pass
+
+        def write_format_data(self, format_dict, md_dict=None):
+            self.shell.cell_outputs.append(nbf.v4.new_output(
+                "execute_result",
+                data = format_dict,
+                metadata = md_dict or {},
+                execution_count = self.prompt_count,
+            ))
+
+    class ZygoteShell(InteractiveShell):
+
+        cell_outputs: List[nbf.NotebookNode]
+        """the execution result and error outputs of the cell being executed"""
+
+        def _showtraceback(self, etype, evalue, stb):
+            self.cell_outputs.append(nbf.v4.new_output(
+                "error", ename=etype.__name__, evalue=str(evalue), traceback=stb))
+
+    c = Config()
+    c.HistoryManager.enabled = False
+    c.InteractiveShell.colors = "NoColor"
+    return ZygoteShell.instance(config=c, displayhook_class=CapturingDisplayHook)
+
+
+def execute_cell(shell, source: str) -> Dict[str, Any]:
+    """
+    Execute a cell in the zygote's shell.
+
+    Args:
+        shell (``IPython.core.interactiveshell.InteractiveShell``): the shell
+        source (``str``): the source of the cell
+
+    Returns:
+        ``dict[str, object]``: the execution count, outputs, and error output (if the cell raised
+        an error) of the cell
+    """
+    import nbformat as nbf
+
+    from IPython.utils.capture import capture_output
+
+    shell.cell_outputs = []
+    with capture_output() as captured:
+        result = shell.run_cell(source, store_history=True)
+
+    outputs = []
+    if captured.stdout:
+        outputs.append(nbf.v4.new_output("stream", name="stdout", text=captured.stdout))
+    if captured.stderr:
+        outputs.append(nbf.v4.new_output("stream", name="stderr", text=captured.stderr))
+    for output in captured.outputs:
+        outputs.append(
+            nbf.v4.new_output("display_data", data=output.data, metadata=output.metadata or {}))
+    outputs.extend(shell.cell_outputs)
+
+    error = None
+    if not result.success:
+        error = next((o for o in outputs if o.output_type == "error"), None)
+
+    return {"execution_count": result.execution_count, "outputs": outputs, "error": error}
+
+
+def _write_records(path: str, records: List[Dict[str, Any]]):
+    with open(path, "wb") as f:
+        pickle.dump(records, f)
+
+
+def _release_slot(semaphore: "multiprocessing.synchronize.Semaphore", release_fd: Optional[int]):
+    """
+    Release the worker slot held by this process, first telling the parent process (through
+    ``release_fd``) that it doesn't need to release the slot itself.
+    """
+    if release_fd is not None:
+        os.write(release_fd, b"\0")
+        os.close(release_fd)
+    semaphore.release()
+
+
+def _reap_children(
+    running: Dict[int, int],
+    semaphore: "multiprocessing.synchronize.Semaphore",
+    block: bool,
+):
+    """
+    Wait for the child processes in ``running`` (a map of PIDs to the read ends of their release
+    pipes) to exit, releasing the slots of any that exited without releasing them (e.g. because a
+    cell killed the process). If ``block`` is false, only children that have already exited are
+    reaped.
+    """
+    for pid in list(running):
+        waited, _ = os.waitpid(pid, 0 if block else os.WNOHANG)
+        if waited == 0:
+            continue
+
+        release_fd = running.pop(pid)
+        if not os.read(release_fd, 1):
+            semaphore.release()
+        os.close(release_fd)
+
+
+def execute_prefix_tree(
+    shell,
+    node: PrefixNode,
+    records_paths: List[str],
+    ignore_errors: bool,
+    semaphore: "multiprocessing.synchronize.Semaphore",
+    records: Optional[List[Dict[str, Any]]] = None,
+    release_fd: Optional[int] = None,
+):
+    """
+    Execute the cells in a prefix tree, forking a child process at each node where submissions
+    diverge so that the cells before it are executed only once.
+
+    When the last cell of a submission is executed, the records of all of its cells are pickled to
+    its path in ``records_paths``. If a cell raises an error and ``ignore_errors`` is false, the
+    records up to that cell are written for every submission that shares it.
+
+    Each process executes cells only while it holds one of the slots of ``semaphore``, which is
+    shared by every process in the tree. The caller must hold a slot, which is released once this
+    process reaches a divergence (or the end of its cells); a slot is acquired for each child
+    before it is forked, so no more processes execute cells at once than ``semaphore`` allows.
+
+    Args:
+        shell (``IPython.core.interactiveshell.InteractiveShell``): the shell to execute cells in
+        node (``PrefixNode``): the node to start from
+        records_paths (``list[str]``): the path to write the records of each submission to
+        ignore_errors (``bool``): whether to continue executing cells that raise errors
+        semaphore (``multiprocessing.synchronize.Semaphore``): the semaphore limiting the number
+            of processes executing cells at once
+        records (``list[dict[str, object]]``): the records of the cells executed before ``node``
+        release_fd (``int | None``): the write end of a pipe to the parent process, written to when
+            this process releases its slot
+    """
+    records = list(records or [])
+    try:
+        while True:
+            if node.source is not None:
+                record = execute_cell(shell, node.source)
+                records.append(record)
+                if record["error"] is not None and not ignore_errors:
+                    for i in node.iter_submissions():
+                        _write_records(records_paths[i], records)
+                    return
+
+            for i in node.submissions:
+                _write_records(records_paths[i], records)
+
+            children = list(node.children.values())
+            if len(children) != 1:
+                break
+
+            node = children[0]
+
+    finally:
+        _release_slot(semaphore, release_fd)
+
+    running = {}
+    for child in children:
+        # reap children while waiting so that the slots of children that were killed are released
+        while not semaphore.acquire(timeout=0.1):
+            _reap_children(running, semaphore, block=False)
+
+        # don't duplicate anything that is buffered in the children
+        sys.stdout.flush()
+        sys.stderr.flush()
+        loggers.flush_logs()
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                for fd in running.values():
+                    os.close(fd)
+
+                execute_prefix_tree(
+                    shell, child, records_paths, ignore_errors, semaphore, records, write_fd)
+
+            except BaseException:
+                traceback.print_exc()
+
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                loggers.flush_logs()
+                os._exit(0)
+
+        os.close(write_fd)
+        running[pid] = read_fd
+
+    _reap_children(running, semaphore, block=True)
+
+
+def run_zygote(spec_path: str):
+    """
+    Execute the prefix tree of the submissions described by a spec file written by
+    ``grade_notebooks_with_shared_prefixes``. This function is run by ``python -m
+    otter.execute.zygote`` in the process that becomes the zygote.
+
+    Args:
+        spec_path (``str``): the path to the pickled spec
+    """
+    with open(spec_path, "rb") as f:
+        spec = pickle.load(f)
+
+    # use the same inline backend as a Jupyter kernel so that figures are captured as outputs
+    os.environ.setdefault("MPLBACKEND", "module://matplotlib_inline.backend_inline")
+
+    # the semaphore is inherited by every process forked from the zygote, so that the limit on the
+    # number of processes executing cells is global instead of per divergence
+    semaphore = multiprocessing.get_context("fork").Semaphore(spec["max_workers"])
+    semaphore.acquire()
+
+    shell = _create_shell()
+    execute_prefix_tree(
+        shell,
+        build_prefix_tree(spec["cell_sources"]),
+        spec["records_paths"],
+        spec["ignore_errors"],
+        semaphore,
+    )
+
+
+def _apply_records(nb: "nbf.NotebookNode", records: List[Dict[str, Any]]):
+    """
+    Set the execution counts and outputs of the code cells of a notebook from their records.
+    """
+    code_cells = [c for c in nb.cells if c.cell_type == "code"]
+    for cell, record in zip(code_cells, records):
+        cell.execution_count = record["execution_count"]
+        cell.outputs = record["outputs"]
+
+
+def grade_notebooks_with_shared_prefixes(
+    submission_paths: List[str],
+    *,
+    max_workers: Optional[int] = None,
+    **kwargs,
+) -> Dict[str, GradingResults]:
+    """
+    Grade many assignment files by executing the code cells that they have in common only once.
+
+    The submissions are prepared for grading as ``grade_notebook`` would, using the same names in
+    the cells that Otter adds to each notebook, and their code cells are arranged into a tree of
+    shared prefixes (see ``PrefixNode``). A single zygote process executes the tree with an IPython
+    shell and forks wherever submissions diverge, so a cell shared by a group of submissions (e.g.
+    the imports and data loading of the starter notebook) is executed once for the whole group and
+    each child process inherits its environment copy-on-write.
+
+    Cells are executed by an ``InteractiveShell`` in the zygote instead of a Jupyter kernel, so
+    this mode is only appropriate for Python submissions that do not depend on kernel-specific
+    features (e.g. widgets or ``input``). All submissions are executed in the working directory
+    ``cwd``, which is shared by every process forked from the zygote: files written by the cells of
+    one submission after it diverges from the others are visible to (and can be overwritten by)
+    the submissions executed after it, so submissions whose cells write files with fixed names
+    should be graded with ``grade_notebook`` in separate directories instead. Resource sampling and
+    output limits are not supported.
+
+    Args:
+        submission_paths (``list[str]``): paths to the notebooks or Python scripts to grade
+        max_workers (``int | None``): the maximum number of processes that execute cells at once
+            across the whole tree; defaults to the number of CPUs
+        **kwargs: the keyword arguments accepted by ``grade_notebook``, used for every submission
+
+    Returns:
+        ``dict[str, otter.test_files.GradingResults]``: the results of each submission, keyed by
+        its path
+
+    Raises:
+        ``ValueError``: if an argument that is not supported in this mode is provided
+    """
+    from nbclient.exceptions import CellExecutionError
+
+    from .. import _NotebookGrader
+
+    unsupported = [k for k in _UNSUPPORTED_ARGUMENTS if kwargs.get(k)]
+    if unsupported:
+        raise ValueError(
+            f"Arguments not supported when grading with shared prefixes: {', '.join(unsupported)}")
+
+    ignore_errors = kwargs.get("ignore_errors", True)
+    records_dir = tempfile.mkdtemp()
+    graders, cell_sources, records_paths, results = {}, [], {}, {}
+    try:
+        for path in submission_paths:
+            try:
+                grader = _NotebookGrader(path, stable_names=True, **kwargs)
+                graders[path] = grader
+                grader.nb, _ = grader.gp.preprocess(grader.nb)
+
+            except Exception as e:
+                LOGGER.error(f"Error encountered while preparing {path} for grading: {e}")
+                results[path] = GradingResults.without_results(e)
+                continue
+
+            cell_sources.append([c.source for c in grader.nb.cells if c.cell_type == "code"])
+            records_paths[path] = os.path.join(records_dir, f"{len(records_paths)}.pkl")
+
+        spec_path = os.path.join(records_dir, "spec.pkl")
+        with open(spec_path, "wb") as f:
+            pickle.dump({
+                "cell_sources": cell_sources,
+                "records_paths": list(records_paths.values()),
+                "ignore_errors": ignore_errors,
+                "max_workers": max_workers or os.cpu_count() or 1,
+            }, f)
+
+        LOGGER.debug(f"Starting zygote for {len(records_paths)} submissions")
+        loggers.flush_logs()
+        returncode = subprocess.run(
+            [sys.executable, "-m", "otter.execute.zygote", spec_path],
+            cwd = kwargs.get("cwd"),
+        ).returncode
+
+        # submissions whose records were written before the zygote exited are still graded
+        if returncode != 0:
+            LOGGER.error(f"The zygote exited with return code {returncode}")
+
+        for path, records_path in records_paths.items():
+            grader = graders[path]
+            try:
+                with open(records_path, "rb") as f:
+                    records = pickle.load(f)
+
+            except OSError:
+                results[path] = GradingResults.without_results(
+                    RuntimeError("The process executing the submission exited unexpectedly"))
+                continue
+
+            error = records[-1]["error"] if records else None
+            if error is not None and not ignore_errors:
+                results[path] = GradingResults.without_results(CellExecutionError(
+                    "\n".join(error.traceback), error.ename, error.evalue))
+                continue
+
+            _apply_records(grader.nb, records)
+            results[path] = grader.get_results(grader.nb)
+
+    finally:
+        for grader in graders.values():
+            grader.stop()
+            grader.cleanup()
+        shutil.rmtree(records_dir)
+
+    return {path: results[path] for path in submission_paths}
+
+
+if TYPE_CHECKING:
+    import multiprocessing.synchronize
+    import nbformat as nbf
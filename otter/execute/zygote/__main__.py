@@ -0,0 +1,9 @@
+"""Run the zygote process that executes the prefix tree of a group of submissions"""
+
+import sys
+
+from . import run_zygote
+
+
+if __name__ == "__main__":
+    run_zygote(sys.argv[1])
@@ -1,6 +1,6 @@
 """ABC for Otter Export exporters"""
 
-import nbformat
+import copy
 import nbconvert
 import pkg_resources
 
@@ -8,7 +8,7 @@ from abc import ABC, abstractmethod
 
 from .utils import has_begin, has_end, sub_end_for_new_page
 
-from ...utils import NBFORMAT_VERSION
+from ...utils import load_notebook
 
 
 NBCONVERT_6 = int(nbconvert.__version__.split(".")[0]) >= 6  # for determining template inheritance
@@ -37,6 +37,7 @@ class BaseExporter(ABC):
     default_options = {
         "filtering": False,
         "pagebreaks": True,
+        "notebook": None,
     }
 
     # def __init_subclass__(cls, **kwargs):
@@ -58,7 +59,7 @@ class BaseExporter(ABC):
         ...
 
     @classmethod
-    def load_notebook(cls, nb_path, filtering=False, pagebreaks=True):
+    def load_notebook(cls, nb_path, filtering=False, pagebreaks=True, notebook=None):
         """
         Loads notebook at ``nb_path`` with nbformat and returns the parsed notebook, optionally filtered
         and with pagebreak metadata hidden in HTML comments.
@@ -68,12 +69,18 @@ class BaseExporter(ABC):
             filtering (``bool``, optional): whetheer cells should be filtered
             pagebreaks (``bool``, optional): whether to include pagebreaks between each question; ignored
                 if ``filtering`` is ``False``
+            notebook (``nbformat.NotebookNode``, optional): the already-parsed notebook at
+                ``nb_path``; if provided, the file is not read and this notebook is not modified
 
         Returns:
             ``nbformat.NotebookNode``: the parsed and (optionally) filtered notebook
         """
-        with open(nb_path) as f:
-            notebook = nbformat.read(f, as_version=NBFORMAT_VERSION)
+        if notebook is None:
+            notebook = load_notebook(nb_path)
+        elif filtering:
+            # filtering modifies the cells list and the cells' sources in place
+            notebook = copy.copy(notebook)
+            notebook["cells"] = [copy.copy(c) for c in notebook["cells"]]
         if filtering:
             notebook = cls.filter_cells(notebook, pagebreaks=pagebreaks)
         return notebook
@@ -39,7 +39,12 @@ class PDFViaHTMLExporter(BaseExporter):
         options = cls.default_options.copy()
         options.update(kwargs)
 
-        nb = cls.load_notebook(nb_path, filtering=options["filtering"], pagebreaks=options["pagebreaks"])
+        nb = cls.load_notebook(
+            nb_path,
+            filtering=options["filtering"],
+            pagebreaks=options["pagebreaks"],
+            notebook=options["notebook"],
+        )
 
         if NBCONVERT_6:
             nbconvert.TemplateExporter.extra_template_basedirs = [TEMPLATE_DIR]
@@ -41,7 +41,12 @@ class PDFViaLatexExporter(BaseExporter):
         if xecjk:
             options["template"] = "via_latex_xecjk"
 
-        nb = cls.load_notebook(nb_path, filtering=options["filtering"], pagebreaks=options["pagebreaks"])
+        nb = cls.load_notebook(
+            nb_path,
+            filtering=options["filtering"],
+            pagebreaks=options["pagebreaks"],
+            notebook=options["notebook"],
+        )
 
         if NBCONVERT_6:
             nbconvert.TemplateExporter.extra_template_basedirs = [TEMPLATE_DIR]
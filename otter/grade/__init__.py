@@ -7,7 +7,7 @@ from glob import glob
 from typing import List, Optional, Tuple, Union
 
 from .containers import launch_containers
-from .utils import merge_csv, prune_images, SCORES_DICT_FILE_KEY, SCORES_DICT_PERCENT_CORRECT_KEY,  SCORES_DICT_TOTAL_POINTS_KEY
+from .utils import merge_csv, prune_images, RESOURCE_USAGE_KEYS, SCORES_DICT_FILE_KEY, SCORES_DICT_PERCENT_CORRECT_KEY,  SCORES_DICT_TOTAL_POINTS_KEY, summarize_resource_usage
 
 from ..run.run_autograder.autograder_config import AutograderConfig
 from ..utils import assert_path_exists, loggers
@@ -33,6 +33,8 @@ def main(
     timeout: bool = None,
     no_network: bool = False,
     debug: bool = False,
+    snapshot_environments: bool = False,
+    tests_only: bool = False,
 ):
     """
     Run Otter Grade.
@@ -44,6 +46,14 @@ def main(
 
     If ``prune`` is true, Otter's dangling grading images are pruned and the program exits.
 
+    If ``snapshot_environments`` is true, the global environment of each submission after it is
+    executed is saved in a subdirectory of ``output_dir`` called ``environment_snapshots``. If
+    ``tests_only`` is true, the tests are run against these snapshots instead of re-executing the
+    submissions, which is much faster when iterating on the tests of an assignment.
+
+    The peak memory, CPU time, and number of child processes used to grade each submission are
+    included in the CSV file and their maximum and 95th percentile values are printed.
+
     Args:
         name (``str``): an assignment name to use in the Docker image tag; must be specified unless
             ``prune`` is true
@@ -61,6 +71,10 @@ def main(
         timeout (``int``): an execution timeout in seconds for each container
         no_network (``bool``): whether to disable networking in the containers
         debug (``bool``): whether to run autograding in debug mode
+        snapshot_environments (``bool``): whether to save the post-execution environment of each
+            submission
+        tests_only (``bool``): whether to run the tests against saved environment snapshots
+            instead of executing the submissions
 
     Returns:
         ``float | None``: the percentage scored by that submission if a single file was graded
@@ -107,6 +121,23 @@ def main(
 
     pdf_dir = os.path.join(output_dir, "submission_pdfs") if pdfs else None
 
+    snapshot_dir = None
+    if snapshot_environments or tests_only:
+        snapshot_dir = os.path.join(output_dir, "environment_snapshots")
+
+    config_overrides = {
+        "zips": ext == "zip",
+        "pdf": pdfs,
+        "debug": debug,
+    }
+
+    # only override these when they're set so that the values in otter_config.json are used
+    # otherwise
+    if snapshot_environments:
+        config_overrides["save_environment_snapshot"] = True
+    if tests_only:
+        config_overrides["tests_only"] = True
+
     grade_dfs = launch_containers(
         autograder,
         submission_paths,
@@ -117,11 +148,9 @@ def main(
         pdf_dir = pdf_dir,
         timeout = timeout,
         network = not no_network,
-        config = AutograderConfig({
-            "zips": ext == "zip",
-            "pdf": pdfs,
-            "debug": debug,
-        }),
+        snapshot_dir = snapshot_dir,
+        tests_only = tests_only,
+        config = AutograderConfig(config_overrides),
     )
 
     LOGGER.info("Combining grades and saving")
@@ -129,12 +158,17 @@ def main(
     # Merge dataframes
     output_df = merge_csv(grade_dfs)
     cols = output_df.columns.tolist()
-    question_cols = sorted(c for c in cols if c not in {SCORES_DICT_FILE_KEY, SCORES_DICT_TOTAL_POINTS_KEY, SCORES_DICT_PERCENT_CORRECT_KEY})
-    output_df = output_df[[SCORES_DICT_FILE_KEY, *question_cols, SCORES_DICT_TOTAL_POINTS_KEY, SCORES_DICT_PERCENT_CORRECT_KEY]]  
+    resource_cols = [c for c in RESOURCE_USAGE_KEYS if c in cols]
+    question_cols = sorted(c for c in cols if c not in {SCORES_DICT_FILE_KEY, SCORES_DICT_TOTAL_POINTS_KEY, SCORES_DICT_PERCENT_CORRECT_KEY, *resource_cols})
+    output_df = output_df[[SCORES_DICT_FILE_KEY, *question_cols, SCORES_DICT_TOTAL_POINTS_KEY, SCORES_DICT_PERCENT_CORRECT_KEY, *resource_cols]]  
 
     # write to CSV file
     output_df.to_csv(os.path.join(output_dir, "final_grades.csv"), index=False)
 
+    resource_summary = summarize_resource_usage(output_df)
+    if resource_summary is not None:
+        print(resource_summary)
+
     # return percentage if a single file was graded
     if len(paths) == 1 and os.path.isfile(paths[0]):
         return output_df[SCORES_DICT_PERCENT_CORRECT_KEY][1]
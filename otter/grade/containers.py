@@ -15,12 +15,22 @@ from typing import List, Optional
 
 from .utils import OTTER_DOCKER_IMAGE_NAME, merge_scores_to_df
 
+from ..execute.results_stream import recover_results, RESULTS_STREAM_FILENAME
+from ..execute.slimming import slim_notebook_file
+from ..execute.snapshot import get_snapshot_path
 from ..run.run_autograder.autograder_config import AutograderConfig
+from ..test_files import GradingResults
 from ..utils import loggers, OTTER_CONFIG_FILENAME
 
 
 LOGGER = loggers.get_logger(__name__)
 
+CONTAINER_SNAPSHOTS_DIR = "/autograder/results/snapshots"
+"""the directory of environment snapshots in the grading container"""
+
+CONTAINER_RESULTS_STREAM_PATH = f"/autograder/results/{RESULTS_STREAM_FILENAME}"
+"""the path to the results stream in the grading container"""
+
 
 def build_image(ag_zip_path: str, base_image: str, tag: str, config: AutograderConfig):
     """
@@ -71,6 +81,58 @@ def build_image(ag_zip_path: str, base_image: str, tag: str, config: AutograderC
     return image
 
 
+def get_snapshot_filename(submission_path: str) -> Optional[str]:
+    """
+    Determine the file name of the environment snapshot that the grading container will use for a
+    submission.
+
+    The snapshot is keyed by the hash of the file that is executed, so for zip file submissions,
+    this is the notebook (or Python script) in the zip file.
+
+    Args:
+        submission_path (``str``): the path to the submission
+
+    Returns:
+        ``str | None``: the file name of the snapshot, or ``None`` if it could not be determined
+    """
+    if os.path.splitext(submission_path)[1] != ".zip":
+        return os.path.basename(get_snapshot_path("", submission_path))
+
+    with zipfile.ZipFile(submission_path) as zf, tempfile.TemporaryDirectory() as temp_dir:
+        names = [n for n in zf.namelist() if "/" not in n]
+        subm_names = [n for n in names if n.endswith(".ipynb")] or \
+            [n for n in names if n.endswith(".py") and n != "__init__.py"]
+        if len(subm_names) != 1:
+            return None
+
+        return os.path.basename(get_snapshot_path("", zf.extract(subm_names[0], temp_dir)))
+
+
+def recover_container_results(container, exit: int) -> Optional[GradingResults]:
+    """
+    Recover the partial results of a grading container that exited abnormally (e.g. because it
+    was killed when it timed out) from the results stream written in the container.
+
+    Args:
+        container (``python_on_whales.Container``): the container
+        exit (``int``): the exit code of the container
+
+    Returns:
+        ``otter.test_files.GradingResults | None``: the partial results, or ``None`` if there is no
+        results stream in the container
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        local_path = os.path.join(temp_dir, RESULTS_STREAM_FILENAME)
+        try:
+            docker.container.copy((container, CONTAINER_RESULTS_STREAM_PATH), local_path)
+        except Exception as e:
+            LOGGER.debug(f"Could not copy results stream from container: {e}")
+            return None
+
+        return recover_results(
+            local_path, RuntimeError(f"Grading container exited with code {exit}"))
+
+
 def launch_containers(
     ag_zip_path: str,
     submission_paths: List[str],
@@ -127,6 +189,8 @@ def grade_submission(
     pdf_dir: Optional[str] = None,
     timeout: Optional[int] = None,
     network: bool = True,
+    snapshot_dir: Optional[str] = None,
+    tests_only: bool = False,
 ):
     """
     Grade a submission in a Docker container.
@@ -139,6 +203,11 @@ def grade_submission(
         pdf_dir (``str``, optional): a directory in which to put the notebook PDF, if applicable
         timeout (``int``, optional): timeout in seconds for each container
         network (``bool``): whether to enable networking in the containers
+        snapshot_dir (``str``, optional): a directory to which environment snapshots should be
+            copied from the container or, if ``tests_only`` is true, from which they should be
+            copied into the container
+        tests_only (``bool``): whether the container is running tests against an environment
+            snapshot instead of executing the submission
 
     Returns:
         ``pandas.core.frame.DataFrame``: A dataframe of file to grades information
@@ -146,7 +215,14 @@ def grade_submission(
     import dill
 
     temp_subm_file, temp_subm_path = tempfile.mkstemp()
-    shutil.copyfile(submission_path, temp_subm_path)
+
+    # a notebook's outputs are replaced when it is executed, so they are only copied into the
+    # container if they are needed to generate its PDF
+    slimmed = False
+    if not pdf_dir and os.path.splitext(submission_path)[1] == ".ipynb":
+        slimmed = slim_notebook_file(submission_path, temp_subm_path)
+    else:
+        shutil.copyfile(submission_path, temp_subm_path)
 
     results_file, results_path = tempfile.mkstemp(suffix=".pkl")
     pdf_path = None
@@ -173,6 +249,17 @@ def grade_submission(
         for local_path, container_path in volumes:
             docker.container.copy(local_path, (container, container_path))
 
+        if snapshot_dir and tests_only:
+            # the snapshot is keyed by the hash of the file in the container
+            snapshot_filename = get_snapshot_filename(temp_subm_path if slimmed else submission_path)
+            if snapshot_filename and os.path.isfile(os.path.join(snapshot_dir, snapshot_filename)):
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    shutil.copy(os.path.join(snapshot_dir, snapshot_filename), temp_dir)
+                    docker.container.copy(temp_dir, (container, CONTAINER_SNAPSHOTS_DIR))
+
+            else:
+                LOGGER.warning(f"No environment snapshot found for {submission_path}")
+
         docker.container.start(container)
 
         if timeout:
@@ -205,15 +292,33 @@ def grade_submission(
         for local_path, container_path in volumes:
             docker.container.copy((container, container_path), local_path)
 
+        if snapshot_dir and not tests_only and exit == 0:
+            os.makedirs(snapshot_dir, exist_ok=True)
+            try:
+                docker.container.copy((container, f"{CONTAINER_SNAPSHOTS_DIR}/."), snapshot_dir)
+            except Exception as e:
+                LOGGER.warning(f"Could not copy environment snapshot for {submission_path}: {e}")
+
+        recovered = None
+        if exit != 0:
+            recovered = recover_container_results(container, exit)
+
         if not no_kill:
             container.remove()
 
         if exit != 0:
-            raise Exception(
-                f"Executing '{submission_path}' in docker container failed! Exit code: {exit}")
-
-        with open(results_path, "rb") as f:
-            scores = dill.load(f)
+            if recovered is None:
+                raise Exception(
+                    f"Executing '{submission_path}' in docker container failed! Exit code: {exit}")
+
+            LOGGER.warning(
+                f"Executing '{submission_path}' in docker container failed with exit code {exit}; "
+                "using the results of the tests that were run")
+            scores = recovered
+
+        else:
+            with open(results_path, "rb") as f:
+                scores = dill.load(f)
 
         scores.file = nb_name
 
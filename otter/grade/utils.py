@@ -1,10 +1,11 @@
 """Utilities for Otter Grade"""
 
+import math
 import os
 import pandas as pd
 import re
 
-from typing import List
+from typing import List, Optional
 from python_on_whales import docker
 
 from ..test_files import GradingResults
@@ -19,6 +20,18 @@ SCORES_DICT_TOTAL_POINTS_KEY = "total_points_earned"
 
 SCORES_DICT_PERCENT_CORRECT_KEY = "percent_correct"
 
+SCORES_DICT_PEAK_MEMORY_KEY = "peak_memory_mb"
+
+SCORES_DICT_CPU_TIME_KEY = "cpu_seconds"
+
+SCORES_DICT_CHILD_PROCESSES_KEY = "child_processes"
+
+RESOURCE_USAGE_KEYS = [
+    SCORES_DICT_PEAK_MEMORY_KEY,
+    SCORES_DICT_CPU_TIME_KEY,
+    SCORES_DICT_CHILD_PROCESSES_KEY,
+]
+
 
 def list_files(path):
     """
@@ -79,6 +92,55 @@ def prune_images(force=False):
         print("Prune cancelled.")
 
 
+def get_resource_usage_dict(grading_result: GradingResults):
+    """
+    Convert the resources used while grading a submission into a ``dict`` of columns for the
+    scores dataframe. If the resources were not sampled, the values are ``NaN``.
+
+    Args:
+        grading_result (``otter.test_files.GradingResults``): the results of grading the submission
+
+    Returns:
+        ``dict[str, float]``: the resource usage columns
+    """
+    usage = getattr(grading_result, "resource_usage", None)
+    if usage is None:
+        return {k: math.nan for k in RESOURCE_USAGE_KEYS}
+
+    return {
+        SCORES_DICT_PEAK_MEMORY_KEY: round(usage.peak_rss / 2 ** 20, 1),
+        SCORES_DICT_CPU_TIME_KEY: round(usage.cpu_time, 2),
+        SCORES_DICT_CHILD_PROCESSES_KEY: usage.num_child_processes,
+    }
+
+
+def summarize_resource_usage(df: pd.DataFrame) -> Optional[str]:
+    """
+    Summarize the maximum and 95th percentile of each resource usage column of a scores dataframe.
+
+    Args:
+        df (``pd.DataFrame``): the scores dataframe
+
+    Returns:
+        ``str | None``: the summary, or ``None`` if no resource usage was recorded
+    """
+    df = df[df[SCORES_DICT_FILE_KEY] != POINTS_POSSIBLE_LABEL]
+
+    lines = []
+    for key in RESOURCE_USAGE_KEYS:
+        if key not in df.columns:
+            continue
+        values = pd.to_numeric(df[key], errors="coerce").dropna()
+        if len(values) == 0:
+            continue
+        lines.append(f"    {key}: max={values.max():g}, p95={values.quantile(0.95):g}")
+
+    if not lines:
+        return None
+
+    return "Resource usage across submissions:\n" + "\n".join(lines)
+
+
 def merge_scores_to_df(scores: List[GradingResults]) -> pd.DataFrame:  
     """  
     Convert a list of ``GradingResults`` objects to a scores dataframe, including a row  
@@ -95,6 +157,7 @@ def merge_scores_to_df(scores: List[GradingResults]) -> pd.DataFrame:
     pts_poss_dict[SCORES_DICT_FILE_KEY] = POINTS_POSSIBLE_LABEL
     pts_poss_dict[SCORES_DICT_PERCENT_CORRECT_KEY] = "NA"
     pts_poss_dict[SCORES_DICT_TOTAL_POINTS_KEY] = scores[0].possible
+    pts_poss_dict.update({k: "NA" for k in RESOURCE_USAGE_KEYS})
     pts_poss_df = pd.DataFrame(pts_poss_dict)
     full_df.append(pts_poss_df)
     for grading_result in scores:
@@ -103,6 +166,7 @@ def merge_scores_to_df(scores: List[GradingResults]) -> pd.DataFrame:
         scores_dict[SCORES_DICT_PERCENT_CORRECT_KEY] = round(grading_result.total / grading_result.possible, 4)
         scores_dict[SCORES_DICT_TOTAL_POINTS_KEY] = grading_result.total
         scores_dict[SCORES_DICT_FILE_KEY] = grading_result.file
+        scores_dict.update(get_resource_usage_dict(grading_result))
         df_scores = pd.DataFrame(scores_dict)
         full_df.append(df_scores)
     return full_df
@@ -1,9 +1,8 @@
 """A config definition for Otter's configurations stored in the notebook metadata"""
 
 import fica
-import nbformat as nbf
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, TYPE_CHECKING
 
 from .utils import NOTEBOOK_METADATA_KEY
 
@@ -62,8 +61,12 @@ class NBMetadataConfig(fica.Config):
         super().__init__(user_config, documentation_mode, require_valid_keys)
 
     @classmethod
-    def from_notebook(cls, nb: nbf.NotebookNode) -> "NBMetadataConfig":
+    def from_notebook(cls, nb: "nbf.NotebookNode") -> "NBMetadataConfig":
         """
         Create a :py:class:`NBMetadataConfig` from a notebook object.
         """
         return cls(nb.get("metadata", {}).get(NOTEBOOK_METADATA_KEY, {}))
+
+
+if TYPE_CHECKING:
+    import nbformat as nbf
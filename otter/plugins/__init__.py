@@ -4,8 +4,10 @@ Grading plugins for Otter
 
 import importlib
 
+from contextlib import contextmanager
+
 from .abstract_plugin import AbstractOtterPlugin, PluginEventNotSupportedException
-from ..utils import print_full_width
+from ..utils import locked_chdir, print_full_width
 
 
 class PluginCollection:
@@ -31,11 +33,17 @@ class PluginCollection:
             ]
         }
 
+    If ``working_dir`` is specified, the plugins' events are run with it as the working directory,
+    so that plugins can use paths relative to it. Changing the working directory affects the whole
+    process, so events of collections with a working directory are never run at the same time by
+    different threads.
+
     Args:
         plugin_names (``list[Union[str,dict[str:Any]]]``): the importable names of plugin classes (e.g. 
             ``some_package.SomePlugin``) and their configurations
         submission_path (``str``): the absolute path to the submission being graded
         submission_metadata (``dict[str:Any]``): submission metadata
+        working_dir (``str | None``): the working directory in which to run plugin events
     """
 
     @staticmethod
@@ -61,12 +69,13 @@ class PluginCollection:
 
         return result
 
-    def __init__(self, plugins, submission_path, submission_metadata):
+    def __init__(self, plugins, submission_path, submission_metadata, working_dir=None):
         self._plugin_config = self._parse_plugin_config(plugins)
         self._plugins = None
 
         self._subm_path = submission_path
         self._subm_meta = submission_metadata
+        self._working_dir = working_dir
 
         self._plugins = self._load_plugins(self._plugin_config, submission_path, submission_metadata)
 
@@ -105,6 +114,19 @@ class PluginCollection:
 
         return plugins
 
+    @contextmanager
+    def _event_context(self):
+        """
+        Create a context in which to run plugin events, which changes into ``self._working_dir`` if
+        it is specified.
+        """
+        if self._working_dir is None:
+            yield
+            return
+
+        with locked_chdir(self._working_dir):
+            yield
+
     def add_new_plugins(self, raw_plugin_config):
         """
         Add any new plugins specified in ``raw_plugin_config`` to this plugin collection. Any plugins
@@ -137,15 +159,16 @@ class PluginCollection:
             ``list[Any]``: the values returned by each plugin for the called event
         """
         rets = []
-        for plugin in self._plugins:
-            try:
-                if hasattr(plugin, event):
-                    ret = getattr(plugin, event)(*args, **kwargs)
-                    rets.append(ret)
-                else:
+        with self._event_context():
+            for plugin in self._plugins:
+                try:
+                    if hasattr(plugin, event):
+                        ret = getattr(plugin, event)(*args, **kwargs)
+                        rets.append(ret)
+                    else:
+                        rets.append(None)
+                except PluginEventNotSupportedException:
                     rets.append(None)
-            except PluginEventNotSupportedException:
-                rets.append(None)
         return rets
 
     def before_execution(self, submission):
@@ -157,12 +180,13 @@ class PluginCollection:
             submission (``Union[str,nbformat.NotebookNode]``): the submission to be executed
         """
         event = "before_execution"
-        for plugin in self._plugins:
-            try:
-                if hasattr(plugin, event):
-                    submission = getattr(plugin, event)(submission)
-            except PluginEventNotSupportedException:
-                pass
+        with self._event_context():
+            for plugin in self._plugins:
+                try:
+                    if hasattr(plugin, event):
+                        submission = getattr(plugin, event)(submission)
+                except PluginEventNotSupportedException:
+                    pass
         return submission
 
     def generate_report(self):
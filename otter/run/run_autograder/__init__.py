@@ -11,7 +11,7 @@ from .runners import create_runner
 from .utils import capture_run_output, OtterRuntimeError, print_output
 
 from ...version import LOGO_WITH_VERSION
-from ...utils import chdir, loggers, nullcontext, OTTER_CONFIG_FILENAME
+from ...utils import loggers, nullcontext, OTTER_CONFIG_FILENAME
 
 
 __all__ = ["capture_run_output", "main"]
@@ -44,6 +44,10 @@ def main(autograder_dir, otter_run=False, **kwargs):
     runner = create_runner(config, autograder_dir=autograder_dir, **kwargs)
     runner.ag_config._otter_run = otter_run
 
+    # the runner resolves all of its paths against the autograder directory instead of changing
+    # the working directory, so that several runs can happen at once in the same process
+    runner.ag_config.autograder_dir = os.path.abspath(runner.ag_config.autograder_dir)
+
     ctx = nullcontext()
     if runner.ag_config.log_level is not None:
         ctx = loggers.level_context(runner.ag_config.log_level)
@@ -58,42 +62,39 @@ def main(autograder_dir, otter_run=False, **kwargs):
             # incorrectly left-stripping the whitespace at the beginning of the logo
             print_output(f"{chr(8207)}\n", LOGO_WITH_VERSION, "\n", sep="")
 
-        abs_ag_path = os.path.abspath(runner.ag_config.autograder_dir)
-        with chdir(abs_ag_path):
-            try:
-                if runner.ag_config.zips:
-                    with chdir("./submission"):
-                        zips = glob("*.zip")
-                        if len(zips) > 1:
-                            raise OtterRuntimeError("More than one zip file found in submission and 'zips' config is true")
-
-                        with zipfile.ZipFile(zips[0])  as zf:
-                            zf.extractall()
-
-                runner.prepare_files()
-                scores = runner.run()
-                with open("results/results.pkl", "wb+") as f:
-                        dill.dump(scores, f)
-
-                output = scores.to_gradescope_dict(runner.ag_config)
-
-            except OtterRuntimeError as e:
-                output = {
-                    "score": 0,
-                    "stdout_visibility": "hidden",
-                    "tests": [
-                        {
-                            "name": "Autograder Error",
-                            "output": f"Otter encountered an error when grading this submission:\n\n{e}",
-                        },
-                    ],
-                }
-                raise e
-
-            finally:
-                if "output" in vars():
-                    with open("./results/results.json", "w+") as f:
-                        json.dump(output, f, indent=4)                
+        try:
+            if runner.ag_config.zips:
+                zips = glob(runner.get_path("submission", "*.zip"))
+                if len(zips) > 1:
+                    raise OtterRuntimeError("More than one zip file found in submission and 'zips' config is true")
+
+                with zipfile.ZipFile(zips[0])  as zf:
+                    zf.extractall(runner.get_path("submission"))
+
+            runner.prepare_files()
+            scores = runner.run()
+            with open(runner.get_path("results", "results.pkl"), "wb+") as f:
+                    dill.dump(scores, f)
+
+            output = scores.to_gradescope_dict(runner.ag_config)
+
+        except OtterRuntimeError as e:
+            output = {
+                "score": 0,
+                "stdout_visibility": "hidden",
+                "tests": [
+                    {
+                        "name": "Autograder Error",
+                        "output": f"Otter encountered an error when grading this submission:\n\n{e}",
+                    },
+                ],
+            }
+            raise e
+
+        finally:
+            if "output" in vars():
+                with open(runner.get_path("results", "results.json"), "w+") as f:
+                    json.dump(output, f, indent=4)                
 
         print_output("\n\n", end="")
 
@@ -170,5 +170,77 @@ class AutograderConfig(fica.Config):
         default=False,
     )
 
+    save_environment_snapshot = fica.Key(
+        description="whether to persist the global environment of the submission after it is " \
+            "executed so that it can be re-graded with tests_only",
+        default=False,
+    )
+
+    tests_only = fica.Key(
+        description="whether to run the tests against a persisted environment snapshot instead " \
+            "of executing the submission; if no snapshot is found, the submission is executed",
+        default=False,
+    )
+
+    include_timing_data = fica.Key(
+        description="whether to include the time taken to execute each cell and to run each test " \
+            "case in the extra_data field of the results",
+        default=False,
+    )
+
+    test_case_timeout = fica.Key(
+        description="the default number of seconds after which a test case is interrupted and " \
+            "failed; test cases can override this with their own timeouts",
+        default=None,
+    )
+
+    max_cell_output_size = fica.Key(
+        description="the maximum number of characters of output to keep from each cell of the " \
+            "executed submission; outputs past this limit are truncated",
+        default=None,
+    )
+
+    max_output_size = fica.Key(
+        description="the maximum number of characters of output to keep from the whole executed " \
+            "submission; outputs past this limit are truncated",
+        default=None,
+    )
+
+    discard_outputs = fica.Key(
+        description="whether to discard all outputs of the executed submission",
+        default=False,
+    )
+
+    abort_on_critical_error = fica.Key(
+        description="whether to stop executing the submission if a cell tagged otter_critical " \
+            "raises an error; tests that have not been run are failed",
+        default=False,
+    )
+
+    max_consecutive_errors = fica.Key(
+        description="if specified, the number of consecutive cells that must raise errors to " \
+            "stop executing the submission; tests that have not been run are failed",
+        default=None,
+    )
+
+    max_kernel_restarts = fica.Key(
+        description="the maximum number of times to restart the kernel and continue executing " \
+            "the submission if the kernel crashes",
+        default=0,
+    )
+
+    sample_resources = fica.Key(
+        description="whether to sample the peak memory, CPU time, and number of child processes " \
+            "used while executing the submission",
+        default=False,
+    )
+
+    test_workers = fica.Key(
+        description="if specified, the number of forked processes in which to run the tests after " \
+            "the submission is executed; each test file is run in its own process against a " \
+            "copy of the submission's environment",
+        default=None,
+    )
+
     _otter_run = False
     """whether this autograder run is being run by Otter Run (i.e. without containerization)"""
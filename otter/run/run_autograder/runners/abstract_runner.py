@@ -8,12 +8,14 @@ import tempfile
 
 from abc import ABC, abstractmethod
 from glob import glob
+from typing import Any, Optional, Tuple
 
 from ..autograder_config import AutograderConfig
 from ..utils import OtterRuntimeError, print_output, write_blank_page_to_stare_at_before_you
 
 from ....generate.token import APIClient
 from ....nbmeta_config import NBMetadataConfig
+from ....utils import load_notebook
 
 
 class AbstractLanguageRunner(ABC):
@@ -29,30 +31,68 @@ class AbstractLanguageRunner(ABC):
     ag_config: AutograderConfig
     """the autograder config"""
 
+    _loaded_notebook: Optional[Tuple[Tuple[Any, ...], Any]]
+    """the key and value of the last notebook loaded by ``load_notebook``"""
+
     def __init__(self, ag_config: AutograderConfig):
         self.ag_config = ag_config
+        self._loaded_notebook = None
+
+    def get_path(self, *parts):
+        """
+        Get the path of a file in the autograder directory.
+
+        Runners resolve paths with this method instead of relying on the working directory, which
+        is shared by every thread in the process.
+
+        Args:
+            *parts (``str``): the components of the path relative to the autograder directory
+
+        Returns:
+            ``str``: the path
+        """
+        return os.path.join(self.ag_config.autograder_dir, *parts)
+
+    def load_notebook(self, nb_path):
+        """
+        Load a notebook with ``otter.utils.load_notebook``, returning the already-parsed notebook
+        if the same file was the last one loaded and has not changed since.
+
+        The same ``NotebookNode`` is shared by all callers, so this should be used to pass the
+        submission between the steps of a single run, the last of which may modify it.
+
+        Args:
+            nb_path (``str``): the path to the notebook
+
+        Returns:
+            ``nbformat.NotebookNode``: the notebook
+        """
+        stat = os.stat(nb_path)
+        key = (os.path.abspath(nb_path), stat.st_mtime_ns, stat.st_size)
+        if self._loaded_notebook is None or self._loaded_notebook[0] != key:
+            self._loaded_notebook = (key, load_notebook(nb_path))
+        return self._loaded_notebook[1]
 
     def prepare_files(self):
         """
         Copies tests and support files needed for running the autograder.
-
-        When this method is invoked, the working directory is assumed to already be 
-        ``self.ag_config.autograder_dir``.
         """
+        files_dir, subm_dir = self.get_path("source", "files"), self.get_path("submission")
+
         # put files into submission directory
-        if os.path.exists("./source/files"):
-            for file in os.listdir("./source/files"):
-                fp = os.path.join("./source/files", file)
+        if os.path.exists(files_dir):
+            for file in os.listdir(files_dir):
+                fp = os.path.join(files_dir, file)
                 if os.path.isdir(fp):
-                    if not os.path.exists(os.path.join("./submission", os.path.basename(fp))):
-                        shutil.copytree(fp, os.path.join("./submission", os.path.basename(fp)))
+                    if not os.path.exists(os.path.join(subm_dir, os.path.basename(fp))):
+                        shutil.copytree(fp, os.path.join(subm_dir, os.path.basename(fp)))
                 else:
-                    shutil.copy(fp, "./submission")
+                    shutil.copy(fp, subm_dir)
 
         # copy the tests directory
-        if os.path.exists("./submission/tests"):
-            shutil.rmtree("./submission/tests")
-        shutil.copytree("./source/tests", "./submission/tests")
+        if os.path.exists(os.path.join(subm_dir, "tests")):
+            shutil.rmtree(os.path.join(subm_dir, "tests"))
+        shutil.copytree(self.get_path("source", "tests"), os.path.join(subm_dir, "tests"))
 
     def validate_assignment_name(self, got):
         """
@@ -107,7 +147,7 @@ class AbstractLanguageRunner(ABC):
             return None
 
         try:
-            subm_pdfs = glob("*.pdf")
+            subm_pdfs = glob(self.get_path("submission", "*.pdf"))
             if self.ag_config.use_submission_pdf and subm_pdfs:
                 pdf_path = subm_pdfs[0]
             else:
@@ -143,7 +183,7 @@ class AbstractLanguageRunner(ABC):
             pdf_path (``str``): path to the PDF file to upload
         """
         # get student email
-        with open("../submission_metadata.json", encoding="utf-8") as f:
+        with open(self.get_path("submission_metadata.json"), encoding="utf-8") as f:
             metadata = json.load(f)
 
         student_emails = []
@@ -175,15 +215,15 @@ class AbstractLanguageRunner(ABC):
         Sanitize any references to the PDF submission upload token to prevent unauthorized access
         when executing student code.
 
-        This method should be invokved from inside ``{self.ag_config.autograder_dir}/submission``
-        as part of ``run``.
+        This method should be invoked as part of ``run``.
         """
         self.ag_config.token = None
-        if not os.path.exists("../source/otter_config.json"): return
-        with open("../source/otter_config.json") as f:
+        config_path = self.get_path("source", "otter_config.json")
+        if not os.path.exists(config_path): return
+        with open(config_path) as f:
             c = json.load(f)
         if "token" in c: del c["token"]
-        with open("../source/otter_config.json", "w") as f:
+        with open(config_path, "w") as f:
             json.dump(c, f, indent=2)
 
     @abstractmethod
@@ -204,9 +244,6 @@ class AbstractLanguageRunner(ABC):
         """
         Determine the path to the submission file, performing any necessary transformations on the
         file.
-
-        When this method is invoked, the working directory is assumed to already be 
-        ``{self.ag_config.autograder_dir}/submission``.
         """
         ...
 
@@ -228,8 +265,7 @@ class AbstractLanguageRunner(ABC):
         """
         Run the autograder according to the configurations in ``self.ag_config``.
 
-        When this method is invoked, the working directory is assumed to already be 
-        ``self.ag_config.autograder_dir``.
+        Paths should be resolved with ``get_path`` rather than relative to the working directory.
 
         Returns:
             ``otter.test_files.GradingResults``: the results from grading the submission
@@ -1,7 +1,6 @@
 """Autograder runner for Python assignments"""
 
 import json
-import nbformat as nbf
 import os
 
 from glob import glob
@@ -13,9 +12,15 @@ from ..utils import OtterRuntimeError, print_output
 from ....check.logs import Log
 from ....check.notebook import _OTTER_LOG_FILENAME
 from ....execute import grade_notebook
+from ....execute.results_stream import RESULTS_STREAM_FILENAME
+from ....execute.snapshot import get_snapshot_path, grade_snapshot
 from ....export import export_notebook
 from ....plugins import PluginCollection
-from ....utils import chdir, print_full_width
+from ....utils import print_full_width
+
+
+SNAPSHOTS_DIR = "results/snapshots"
+"""the path, relative to the autograder directory, of the directory of environment snapshots"""
 
 
 class PythonRunner(AbstractLanguageRunner):
@@ -29,17 +34,17 @@ class PythonRunner(AbstractLanguageRunner):
         super().prepare_files()
 
         # create __init__.py files
-        open("__init__.py", "a").close()
-        open("submission/__init__.py", "a").close()
+        open(self.get_path("__init__.py"), "a").close()
+        open(self.get_path("submission", "__init__.py"), "a").close()
 
     def validate_submission(self, submission_path):
         if os.path.splitext(submission_path)[1] == ".ipynb":
-            nb = nbf.read(submission_path, as_version=nbf.NO_CONVERT)
+            nb = self.load_notebook(submission_path)
             assignment_name = self.get_notebook_assignment_name(nb)
             self.validate_assignment_name(assignment_name)
 
     def resolve_submission_path(self):
-        nbs = glob("*.ipynb")
+        nbs = glob(self.get_path("submission", "*.ipynb"))
 
         if len(nbs) > 1:
             raise OtterRuntimeError("More than one .ipynb file found in submission")
@@ -48,8 +53,8 @@ class PythonRunner(AbstractLanguageRunner):
             subm_path = nbs[0]
 
         else:
-            pys = glob("*.py")
-            pys = list(filter(lambda f: f != "__init__.py", pys))
+            pys = glob(self.get_path("submission", "*.py"))
+            pys = list(filter(lambda f: os.path.basename(f) != "__init__.py", pys))
             if len(pys) > 1:
                 raise OtterRuntimeError("More than one Python file found in submission")
 
@@ -65,62 +70,88 @@ class PythonRunner(AbstractLanguageRunner):
         pdf_path = os.path.splitext(nb_path)[0] + ".pdf"
         export_notebook(
             nb_path, dest=pdf_path, filtering=self.ag_config.filtering,
-            pagebreaks=self.ag_config.pagebreaks, exporter_type="latex")
+            pagebreaks=self.ag_config.pagebreaks, exporter_type="latex",
+            notebook=self.load_notebook(nb_path))
 
         return pdf_path
 
     def run(self):
         os.environ["PATH"] = f"{self.ag_config.miniconda_path}/bin:" + os.environ.get("PATH")
 
-        with chdir("./submission"):
+        subm_dir = self.get_path("submission")
 
-            subm_path = self.resolve_submission_path()
-            self.validate_submission(subm_path)
+        subm_path = self.resolve_submission_path()
+        self.validate_submission(subm_path)
 
-            # load plugins
-            plugins = self.ag_config.plugins
+        # load plugins
+        plugins = self.ag_config.plugins
 
-            if plugins:
-                with open("../submission_metadata.json", encoding="utf-8") as f:
-                    submission_metadata = json.load(f)
+        if plugins:
+            with open(self.get_path("submission_metadata.json"), encoding="utf-8") as f:
+                submission_metadata = json.load(f)
 
-                plugin_collection = PluginCollection(
-                    plugins, os.path.abspath(subm_path), submission_metadata)
+            # plugins are run in the submission directory, as they were when Otter Run changed into
+            # it
+            plugin_collection = PluginCollection(
+                plugins, os.path.abspath(subm_path), submission_metadata, working_dir=subm_dir)
 
-            else:
-                plugin_collection = None
+        else:
+            plugin_collection = None
 
-            if plugin_collection:
-                plugin_collection.run("before_grading", self.ag_config)
+        if plugin_collection:
+            plugin_collection.run("before_grading", self.ag_config)
 
-            pdf_error = None
-            if self.ag_config.token is not None or self.ag_config.pdf:
-                pdf_error = self.write_and_maybe_submit_pdf(subm_path)
+        pdf_error = None
+        if self.ag_config.token is not None or self.ag_config.pdf:
+            pdf_error = self.write_and_maybe_submit_pdf(subm_path)
 
-            self.sanitize_tokens()
+        self.sanitize_tokens()
 
-            if os.path.isfile(_OTTER_LOG_FILENAME):
-                try:
-                    log = Log.from_file(_OTTER_LOG_FILENAME, ascending=False)
+        log_path = os.path.join(subm_dir, _OTTER_LOG_FILENAME)
+        if os.path.isfile(log_path):
+            try:
+                log = Log.from_file(log_path, ascending=False)
 
-                except Exception as e:
-                    if self.ag_config.grade_from_log:
-                        raise e
+            except Exception as e:
+                if self.ag_config.grade_from_log:
+                    raise e
 
-                    else:
-                        print_output(f"Could not deserialize the log due to an error:\n{e}")
-                        log = None
+                else:
+                    print_output(f"Could not deserialize the log due to an error:\n{e}")
+                    log = None
 
-            else:
-                if self.ag_config.grade_from_log:
-                    raise OtterRuntimeError("Grade from log indicated but log not found")
+        else:
+            if self.ag_config.grade_from_log:
+                raise OtterRuntimeError("Grade from log indicated but log not found")
+
+            log = None
 
-                log = None
+        tests_glob = glob(os.path.join(subm_dir, "tests", "*.py"))
 
+        snapshot_dir = self.get_path(SNAPSHOTS_DIR)
+        snapshot_path = get_snapshot_path(snapshot_dir, subm_path)
+        if self.ag_config.tests_only and os.path.isfile(snapshot_path):
+            scores = grade_snapshot(
+                snapshot_path,
+                tests_glob = tests_glob,
+                plugin_collection = plugin_collection,
+                test_case_timeout = self.ag_config.test_case_timeout,
+                cwd = subm_dir,
+            )
+
+        else:
+            if self.ag_config.tests_only:
+                print_output(
+                    "No environment snapshot found for this submission; executing it instead")
+
+            is_script = os.path.splitext(subm_path)[1] == ".py"
             scores = grade_notebook(
                 subm_path,
-                tests_glob = glob("./tests/*.py"),
-                cwd = os.getcwd(),
+                notebook = None if is_script else self.load_notebook(subm_path),
+                # the kernel is started in the submission directory, so the paths of the tests are
+                # given relative to it
+                tests_glob = [os.path.relpath(tp, subm_dir) for tp in tests_glob],
+                cwd = subm_dir,
                 test_dir = "./tests",
                 ignore_errors = not self.ag_config.debug,
                 seed = self.ag_config.seed,
@@ -128,36 +159,51 @@ class PythonRunner(AbstractLanguageRunner):
                 log = log if self.ag_config.grade_from_log else None,
                 variables = self.ag_config.serialized_variables,
                 plugin_collection = plugin_collection,
-                script = os.path.splitext(subm_path)[1] == ".py",
+                script = is_script,
                 force_python3_kernel = not self.ag_config._otter_run,
+                snapshot_dir = snapshot_dir if self.ag_config.save_environment_snapshot else None,
+                test_workers = self.ag_config.test_workers,
+                sample_resources = self.ag_config.sample_resources,
+                test_case_timeout = self.ag_config.test_case_timeout,
+                # the PDF has already been generated from the submission file
+                slim = True,
+                max_cell_output_size = self.ag_config.max_cell_output_size,
+                max_output_size = self.ag_config.max_output_size,
+                discard_outputs = self.ag_config.discard_outputs,
+                abort_on_critical_error = self.ag_config.abort_on_critical_error,
+                max_consecutive_errors = self.ag_config.max_consecutive_errors,
+                max_kernel_restarts = self.ag_config.max_kernel_restarts,
+                # kept in the results directory so that partial results can be recovered if the
+                # grading container is killed
+                results_stream_path = self.get_path("results", RESULTS_STREAM_FILENAME),
             )
 
-            if pdf_error: scores.set_pdf_error(pdf_error)
-
-            # verify the scores against the log
-            if self.ag_config.print_summary:
-                print_output("\n\n\n\n", end="")
-                s = print_full_width("-", mid_text="GRADING SUMMARY", ret_str=True)
-                print_output(s)
-                print_output()
-                if log is not None:
-                    try:
-                        discrepancies = scores.verify_against_log(log)
-                        if self.ag_config.print_summary:
-                            if not discrepancies:
-                                print_output("No discrepancies found while verifying scores against the log.")
-                            else:
-                                for d in discrepancies: print_output(d)
-
-                    except BaseException as e:
-                        print_output(f"Error encountered while trying to verify scores with log:\n{e}")
+        if pdf_error: scores.set_pdf_error(pdf_error)
 
-                else:
-                    print_output("No log found with which to verify student scores.")
+        # verify the scores against the log
+        if self.ag_config.print_summary:
+            print_output("\n\n\n\n", end="")
+            s = print_full_width("-", mid_text="GRADING SUMMARY", ret_str=True)
+            print_output(s)
+            print_output()
+            if log is not None:
+                try:
+                    discrepancies = scores.verify_against_log(log)
+                    if self.ag_config.print_summary:
+                        if not discrepancies:
+                            print_output("No discrepancies found while verifying scores against the log.")
+                        else:
+                            for d in discrepancies: print_output(d)
+
+                except BaseException as e:
+                    print_output(f"Error encountered while trying to verify scores with log:\n{e}")
+
+            else:
+                print_output("No log found with which to verify student scores.")
 
-            if plugin_collection:
-                report = plugin_collection.generate_report()
-                if report.strip():
-                    print_output("\n\n" + report)
+        if plugin_collection:
+            report = plugin_collection.generate_report()
+            if report.strip():
+                print_output("\n\n" + report)
 
         return scores
@@ -1,7 +1,6 @@
 """Autograder runner for R assignments"""
 
 import copy
-import nbformat as nbf
 import os
 import re
 import tempfile
@@ -17,7 +16,7 @@ from ..utils import OtterRuntimeError
 
 from ....export import export_notebook
 from ....test_files import GradingResults
-from ....utils import chdir, get_source, knit_rmd_file, NBFORMAT_VERSION
+from ....utils import chdir, get_source, knit_rmd_file
 
 
 R_PACKAGES = {
@@ -37,7 +36,7 @@ class RRunner(AbstractLanguageRunner):
         assignment_name = False
         ext = os.path.splitext(submission_path)[1].lower()
         if ext == ".ipynb":
-            nb = nbf.read(submission_path, as_version=nbf.NO_CONVERT)
+            nb = self.load_notebook(submission_path)
             assignment_name = self.get_notebook_assignment_name(nb)
 
         elif ext == ".rmd":
@@ -114,7 +113,7 @@ class RRunner(AbstractLanguageRunner):
         elif len(nbs) == 1:
             nb_path = nbs[0]
             self.validate_submission(nb_path)
-            nb = nbf.read(nb_path, as_version=NBFORMAT_VERSION)
+            nb = self.load_notebook(nb_path)
             nb = self.filter_cells_with_syntax_errors(nb)
 
             # create the R script
@@ -196,7 +195,9 @@ class RRunner(AbstractLanguageRunner):
     def run(self):
         os.environ["PATH"] = f"{self.ag_config.miniconda_path}/bin:" + os.environ.get("PATH")
 
-        with chdir("./submission"):
+        # R code is run in this process by rpy2, so the submission directory must be the working
+        # directory; the R runner therefore cannot run concurrently with other runs
+        with chdir(self.get_path("submission")):
             pdf_error = None
             if self.ag_config.token is not None or self.ag_config.pdf:
                 pdf_error = self.write_and_maybe_submit_pdf(None)
@@ -1,11 +1,12 @@
 """Utilities for Otter Run"""
 
 from contextlib import contextmanager
+from contextvars import ContextVar
 from io import StringIO
 from typing import Optional
 
 
-_OUTPUT: Optional[StringIO] = None
+_OUTPUT: ContextVar[Optional[StringIO]] = ContextVar("run_output", default=None)
 """a StringIO object to write output to instead of stdout when it is being captured"""
 
 
@@ -35,13 +36,18 @@ def capture_run_output() -> StringIO:
     A context manager for capturing anything that Otter Run would normally print to stdout. Yields
     an ``io.StringIO`` object that the output will be written to.
 
+    Output is only captured in the current thread or ``asyncio`` task, so concurrent runs in the
+    same process each capture their own output.
+
     Yields:
         ``io.StringIO``: where the output will be written to
     """
-    global _OUTPUT
-    _OUTPUT = StringIO()
-    yield _OUTPUT
-    _OUTPUT = None
+    output = StringIO()
+    token = _OUTPUT.set(output)
+    try:
+        yield output
+    finally:
+        _OUTPUT.reset(token)
 
 
 def print_output(*args, **kwargs):
@@ -50,4 +56,4 @@ def print_output(*args, **kwargs):
     ``io.StringIO`` object it is being captured to, otherwise it prints to stdout. All arguments are
     passed to ``print``.
     """
-    print(*args, **kwargs, file=_OUTPUT)
+    print(*args, **kwargs, file=_OUTPUT.get())
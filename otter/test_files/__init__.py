@@ -1,15 +1,17 @@
 """Classes for working with test files and test results"""
 
+import hashlib
 import json
 import math
-import nbformat as nbf
 import os
+import pathlib
 import pickle
 
-from typing import Any, Dict, List, Optional
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
 
 from .abstract_test import TestCase, TestCaseResult, TestFile
-from .exception_test import ExceptionTestFile, test_case
+from .exception_test import ExceptionTestFile, fixture, parametrized_test_case, test_case
 from .metadata_test import NotebookMetadataExceptionTestFile, NotebookMetadataOKTestFile
 from .ok_test import OKTestFile
 from .ottr_test import OttrTestFile
@@ -19,14 +21,62 @@ from ..utils import format_exception, QuestionNotInLogException
 
 
 __all__ = [
+    "clear_test_file_cache",
     "create_test_file",
+    "fixture",
     "GradingResults",
+    "parametrized_test_case",
     "test_case",
     "TestCase",
     "TestFile",
 ]
 
 
+_TEST_FILE_CACHE: Dict[Tuple[Any, ...], TestFile] = {}
+"""parsed test files keyed by their path and modification time and size or contents hash"""
+
+
+def _parse_test_file(path: str) -> TestFile:
+    """
+    Read, compile, and execute a test file once and parse the resulting global environment into the
+    correct ``TestFile`` subclass.
+
+    Args:
+        path (``str``): the path to the test file
+
+    Returns:
+        ``TestFile``: the parsed test file
+
+    Raises:
+        ``RuntimeError``: if the test file does not define the ``OK_FORMAT`` global variable
+    """
+    with open(path) as f:
+        source = f.read()
+
+    code = compile(source, path, "exec")
+    env = {}
+    exec(code, env)
+
+    if OK_FORMAT_VARNAME not in env:
+        raise RuntimeError(
+            f"Malformed test file: does not define the global variable '{OK_FORMAT_VARNAME}'")
+
+    if env[OK_FORMAT_VARNAME]:
+        return OKTestFile.from_spec(env["test"], path=path)
+
+    test_file = ExceptionTestFile._from_env(env, path=path)
+    test_file.source = source
+    test_file._code = code
+    return test_file
+
+
+def clear_test_file_cache():
+    """
+    Remove all parsed test files from the cache used by ``create_test_file``.
+    """
+    _TEST_FILE_CACHE.clear()
+
+
 def create_test_file(
     path: str,
     nbmeta_config: NBMetadataConfig,
@@ -38,6 +88,15 @@ def create_test_file(
     If ``path`` is not a notebook, the file is executed as a Python script and a global variable is
     used to determine whether the test is OK-formatted or not.
 
+    Parsed test files are cached for the lifetime of the process, keyed by the path and the
+    modification time and size of the file (or the hash of the test's contents for notebook metadata
+    tests), so each test file is only read and compiled once. Each call returns a new ``TestFile``
+    without any results (see ``TestFile.copy_without_results``): OK-formatted test files share their
+    parsed test cases, and exception-based test files are executed again so that each copy has its
+    own global environment. Module-level state of an exception-based test file is therefore not
+    shared between the submissions graded in a process; values that should be computed once and
+    shared can be defined with ``fixture``.
+
     Args:
         path (``str``): the path to the test file or notebook
         test_name (``str``, optional): the name of the test in the notebook metadata, if ``path`` is
@@ -54,26 +113,34 @@ def create_test_file(
         if test_name is None:
             raise ValueError("You must specify a test name when using notebook metadata tests")
 
-        if nbmeta_config.ok_format:
-            return NotebookMetadataOKTestFile.from_nbmeta_config(path, nbmeta_config, test_name)
-
+        spec = (nbmeta_config.tests or {}).get(test_name)
+        if spec is None:
+            # let from_nbmeta_config raise the error for the missing test
+            key = None
         else:
-            return NotebookMetadataExceptionTestFile.from_nbmeta_config(
-                path, nbmeta_config, test_name)
+            spec_hash = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+            key = (os.path.abspath(path), test_name, nbmeta_config.ok_format, spec_hash)
 
-    env = {}
-    with open(path) as f:
-        exec(f.read(), env)
+        if key not in _TEST_FILE_CACHE:
+            if nbmeta_config.ok_format:
+                test_file = NotebookMetadataOKTestFile.from_nbmeta_config(
+                    path, nbmeta_config, test_name)
 
-    if OK_FORMAT_VARNAME not in env:
-        raise RuntimeError(
-            f"Malformed test file: does not define the global variable '{OK_FORMAT_VARNAME}'")
+            else:
+                test_file = NotebookMetadataExceptionTestFile.from_nbmeta_config(
+                    path, nbmeta_config, test_name)
 
-    if env[OK_FORMAT_VARNAME]:
-        return OKTestFile.from_file(path)
+            _TEST_FILE_CACHE[key] = test_file
 
     else:
-        return ExceptionTestFile.from_file(path)
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        if key not in _TEST_FILE_CACHE:
+            _TEST_FILE_CACHE[key] = _parse_test_file(path)
+
+    test_file = _TEST_FILE_CACHE[key].copy_without_results()
+    test_file.path = str(pathlib.Path(path).as_posix())
+    return test_file
 
 
 class GradingResults:
@@ -104,18 +171,37 @@ class GradingResults:
     the Gradescope results
     """
 
-    notebook: Optional[nbf.NotebookNode]
+    notebook: Optional["nbf.NotebookNode"]
     """the executed notebook with outputs that gave these results"""
 
+    cell_timings: List["CellTiming"]
+    """the time taken to execute each of the submission's code cells"""
+
+    resource_usage: Optional["ResourceUsage"]
+    """the resources used by the kernel that executed the submission, if they were sampled"""
+
+    termination_error: Optional[Exception]
+    """
+    the error that ended grading before all tests were run, if these results were recovered from
+    the tests that were run before it; see ``otter.execute.results_stream``
+    """
+
+    kernel_crashes: List["KernelCrash"]
+    """the crashes of the kernel that were recovered from by restarting it while grading"""
+
     _plugin_data: Dict[str, Any]
     """data requested to be stored in the results by plugins"""
 
-    def __init__(self, test_files: List[TestFile], notebook: Optional[nbf.NotebookNode] = None):
+    def __init__(self, test_files: List[TestFile], notebook: Optional["nbf.NotebookNode"] = None):
         self.results = {tf.name: tf for tf in test_files}
         self.output = None
         self.all_hidden = False
         self.pdf_error = None
         self.notebook = notebook
+        self.cell_timings = []
+        self.resource_usage = None
+        self.termination_error = None
+        self.kernel_crashes = []
         self._catastrophic_error = None
         self._plugin_data = {}
 
@@ -338,7 +424,7 @@ class GradingResults:
                     for test_case_result in test_file.test_case_results
                     if not test_case_result.test_case.hidden
                 ]
-                score = sum(tcr.test_case.points for tcr in tcrs if tcr.passed)
+                score = sum(tcr.points_earned for tcr in tcrs)
             else:
                 score = test_file.score
             try:
@@ -371,6 +457,28 @@ class GradingResults:
         """
         return {tn: tf.to_dict() for tn, tf in self.results.items()}
 
+    def get_timing_data(self):
+        """
+        Collect the time taken to execute each of the submission's cells and to run each test case
+        into a JSON-serializable ``dict``.
+
+        Returns:
+            ``dict[str, object]``: the timing data, with the cell timings under the key ``cells``
+            and the test case timings of each test file under the key ``tests``
+        """
+        return {
+            "cells": [asdict(ct) for ct in self.cell_timings],
+            "tests": {
+                tn: [
+                    {
+                        "name": tcr.test_case.name,
+                        "wall_time": tcr.wall_time,
+                        "cpu_time": tcr.cpu_time,
+                    } for tcr in tf.test_case_results
+                ] for tn, tf in self.results.items()
+            },
+        }
+
     def summary(self, public_only=False):
         """
         Generate a summary of these results and return it as a string.
@@ -466,6 +574,9 @@ class GradingResults:
         if ag_config.show_stdout:
             output["stdout_visibility"] = "after_published"
 
+        if ag_config.include_timing_data:
+            output["extra_data"] = {"timing": self.get_timing_data()}
+
         if ag_config.points_possible is not None:
             try:
                 output["score"] = self.total / self.possible * ag_config.points_possible
@@ -490,3 +601,11 @@ class GradingResults:
             output["stdout_visibility"] = "hidden"
 
         return output
+
+
+if TYPE_CHECKING:
+    import nbformat as nbf
+
+    from ..execute.recovery import KernelCrash
+    from ..execute.resources import ResourceUsage
+    from ..execute.timing import CellTiming
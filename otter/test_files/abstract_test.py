@@ -1,13 +1,24 @@
 """Abstract test objects for providing a schema to write and parse test cases"""
 
+import copy
 import random
+import signal
+import sys
+import threading
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import asdict, dataclass, replace
 from textwrap import indent
 from typing import List, Optional, Union
 
 
+CACHED_RESULT_MESSAGE = "(cached: the variables used by this test have not changed since it was " \
+    "last run)"
+"""the note added to the output of results that were reused from an earlier check"""
+
+
 @dataclass
 class TestCase:
     """
@@ -32,6 +43,9 @@ class TestCase:
     failure_message: Optional[str]
     """a message to show to students if this test cases fails"""
 
+    timeout: Optional[Union[int, float]] = None
+    """the number of seconds after which this test case is interrupted and failed"""
+
 
 @dataclass
 class TestCaseResult:
@@ -48,6 +62,144 @@ class TestCaseResult:
     passed: bool
     """whether the test case was passed"""
 
+    wall_time: Optional[float] = None
+    """the wall time taken to run the test case, in seconds"""
+
+    cpu_time: Optional[float] = None
+    """the CPU time taken to run the test case, in seconds"""
+
+    partial_credit: Optional[float] = None
+    """the fraction of the test case's points earned if it failed but its points are prorated"""
+
+    @property
+    def points_earned(self) -> Union[int, float]:
+        """
+        the number of points earned for this test case
+        """
+        if self.passed:
+            return self.test_case.points
+        if self.partial_credit is not None:
+            return self.test_case.points * self.partial_credit
+        return 0
+
+
+class TestCaseTimeoutError(BaseException):
+    """
+    An exception raised in a test case that has exceeded its timeout.
+
+    This exception inherits from ``BaseException`` so that it is not caught by ``except Exception``
+    clauses in the code under test.
+    """
+
+
+class _TimeLimit:
+    """
+    The state of a time limit set by ``time_limit``.
+    """
+
+    timed_out: bool = False
+    """whether the time limit was exceeded"""
+
+
+def _ignore_calls(frame, event, arg):
+    """
+    A global trace function that does not trace new frames; setting it enables the trace functions
+    of existing frames.
+    """
+    return None
+
+
+@contextmanager
+def time_limit(
+    seconds: Optional[Union[int, float]],
+    repeat: bool = True,
+    repeat_delay: Union[int, float] = 0,
+):
+    """
+    A context manager that raises a ``TestCaseTimeoutError`` in the code it wraps once ``seconds``
+    seconds have elapsed.
+
+    If ``repeat`` is true, the error is raised again every tenth of a second, starting
+    ``repeat_delay`` seconds after the time limit is first exceeded, until the context exits, so
+    that code which catches the error (e.g. a bare ``except`` in the code under test) cannot keep
+    running. Because a repeated error can also land inside the ``try`` block that catches it, the
+    frames running when it is raised are traced as well, and the error is raised again from the
+    first line that is run while it is being handled. (Python stops tracing when a trace function
+    raises an error, so code with nested handlers that each catch the error may only be stopped by
+    a later repetition.) The repeated errors can interrupt ``finally``
+    blocks, so code that must clean up after itself (e.g. ``doctest``, which patches
+    ``sys.stdout``) should stop on the first error and use a ``repeat_delay`` long enough to do so,
+    leaving the repeated errors as a backstop. Time limits use ``SIGALRM`` and are only enforced in
+    the main thread on platforms that support it; otherwise, or if ``seconds`` is ``None``, the
+    wrapped code runs without a limit.
+
+    Args:
+        seconds (``int | float | None``): the time limit in seconds
+        repeat (``bool``): whether to keep raising the error until the context exits
+        repeat_delay (``int | float``): the number of seconds after the first error at which to
+            start raising it repeatedly
+
+    Yields:
+        ``_TimeLimit``: an object whose ``timed_out`` attribute indicates whether the limit was
+        exceeded
+    """
+    limit = _TimeLimit()
+    if not seconds or not hasattr(signal, "setitimer") or \
+            threading.current_thread() is not threading.main_thread():
+        yield limit
+        return
+
+    exited = False
+    old_trace, traced_frames = sys.gettrace(), {}
+
+    def reraise_caught(frame, event, arg):
+        if event == "line" and not exited and isinstance(sys.exc_info()[1], TestCaseTimeoutError):
+            raise sys.exc_info()[1]
+        return reraise_caught
+
+    def trace_frames(frame):
+        # an error raised by a trace function unsets the global trace function, so it is set again
+        # each time the error is repeated
+        sys.settrace(_ignore_calls)
+        while frame is not None:
+            if frame not in traced_frames:
+                traced_frames[frame] = frame.f_trace, frame.f_trace_lines
+            frame.f_trace, frame.f_trace_lines = reraise_caught, True
+            frame = frame.f_back
+
+    def handle_alarm(signum, frame):
+        if exited:
+            return
+        if limit.timed_out:
+            trace_frames(frame)
+        elif repeat and repeat_delay:
+            signal.setitimer(signal.ITIMER_REAL, repeat_delay, 0.1)
+        limit.timed_out = True
+        raise TestCaseTimeoutError(f"Test case timed out after {seconds} seconds")
+
+    old_handler = signal.signal(signal.SIGALRM, handle_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds, 0.1 if repeat and not repeat_delay else 0)
+    try:
+        yield limit
+    finally:
+        exited = True
+        # the alarm may go off again before the timer is cleared, so retry until it is
+        while True:
+            try:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                break
+            except TestCaseTimeoutError:
+                pass
+        signal.signal(signal.SIGALRM, old_handler)
+        if traced_frames:
+            sys.settrace(old_trace)
+            for frame, (f_trace, f_trace_lines) in traced_frames.items():
+                frame.f_trace, frame.f_trace_lines = f_trace, f_trace_lines
+
+
+_DEFAULT_TIMEOUT: ContextVar[Optional[Union[int, float]]] = ContextVar("default_timeout")
+"""an override for ``TestFile.default_timeout`` set by ``TestFile.default_timeout_context``"""
+
 
 class TestFile(ABC):
     """
@@ -80,16 +232,19 @@ class TestFile(ABC):
     _score: Optional[Union[int, float]]
     """an override for the overall score for this test file"""
 
+    default_timeout: Optional[Union[int, float]] = None
+    """the timeout, in seconds, for test cases that do not specify their own"""
+
+    from_cache: bool = False
+    """whether these results were reused from an earlier check by a ``CheckCache``"""
+
     def _repr_html_(self):
         if self.passed_all:
             all_passed_emoji = random.choice(['🍀', '🎉', '🌈', '🙌', '🚀', '🌟', '✨', '💯'])
-            if any(tcr.test_case.success_message is not None for tcr in self.test_case_results):
-                ret = f"<p><strong><pre style='display: inline;'>{self.name}</pre></strong> passed! {all_passed_emoji}</p>"
-                for tcr in self.test_case_results:
-                    if tcr.test_case.success_message is not None:
-                        ret += f"<p><strong><pre style='display: inline;'>{tcr.test_case.name}</pre> message:</strong> {tcr.test_case.success_message}</p>"
-                return ret
-            return f"<p><strong><pre style='display: inline;'>{self.name}</pre></strong> passed! {all_passed_emoji}</p>"
+            ret = f"<p><strong><pre style='display: inline;'>{self.name}</pre></strong> passed! {all_passed_emoji}</p>"
+            for tcr in self.test_case_results:
+                if tcr.test_case.success_message is not None:
+                    ret += f"<p><strong><pre style='display: inline;'>{tcr.test_case.name}</pre> message:</strong> {tcr.test_case.success_message}</p>"
         else:
             ret = f"<p><strong style='color: red;'><pre style='display: inline;'>{self.name}</pre> results:</strong></p>"
             for tcr in self.test_case_results:
@@ -100,10 +255,16 @@ class TestFile(ABC):
                 ret += f"<p><strong><pre style='display: inline;'>{tcr.test_case.name}</pre> result:</strong></p>"
                 ret += f"<pre>{indent(tcr.message, '    ')}</pre>"
 
-            return ret
+        if self.from_cache:
+            ret += f"<p><em>{CACHED_RESULT_MESSAGE}</em></p>"
+
+        return ret
 
     def __repr__(self):
-        return self.summary()
+        ret = self.summary()
+        if self.from_cache:
+            ret += f"\n\n{CACHED_RESULT_MESSAGE}"
+        return ret
 
     def __init__(self, name, path, test_cases, all_or_nothing=True):
         self.name = name
@@ -113,6 +274,64 @@ class TestFile(ABC):
         self.test_case_results = []
         self._score = None
 
+    def copy_without_results(self):
+        """
+        Create a copy of this test file that shares its parsed test cases but has no results.
+
+        Returns:
+            ``TestFile``: the copy
+        """
+        instc = copy.copy(self)
+        instc.test_cases = list(self.test_cases)
+        instc.test_case_results = []
+        instc._score = None
+        return instc
+
+    @classmethod
+    def get_timeout(cls, test_case: TestCase) -> Optional[Union[int, float]]:
+        """
+        Get the number of seconds after which a test case should be interrupted and failed.
+
+        Args:
+            test_case (``TestCase``): the test case
+
+        Returns:
+            ``int | float | None``: the test case's timeout, or ``TestFile.default_timeout`` if it
+            does not have one
+        """
+        if test_case.timeout is not None:
+            return test_case.timeout
+        return _DEFAULT_TIMEOUT.get(TestFile.default_timeout)
+
+    @staticmethod
+    @contextmanager
+    def default_timeout_context(timeout: Optional[Union[int, float]]):
+        """
+        Override ``TestFile.default_timeout`` in a context. Unlike setting the class attribute, the
+        override only applies to the current thread or ``asyncio`` task.
+
+        Args:
+            timeout (``int | float | None``): the default timeout in the context
+        """
+        token = _DEFAULT_TIMEOUT.set(timeout)
+        try:
+            yield
+        finally:
+            _DEFAULT_TIMEOUT.reset(token)
+
+    @staticmethod
+    def get_timeout_message(timeout: Union[int, float]) -> str:
+        """
+        Get the message for a test case that exceeded its timeout.
+
+        Args:
+            timeout (``int | float``): the timeout in seconds
+
+        Returns:
+            ``str``: the failure message
+        """
+        return f"❌ Test case failed\nTest case timed out after {timeout} seconds"
+
     @staticmethod
     def resolve_test_file_points(total_points, test_cases):
         if isinstance(total_points, list):
@@ -181,14 +400,14 @@ class TestFile(ABC):
         elif self.all_or_nothing and self.passed_all:
             return 1
         else:
-            return sum(tcr.test_case.points for tcr in self.test_case_results if tcr.passed) / \
+            return sum(tcr.points_earned for tcr in self.test_case_results) / \
                 sum(tc.points for tc in self.test_cases)
 
     @property
     def score(self):
         if self._score is not None:
             return self._score
-        return sum(tcr.test_case.points for tcr in self.test_case_results if tcr.passed)
+        return sum(tcr.points_earned for tcr in self.test_case_results)
 
     @property
     def possible(self):
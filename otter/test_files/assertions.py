@@ -0,0 +1,301 @@
+"""Vectorized assertion helpers for comparing arrays, Series, and DataFrames in test files"""
+
+import numpy as np
+import pandas as pd
+
+from typing import Any, Optional, Sequence
+
+
+__all__ = [
+    "assert_array_close",
+    "assert_frame_close",
+    "assert_series_close",
+]
+
+
+def _format_value(value: Any) -> str:
+    """
+    Format a single value for a failure message, truncating long representations.
+    """
+    s = repr(value.item() if isinstance(value, np.generic) else value)
+    return s if len(s) <= 40 else s[:37] + "..."
+
+
+def _is_numeric(arr: np.ndarray) -> bool:
+    """
+    Determine whether an array can be compared with a numeric tolerance.
+    """
+    return np.issubdtype(arr.dtype, np.number) or np.issubdtype(arr.dtype, np.bool_)
+
+
+def _find_mismatches(
+    actual: np.ndarray,
+    expected: np.ndarray,
+    rtol: float,
+    atol: float,
+    equal_nan: bool,
+) -> np.ndarray:
+    """
+    Return a boolean mask of the elements of two arrays of the same shape that are not equal within
+    the tolerance. Non-numeric arrays are compared with ``==``.
+    """
+    if _is_numeric(actual) and _is_numeric(expected):
+        if np.issubdtype(actual.dtype, np.bool_) and np.issubdtype(expected.dtype, np.bool_):
+            return actual != expected
+        return ~np.isclose(actual, expected, rtol=rtol, atol=atol, equal_nan=equal_nan)
+
+    mismatches = np.asarray(actual != expected, dtype=bool)
+    if equal_nan:
+        mismatches &= ~(pd.isna(actual) & pd.isna(expected))
+    return mismatches
+
+
+def _summarize_mismatches(
+    header: str,
+    mismatches: np.ndarray,
+    actual: np.ndarray,
+    expected: np.ndarray,
+    labels: Optional[Sequence[Any]],
+    max_reported: int,
+) -> Optional[str]:
+    """
+    Create a compact summary of the mismatched elements of two arrays, or return ``None`` if there
+    are none. Only the first ``max_reported`` mismatches are listed.
+    """
+    n_mismatched = int(np.count_nonzero(mismatches))
+    if n_mismatched == 0:
+        return None
+
+    lines = [
+        f"{header}: {n_mismatched} of {mismatches.size} elements differ " \
+            f"({n_mismatched / mismatches.size:.4%})",
+        f"First {min(n_mismatched, max_reported)} mismatches:",
+    ]
+
+    # only find the positions of the mismatches that are reported
+    for flat_idx in np.flatnonzero(mismatches)[:max_reported]:
+        if labels is not None:
+            position = _format_value(labels[flat_idx])
+        elif mismatches.ndim == 1:
+            position = str(flat_idx)
+        else:
+            position = str(tuple(int(i) for i in np.unravel_index(flat_idx, mismatches.shape)))
+
+        lines.append(
+            f"    at {position}: actual {_format_value(actual.flat[flat_idx])}, " \
+                f"expected {_format_value(expected.flat[flat_idx])}")
+
+    return "\n".join(lines)
+
+
+def assert_array_close(
+    actual: Any,
+    expected: Any,
+    *,
+    rtol: float = 1e-7,
+    atol: float = 0,
+    equal_nan: bool = True,
+    check_dtype: bool = False,
+    max_reported: int = 5,
+):
+    """
+    Assert that two arrays are equal element-wise within a tolerance.
+
+    Shapes (and, if ``check_dtype`` is true, dtypes) are checked before any elements are compared.
+    Numeric arrays are compared with ``numpy.isclose``; all other arrays are compared with ``==``.
+    If the arrays differ, the ``AssertionError`` contains the number of mismatched elements and the
+    first ``max_reported`` mismatches rather than the full arrays.
+
+    Args:
+        actual (array-like): the array to check
+        expected (array-like): the expected array
+        rtol (``float``): the relative tolerance
+        atol (``float``): the absolute tolerance
+        equal_nan (``bool``): whether ``NaN`` values in the same position are considered equal
+        check_dtype (``bool``): whether the dtypes of the arrays must be the same
+        max_reported (``int``): the maximum number of mismatches to include in the error message
+
+    Raises:
+        ``AssertionError``: if the arrays are not equal
+    """
+    actual, expected = np.asarray(actual), np.asarray(expected)
+
+    if actual.shape != expected.shape:
+        raise AssertionError(f"Shape mismatch: actual {actual.shape}, expected {expected.shape}")
+
+    if check_dtype and actual.dtype != expected.dtype:
+        raise AssertionError(f"Dtype mismatch: actual {actual.dtype}, expected {expected.dtype}")
+
+    message = _summarize_mismatches(
+        f"Arrays are not close (rtol={rtol}, atol={atol})",
+        _find_mismatches(actual, expected, rtol, atol, equal_nan),
+        actual,
+        expected,
+        None,
+        max_reported,
+    )
+    if message is not None:
+        raise AssertionError(message)
+
+
+def _check_index(kind: str, actual: pd.Index, expected: pd.Index, max_reported: int):
+    """
+    Assert that two indices are equal, raising an ``AssertionError`` with a compact message if not.
+    """
+    if len(actual) != len(expected):
+        raise AssertionError(f"{kind} length mismatch: actual {len(actual)}, expected {len(expected)}")
+
+    if not actual.equals(expected):
+        message = _summarize_mismatches(
+            f"{kind} mismatch",
+            _find_mismatches(
+                np.asarray(actual, dtype=object), np.asarray(expected, dtype=object), 0, 0, True),
+            np.asarray(actual, dtype=object),
+            np.asarray(expected, dtype=object),
+            None,
+            max_reported,
+        )
+        raise AssertionError(message or f"{kind} mismatch")
+
+
+def assert_series_close(
+    actual: pd.Series,
+    expected: pd.Series,
+    *,
+    rtol: float = 1e-7,
+    atol: float = 0,
+    equal_nan: bool = True,
+    check_dtype: bool = False,
+    check_index: bool = True,
+    check_name: bool = False,
+    max_reported: int = 5,
+):
+    """
+    Assert that two Series are equal element-wise within a tolerance.
+
+    Lengths, indices (if ``check_index`` is true), names (if ``check_name`` is true), and dtypes
+    (if ``check_dtype`` is true) are checked before any values are compared. Mismatched values are
+    reported by their index labels. See ``assert_array_close`` for the comparison semantics.
+
+    Args:
+        actual (``pandas.Series``): the Series to check
+        expected (``pandas.Series``): the expected Series
+        rtol (``float``): the relative tolerance
+        atol (``float``): the absolute tolerance
+        equal_nan (``bool``): whether missing values in the same position are considered equal
+        check_dtype (``bool``): whether the dtypes of the Series must be the same
+        check_index (``bool``): whether the indices of the Series must be the same
+        check_name (``bool``): whether the names of the Series must be the same
+        max_reported (``int``): the maximum number of mismatches to include in the error message
+
+    Raises:
+        ``AssertionError``: if the Series are not equal
+    """
+    if not isinstance(actual, pd.Series):
+        raise AssertionError(f"Expected a Series but got {type(actual).__name__}")
+
+    if len(actual) != len(expected):
+        raise AssertionError(f"Length mismatch: actual {len(actual)}, expected {len(expected)}")
+
+    if check_index:
+        _check_index("Index", actual.index, expected.index, max_reported)
+
+    if check_name and actual.name != expected.name:
+        raise AssertionError(f"Name mismatch: actual {actual.name!r}, expected {expected.name!r}")
+
+    if check_dtype and actual.dtype != expected.dtype:
+        raise AssertionError(f"Dtype mismatch: actual {actual.dtype}, expected {expected.dtype}")
+
+    actual_values, expected_values = actual.to_numpy(), expected.to_numpy()
+    message = _summarize_mismatches(
+        f"Series are not close (rtol={rtol}, atol={atol})",
+        _find_mismatches(actual_values, expected_values, rtol, atol, equal_nan),
+        actual_values,
+        expected_values,
+        actual.index,
+        max_reported,
+    )
+    if message is not None:
+        raise AssertionError(message)
+
+
+def assert_frame_close(
+    actual: pd.DataFrame,
+    expected: pd.DataFrame,
+    *,
+    rtol: float = 1e-7,
+    atol: float = 0,
+    equal_nan: bool = True,
+    check_dtype: bool = False,
+    check_index: bool = True,
+    check_column_order: bool = True,
+    max_reported: int = 5,
+):
+    """
+    Assert that two DataFrames are equal element-wise within a tolerance.
+
+    Shapes, columns, indices (if ``check_index`` is true), and dtypes (if ``check_dtype`` is true)
+    are checked before any values are compared. Values are compared column by column and mismatches
+    are reported by their column and index labels. See ``assert_array_close`` for the comparison
+    semantics.
+
+    Args:
+        actual (``pandas.DataFrame``): the DataFrame to check
+        expected (``pandas.DataFrame``): the expected DataFrame
+        rtol (``float``): the relative tolerance
+        atol (``float``): the absolute tolerance
+        equal_nan (``bool``): whether missing values in the same position are considered equal
+        check_dtype (``bool``): whether the dtypes of each column must be the same
+        check_index (``bool``): whether the indices of the DataFrames must be the same
+        check_column_order (``bool``): whether the columns must be in the same order
+        max_reported (``int``): the maximum number of mismatches to include in the error message
+
+    Raises:
+        ``AssertionError``: if the DataFrames are not equal
+    """
+    if not isinstance(actual, pd.DataFrame):
+        raise AssertionError(f"Expected a DataFrame but got {type(actual).__name__}")
+
+    if actual.shape != expected.shape:
+        raise AssertionError(f"Shape mismatch: actual {actual.shape}, expected {expected.shape}")
+
+    if check_column_order:
+        _check_index("Columns", actual.columns, expected.columns, max_reported)
+    elif set(actual.columns) != set(expected.columns):
+        raise AssertionError(
+            f"Column mismatch: missing {sorted(set(expected.columns) - set(actual.columns), key=str)}, " \
+                f"unexpected {sorted(set(actual.columns) - set(expected.columns), key=str)}")
+
+    if check_index:
+        _check_index("Index", actual.index, expected.index, max_reported)
+
+    if check_dtype:
+        for col in expected.columns:
+            if actual[col].dtype != expected[col].dtype:
+                raise AssertionError(
+                    f"Dtype mismatch in column {col!r}: actual {actual[col].dtype}, expected " \
+                        f"{expected[col].dtype}")
+
+    n_mismatched, reported = 0, []
+    for col in expected.columns:
+        actual_values, expected_values = actual[col].to_numpy(), expected[col].to_numpy()
+        mismatches = _find_mismatches(actual_values, expected_values, rtol, atol, equal_nan)
+        col_mismatched = int(np.count_nonzero(mismatches))
+        if col_mismatched == 0:
+            continue
+
+        n_mismatched += col_mismatched
+        for i in np.flatnonzero(mismatches)[:max_reported - len(reported)]:
+            reported.append((col, actual.index[i], actual_values[i], expected_values[i]))
+
+    if n_mismatched:
+        lines = [
+            f"DataFrames are not close (rtol={rtol}, atol={atol}): {n_mismatched} of " \
+                f"{actual.size} values differ ({n_mismatched / actual.size:.4%})",
+            f"First {len(reported)} mismatches:",
+        ]
+        for col, label, a, e in reported:
+            lines.append(
+                f"    at column {col!r}, index {_format_value(label)}: actual {_format_value(a)}, " \
+                    f"expected {_format_value(e)}")
+        raise AssertionError("\n".join(lines))
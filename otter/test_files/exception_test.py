@@ -1,14 +1,279 @@
 """Exception-based test files"""
 
+import copy
+import hashlib
 import inspect
+import math
+import numbers
+import os
 import pathlib
+import pickle
+import sys
+import tempfile
+import time
 
 from dataclasses import replace
 from functools import lru_cache
 from textwrap import indent
-from typing import Callable, Optional, Union
+from types import CodeType
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
-from .abstract_test import TestCase, TestCaseResult, TestFile
+from .abstract_test import TestCase, TestCaseResult, TestCaseTimeoutError, TestFile, time_limit
+from ..utils import loggers
+
+
+LOGGER = loggers.get_logger(__name__)
+
+_FIXTURE_VALUES: Dict[Tuple[str, str], Any] = {}
+"""the values of fixtures computed in this process, keyed by test file hash and fixture name"""
+
+_IMMUTABLE_TYPES = (type(None), bool, int, float, complex, str, bytes, range)
+"""the types of fixture values that are passed to test cases without being copied"""
+
+
+def _copy_fixture_value(value: Any) -> Any:
+    """
+    Copy the value of a fixture for a test case. Immutable primitives are not copied, lists, sets,
+    and dictionaries of immutable primitives are copied shallowly, NumPy arrays and pandas objects
+    are copied with their own ``copy`` methods, and all other values are deep copied. When pandas'
+    Copy-on-Write mode is enabled (always the case in pandas 3), pandas objects are copied lazily,
+    so their data are only copied if the test case modifies them.
+    """
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return value
+
+    # containers of immutable primitives only need a shallow copy
+    if type(value) in (list, set) and all(isinstance(v, _IMMUTABLE_TYPES) for v in value):
+        return value.copy()
+    if type(value) is dict and all(
+        isinstance(k, _IMMUTABLE_TYPES) and isinstance(v, _IMMUTABLE_TYPES)
+        for k, v in value.items()
+    ):
+        return value.copy()
+
+    # only check for array and data frame types if their libraries have already been imported
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(value, np.ndarray) and value.dtype != object:
+        return value.copy()
+
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(value, (pd.DataFrame, pd.Series)):
+        copy_on_write = int(pd.__version__.split(".")[0]) >= 3 or \
+            getattr(pd.options.mode, "copy_on_write", False) is True
+        return value.copy(deep=not copy_on_write)
+
+    return copy.deepcopy(value)
+
+
+class fixture:
+    """
+    A decorator for functions that compute values shared by the test cases of an exception-based
+    test file, e.g. a reference model fit on the full dataset.
+
+    A fixture's value is computed the first time a test case that needs it is run and is reused for
+    the rest of the process (i.e. for every submission graded by that process). Each test case
+    receives its own copy of the value, so test cases that modify it (e.g. by passing it to a
+    student's function that changes it in place) do not affect each other; immutable primitives
+    like numbers and strings are not copied, NumPy arrays and pandas objects are copied with their
+    ``copy`` methods, and other values are deep copied. Test case functions receive fixtures by
+    parameter name, like values from the global environment; a fixture takes precedence over a
+    global variable with the same name. Fixture functions take no arguments.
+
+    If ``persist`` is true, the value can also be computed by the grading process outside of the
+    kernel and stored in a cache directory keyed by the hash of the test file, so that it is reused
+    by other grading processes; see ``write_fixture_values``. The code being graded never writes
+    to the cache directory.
+
+    Args:
+        name (``str | None``): the parameter name of the fixture; defaults to the name of the
+            decorated function
+        persist (``bool``): whether to persist the value in the fixture cache directory
+    """
+
+    name: Optional[str]
+    """the parameter name of the fixture"""
+
+    persist: bool
+    """whether to persist the value in the fixture cache directory"""
+
+    func: Callable[[], Any]
+    """the function that computes the fixture's value"""
+
+    def __init__(self, name: Optional[str] = None, persist: bool = False):
+        self.name = name
+        self.persist = persist
+        self.func = lambda: None
+
+    def __call__(self, func):
+        """
+        Wrap a fixture function as a decorator.
+        """
+        self.func = func
+        if self.name is None:
+            self.name = func.__name__
+        return self
+
+    def _get_cache_path(self, cache_dir: str, test_file_hash: str) -> str:
+        """
+        Get the path at which the value of this fixture is persisted.
+        """
+        return os.path.join(cache_dir, f"{test_file_hash}-{self.name}.pkl")
+
+    def _get_shared_value(self, test_file_hash: str, cache_dir: Optional[str] = None) -> Any:
+        """
+        Get the value of this fixture shared by this process, computing it if it has not already
+        been computed in this process or, if ``cache_dir`` is specified, persisted there.
+        """
+        key = (test_file_hash, self.name)
+        if key in _FIXTURE_VALUES:
+            return _FIXTURE_VALUES[key]
+
+        if cache_dir is not None:
+            try:
+                with open(self._get_cache_path(cache_dir, test_file_hash), "rb") as f:
+                    _FIXTURE_VALUES[key] = pickle.load(f)
+                return _FIXTURE_VALUES[key]
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                LOGGER.warning(f"Could not load persisted value of fixture {self.name}: {e}")
+
+        value = _FIXTURE_VALUES[key] = self.func()
+
+        if cache_dir is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                # write to a temporary file first so that other processes never read a partial file
+                fd, temp_path = tempfile.mkstemp(dir=cache_dir)
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(value, f)
+                os.replace(temp_path, self._get_cache_path(cache_dir, test_file_hash))
+            except Exception as e:
+                LOGGER.warning(f"Could not persist value of fixture {self.name}: {e}")
+
+        return value
+
+    def get_value(self, test_file_hash: str) -> Any:
+        """
+        Get a copy of the value of this fixture, computing it if it has not already been computed
+        in (or loaded into) this process.
+
+        Args:
+            test_file_hash (``str``): the hash of the test file that defines this fixture
+
+        Returns:
+            ``object``: a copy of the value of the fixture; see ``_copy_fixture_value``
+        """
+        return _copy_fixture_value(self._get_shared_value(test_file_hash))
+
+    def __getstate__(self):
+        """
+        Creates a representation of the state of the instance, excluding ``func`` because it
+        cannot be pickled.
+
+        Returns:
+            ``dict``: a dictionary representation of the instance's state
+        """
+        state = self.__dict__.copy()
+        state.pop("func", None)
+        return state
+
+
+def write_fixture_values(
+    test_files: List["ExceptionTestFile"],
+    cache_dir: str,
+    path: str,
+) -> str:
+    """
+    Get the values of the persisted fixtures of some test files, loading them from ``cache_dir``
+    or computing and persisting them there, and pickle them to ``path`` to be loaded by the kernel
+    of a notebook being graded with ``load_fixture_values``.
+
+    This function should be called by the grading process, outside of the kernel, so that the code
+    being graded cannot write to ``cache_dir``.
+
+    Args:
+        test_files (``list[ExceptionTestFile]``): the test files; test files of other types are
+            ignored
+        cache_dir (``str``): the directory in which fixture values are persisted
+        path (``str``): the path to write the values to
+
+    Returns:
+        ``str``: the SHA-256 digest of the file written to ``path``, which ``load_fixture_values``
+        verifies before loading it
+    """
+    values = {}
+    for test_file in test_files:
+        if not isinstance(test_file, ExceptionTestFile):
+            continue
+
+        test_file_hash = test_file._get_hash()
+        for f in test_file.fixtures.values():
+            if f.persist:
+                values[(test_file_hash, f.name)] = f._get_shared_value(test_file_hash, cache_dir)
+
+    contents = pickle.dumps(values)
+    with open(path, "wb") as f:
+        f.write(contents)
+
+    return hashlib.sha256(contents).hexdigest()
+
+
+def load_fixture_values(path: Optional[str], digest: Optional[str]):
+    """
+    Load fixture values written by ``write_fixture_values`` into this process, so that they are
+    used instead of computing the fixtures. The file is only unpickled if its SHA-256 digest
+    matches ``digest``. If ``path`` is ``None``, nothing is loaded.
+
+    Args:
+        path (``str | None``): the path to the fixture values
+        digest (``str | None``): the SHA-256 digest returned by ``write_fixture_values``
+    """
+    if path is None:
+        return
+
+    try:
+        with open(path, "rb") as f:
+            contents = f.read()
+
+    except OSError as e:
+        LOGGER.warning(f"Could not load fixture values: {e}")
+        return
+
+    if hashlib.sha256(contents).hexdigest() != digest:
+        LOGGER.warning(f"Fixture values in {path} do not match their digest; not loading them")
+        return
+
+    _FIXTURE_VALUES.update(pickle.loads(contents))
+
+
+def clear_fixture_values():
+    """
+    Remove the values of all fixtures computed in this process.
+    """
+    _FIXTURE_VALUES.clear()
+
+
+def _get_call_kwargs(
+    args: List[str],
+    global_environment: Dict[str, Any],
+    fixture_values: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Resolve the values of the arguments of a test case function from fixtures and the global
+    environment; see ``test_case.call_func``.
+    """
+    fixture_values = fixture_values or {}
+    call_kwargs = {}
+    for arg in args:
+        if arg in fixture_values:
+            call_kwargs[arg] = fixture_values[arg]
+        elif arg == "env":
+            call_kwargs[arg] = global_environment
+        else:
+            call_kwargs[arg] = global_environment.get(arg, None)
+
+    return call_kwargs
 
 
 class test_case:
@@ -34,9 +299,15 @@ class test_case:
     failure_message: Optional[str]
     """a message to display to students if the test case fails"""
 
+    timeout: Optional[Union[int, float]]
+    """the number of seconds after which the test case is interrupted and failed"""
+
     test_func: Callable[..., None]
     """the test case function being decorated"""
 
+    _func_params: Optional[List[str]]
+    """the cached parameter names of ``test_func``"""
+
     def __init__(
         self,
         name: Optional[str] = None,
@@ -44,19 +315,23 @@ class test_case:
         hidden: bool = False,
         success_message: Optional[str] = None,
         failure_message: Optional[str] = None,
+        timeout: Optional[Union[int, float]] = None,
     ):
         self.name = name
         self.points = points
         self.hidden = hidden
         self.success_message = success_message
         self.failure_message = failure_message
+        self.timeout = timeout
         self.test_func = lambda: None
+        self._func_params = None
 
     def __call__(self, test_func):
         """
         Wrap a test case function as a decorator.
         """
         self.test_func = test_func
+        self._func_params = None
         return self
 
     def to_dataclass(self):
@@ -67,22 +342,27 @@ class test_case:
             ``otter.test_files.abstract_test.TestCase``: the test case named tuple
         """
         return TestCase(name=self.name, body=self, hidden=self.hidden, points=self.points, 
-            success_message=self.success_message, failure_message=self.failure_message)
+            success_message=self.success_message, failure_message=self.failure_message,
+            timeout=self.timeout)
 
     def _get_func_params(self):
         """
-        Get the list of parameters expected by the decorated test case function.
+        Get the list of parameters expected by the decorated test case function. The parameters are
+        only inspected the first time this method is called.
 
         Returns:
             ``list[str]``: the function argument names
         """
-        return list(inspect.signature(self.test_func).parameters.keys())
+        if getattr(self, "_func_params", None) is None:
+            self._func_params = list(inspect.signature(self.test_func).parameters.keys())
+        return self._func_params
 
-    def call_func(self, global_environment):
+    def call_func(self, global_environment, fixture_values=None):
         """
         Call the underlying test case function, passig in parameters from the global environment.
 
-        If the signature of ``self.test_func`` contains a parameter called ``env``, the environment
+        Parameters named after a fixture in ``fixture_values`` are passed the fixture's value. If
+        the signature of ``self.test_func`` contains a parameter called ``env``, the environment
         is passed in. For all other parameters, that value from the global environment is passed in, 
         defaulting to ``None`` if the key is not present. Thus, a function with the signature
 
@@ -104,13 +384,12 @@ class test_case:
         Args:
             global_environment (``dict[str, object]``): the global environment from which to
                 retrieve values for the ``test_func`` arguments
+            fixture_values (``dict[str, object] | None``): the values of the test file's fixtures
 
         Returns:
             ``object``: the return value of the test case function
         """
-        args = self._get_func_params()
-        call_kwargs = {arg: (global_environment if arg == "env" else \
-                global_environment.get(arg, None)) for arg in args}
+        call_kwargs = _get_call_kwargs(self._get_func_params(), global_environment, fixture_values)
         return self.test_func(**call_kwargs)
     
     def __getstate__(self):
@@ -128,6 +407,283 @@ class test_case:
         return state
 
 
+def _truncate(s: str, max_length: int) -> str:
+    """
+    Truncate a string for a failure message.
+    """
+    return s if len(s) <= max_length else s[:max_length - 3] + "..."
+
+
+def _truncated_repr(value: Any) -> str:
+    """
+    Get the ``repr`` of a value for a failure message, truncating it if it is too long.
+    """
+    if hasattr(value, "item") and getattr(value, "ndim", None) == 0:
+        value = value.item()
+    return _truncate(repr(value), 40)
+
+
+def _outputs_equal(actual: Any, expected: Any, rtol: float, atol: float) -> bool:
+    """
+    Determine whether a single output is equal to its expected value. Real numbers are compared
+    within the tolerance unless both are integers; all other values are compared with ``==``.
+    """
+    try:
+        if isinstance(actual, numbers.Real) and isinstance(expected, numbers.Real) and \
+                not (isinstance(actual, numbers.Integral) and isinstance(expected, numbers.Integral)):
+            if math.isnan(actual) and math.isnan(expected):
+                return True
+            return math.isclose(actual, expected, rel_tol=rtol, abs_tol=atol)
+
+        equal = actual == expected
+        if hasattr(equal, "all"):
+            equal = equal.all()
+        return bool(equal)
+
+    except Exception:
+        return False
+
+
+def _compare_outputs(
+    actual: Sequence[Any],
+    expected: Sequence[Any],
+    rtol: float,
+    atol: float,
+) -> List[bool]:
+    """
+    Compare a sequence of outputs to their expected values, returning whether each is equal.
+    Numeric outputs are compared all at once with ``numpy.isclose``.
+    """
+    import numpy as np
+
+    try:
+        actual_arr, expected_arr = np.asarray(actual), np.asarray(expected)
+    except Exception:
+        actual_arr = expected_arr = None
+
+    if actual_arr is not None and actual_arr.shape == expected_arr.shape == (len(expected),) and \
+            np.issubdtype(actual_arr.dtype, np.number) and \
+            np.issubdtype(expected_arr.dtype, np.number):
+        return np.isclose(actual_arr, expected_arr, rtol=rtol, atol=atol, equal_nan=True).tolist()
+
+    return [_outputs_equal(a, e, rtol, atol) for a, e in zip(actual, expected)]
+
+
+class parametrized_test_case(test_case):
+    """
+    A test case function decorator for exception-based test cases that are run over a table of
+    inputs.
+
+    The decorated function is called once for each row of ``inputs``: parameters named after a
+    column of ``inputs`` are passed that row's value and all other parameters are passed values
+    from the global environment as they are for ``test_case``. If ``expected`` is provided, the
+    function's return value for each row is compared to the corresponding expected output;
+    otherwise, a row fails only if the function raises an error. If ``vectorized`` is true, the
+    function is instead called once with each column as a NumPy array and must return a sequence
+    containing the output for each row.
+
+    The test case passes if every row passes. Its failure message contains the number of rows that
+    failed and the first few failures. If ``prorate`` is true, a failing test case earns the
+    fraction of its points equal to the fraction of rows that passed.
+
+    Args:
+        inputs (``pandas.DataFrame | dict[str, list[object]] | list[dict[str, object]]``): the
+            table of inputs, as a DataFrame, a dictionary mapping column names to values, or a list
+            of rows
+        expected (``list[object] | None``): the expected output for each row
+        vectorized (``bool``): whether to call the function once with all of the inputs
+        prorate (``bool``): whether to award partial credit for the fraction of rows that passed
+        rtol (``float``): the relative tolerance used to compare numeric outputs
+        atol (``float``): the absolute tolerance used to compare numeric outputs
+        max_reported (``int``): the maximum number of failures to include in the failure message
+        **kwargs: additional arguments passed to ``test_case``
+    """
+
+    inputs: Dict[str, List[Any]]
+    """the values of each column of the input table"""
+
+    expected: Optional[List[Any]]
+    """the expected output for each row"""
+
+    vectorized: bool
+    """whether the function is called once with all of the inputs"""
+
+    prorate: bool
+    """whether partial credit is awarded for the fraction of rows that passed"""
+
+    rtol: float
+    """the relative tolerance used to compare numeric outputs"""
+
+    atol: float
+    """the absolute tolerance used to compare numeric outputs"""
+
+    max_reported: int
+    """the maximum number of failures to include in the failure message"""
+
+    def __init__(
+        self,
+        inputs: Any,
+        expected: Optional[Sequence[Any]] = None,
+        *,
+        vectorized: bool = False,
+        prorate: bool = False,
+        rtol: float = 1e-7,
+        atol: float = 0,
+        max_reported: int = 5,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.inputs = self._normalize_inputs(inputs)
+        self.expected = list(expected) if expected is not None else None
+        self.vectorized = vectorized
+        self.prorate = prorate
+        self.rtol = rtol
+        self.atol = atol
+        self.max_reported = max_reported
+
+        if self.expected is not None and len(self.expected) != self.num_inputs:
+            raise ValueError(
+                f"Parametrized test case has {self.num_inputs} inputs but {len(self.expected)} " \
+                    "expected outputs")
+
+    @staticmethod
+    def _normalize_inputs(inputs: Any) -> Dict[str, List[Any]]:
+        """
+        Convert a table of inputs into a dictionary mapping column names to lists of values.
+
+        Args:
+            inputs (``pandas.DataFrame | dict[str, list[object]] | list[dict[str, object]]``): the
+                inputs
+
+        Returns:
+            ``dict[str, list[object]]``: the columns of the table
+
+        Raises:
+            ``ValueError``: if the table is empty or its columns have different lengths
+        """
+        if hasattr(inputs, "columns") and hasattr(inputs, "to_dict"):
+            columns = {str(c): inputs[c].tolist() for c in inputs.columns}
+
+        elif isinstance(inputs, dict):
+            columns = {c: list(v) for c, v in inputs.items()}
+
+        else:
+            rows = list(inputs)
+            if len(rows) == 0:
+                raise ValueError("Parametrized test case has no inputs")
+            keys = list(rows[0].keys())
+            if any(set(r.keys()) != set(keys) for r in rows):
+                raise ValueError("All rows of a parametrized test case's inputs must have the same keys")
+            columns = {k: [r[k] for r in rows] for k in keys}
+
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns of a parametrized test case's inputs must have the same length")
+        if not columns or lengths == {0}:
+            raise ValueError("Parametrized test case has no inputs")
+
+        return columns
+
+    @property
+    def num_inputs(self) -> int:
+        """
+        the number of rows in the input table
+        """
+        return len(next(iter(self.inputs.values())))
+
+    def _format_row(self, i: int) -> str:
+        """
+        Format the inputs in a row of the input table for a failure message.
+        """
+        return ", ".join(f"{c}={_truncated_repr(v[i])}" for c, v in self.inputs.items())
+
+    def call_func(self, global_environment, fixture_values=None) -> List[Optional[str]]:
+        """
+        Call the underlying test case function with each row of the input table, passing in
+        parameters from the global environment as described in ``test_case.call_func`` for
+        parameters that are not columns of the input table.
+
+        Errors raised by the function for a single row are recorded as failures of that row. If
+        ``vectorized`` is true, errors raised by the function are not caught.
+
+        Args:
+            global_environment (``dict[str, object]``): the global environment from which to
+                retrieve values for the ``test_func`` arguments
+            fixture_values (``dict[str, object] | None``): the values of the test file's fixtures
+
+        Returns:
+            ``list[str | None]``: a description of the failure for each row, or ``None`` if the row
+            passed
+        """
+        args = self._get_func_params()
+        call_kwargs = _get_call_kwargs(
+            [arg for arg in args if arg not in self.inputs], global_environment, fixture_values)
+        row_args = [c for c in self.inputs if c in args]
+
+        n = self.num_inputs
+        failures: List[Optional[str]] = [None] * n
+        if self.vectorized:
+            import numpy as np
+
+            outputs = self.test_func(
+                **call_kwargs, **{c: np.asarray(self.inputs[c]) for c in row_args})
+            if self.expected is not None:
+                outputs = list(outputs)
+                if len(outputs) != n:
+                    return [f"expected {n} outputs but got {len(outputs)}"] * n
+
+        else:
+            outputs = [None] * n
+            for i in range(n):
+                try:
+                    outputs[i] = self.test_func(
+                        **call_kwargs, **{c: self.inputs[c][i] for c in row_args})
+                except Exception as e:
+                    failures[i] = f"raised {type(e).__name__}: {_truncate(str(e), 80)}"
+
+        if self.expected is not None:
+            to_compare = [i for i in range(n) if failures[i] is None]
+            matches = _compare_outputs(
+                [outputs[i] for i in to_compare],
+                [self.expected[i] for i in to_compare],
+                self.rtol,
+                self.atol,
+            )
+            for i, match in zip(to_compare, matches):
+                if not match:
+                    failures[i] = f"expected {_truncated_repr(self.expected[i])}, got " \
+                        f"{_truncated_repr(outputs[i])}"
+
+        return failures
+
+    def summarize_failures(self, failures: List[Optional[str]]) -> Tuple[bool, str, Optional[float]]:
+        """
+        Summarize the failures returned by ``call_func`` into a test case result.
+
+        Args:
+            failures (``list[str | None]``): the failure description for each row
+
+        Returns:
+            ``tuple[bool, str, float | None]``: whether the test case passed, the result message,
+            and the fraction of points earned if the test case failed and is prorated
+        """
+        failed = [(i, f) for i, f in enumerate(failures) if f is not None]
+        n = len(failures)
+        if not failed:
+            return True, f"✅ Test case passed\nAll {n} inputs passed", None
+
+        lines = [
+            "❌ Test case failed",
+            f"{len(failed)} of {n} inputs failed",
+            f"First {min(len(failed), self.max_reported)} failures:",
+        ]
+        for i, failure in failed[:self.max_reported]:
+            lines.append(f"    {self._format_row(i)}: {failure}")
+
+        partial_credit = (n - len(failed)) / n if self.prorate else None
+        return False, "\n".join(lines), partial_credit
+
+
 class ExceptionTestFile(TestFile):
     """
     A single exception-based test file for Otter.
@@ -136,6 +692,12 @@ class ExceptionTestFile(TestFile):
     source: str = ""
     """the test file contents"""
 
+    fixtures: Dict[str, fixture] = {}
+    """the fixtures defined in the test file, keyed by name"""
+
+    _code: Optional[CodeType] = None
+    """the compiled code of the test file, which is executed again for each copy"""
+
     @property
     @lru_cache(1)
     def source_lines(self):
@@ -162,24 +724,113 @@ class ExceptionTestFile(TestFile):
         err_msg = str(excp).strip("'")
         return f"Error at line {line_idx + 1} in test {self.name}:\n{lines}\n{type(excp).__name__}: {err_msg}"
 
+    def copy_without_results(self):
+        """
+        Create a copy of this test file without results.
+
+        The test file's code is executed again for the copy, so that the copy has its own global
+        environment, test case functions, and fixtures and module-level state (e.g. a counter
+        incremented by a test case) is not shared between copies. Test files without their
+        compiled code (e.g. ones that were unpickled) share their test cases with the copy.
+
+        Returns:
+            ``ExceptionTestFile``: the copy
+        """
+        if self._code is None:
+            return super().copy_without_results()
+
+        instc = self._from_compiled_code(self._code, path=self.path)
+        instc.source = self.source
+        return instc
+
+    def __getstate__(self):
+        """
+        Creates a representation of the state of the instance, excluding the compiled code of the
+        test file because it cannot be pickled.
+
+        Returns:
+            ``dict``: a dictionary representation of the instance's state
+        """
+        state = self.__dict__.copy()
+        state.pop("_code", None)
+        return state
+
+    def _get_hash(self) -> str:
+        """
+        Get the hash of this test file by which the values of its fixtures are keyed.
+        """
+        return hashlib.sha256((self.source or self.path).encode()).hexdigest()[:16]
+
+    def _get_fixture_values(self, test_case: "test_case") -> Dict[str, Any]:
+        """
+        Get the values of the fixtures used by a test case.
+
+        Raises:
+            ``RuntimeError``: if computing a fixture's value raises an error
+        """
+        needed = [p for p in test_case._get_func_params() if p in self.fixtures]
+        if not needed:
+            return {}
+
+        test_file_hash = self._get_hash()
+        values = {}
+        for name in needed:
+            try:
+                values[name] = self.fixtures[name].get_value(test_file_hash)
+            except Exception as e:
+                raise RuntimeError(
+                    f"Error computing fixture {name} in test {self.name}: {type(e).__name__}: {e}")
+
+        return values
+
     def run(self, global_environment):
         """
         Run the test cases against ``global_environment``, saving the results in 
         ``self.test_case_results``.
 
+        The fixtures used by each test case are computed before its time limit starts.
+
         Arguments:
             global_environment (``dict[str, object]``): result of executing a Python notebook/script
         """
         test_case_results = []
         for tc in self.test_cases:
             test_case = tc.body
-            passed, message = True, "✅ Test case passed"
+            passed, message, error, partial_credit = True, "✅ Test case passed", None, None
+            try:
+                fixture_values = self._get_fixture_values(test_case)
+            except RuntimeError as e:
+                test_case_results.append(TestCaseResult(
+                    test_case = tc, message = f"❌ Test case failed\n{e}", passed = False))
+                continue
+
+            timeout = self.get_timeout(tc)
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
             try:
-                test_case.call_func(global_environment)
+                with time_limit(timeout) as limit:
+                    ret = test_case.call_func(global_environment, fixture_values)
+            except TestCaseTimeoutError:
+                pass
             except Exception as e:
-                passed, message = False, "❌ Test case failed\n" + self._generate_error_message(e)
-
-            test_case_results.append(TestCaseResult(test_case=tc, message=message, passed=passed))
+                error = e
+            wall_time = time.perf_counter() - start_wall
+            cpu_time = time.process_time() - start_cpu
+
+            if limit.timed_out:
+                passed, message = False, self.get_timeout_message(timeout)
+            elif error is not None:
+                passed, message = False, "❌ Test case failed\n" + self._generate_error_message(error)
+            elif isinstance(test_case, parametrized_test_case):
+                passed, message, partial_credit = test_case.summarize_failures(ret)
+
+            test_case_results.append(TestCaseResult(
+                test_case = tc,
+                message = message,
+                passed = passed,
+                wall_time = wall_time,
+                cpu_time = cpu_time,
+                partial_credit = partial_credit,
+            ))
 
         self.test_case_results = test_case_results
 
@@ -211,15 +862,34 @@ class ExceptionTestFile(TestFile):
         """
         env = {}
         exec(code, env)
+        instc = cls._from_env(env, path=path)
+        instc._code = code
+        return instc
+
+    @classmethod
+    def _from_env(cls, env, path=""):
+        """
+        Parse the global environment resulting from executing an exception-based test file and
+        return an ``ExceptionTestFile``.
+
+        Args:
+            env (``dict[str, object]``): the global environment of the executed test file
+            path (``str``): the path to the test file
 
+        Returns:
+            ``ExceptionTestFile``: the new ``ExceptionTestFile`` object created from the given file
+        """
         if "name" not in env:
             raise ValueError(f"Test file {path} does not define 'name'")
 
         name = env["name"]
         points = env.get("points", None)
-        test_cases = []
+        test_cases, fixtures = [], {}
         for _, v in env.items():
-            if isinstance(v, test_case):
+            if isinstance(v, fixture):
+                fixtures[v.name] = v
+
+            elif isinstance(v, test_case):
                 tc = v.to_dataclass()
                 if tc.name is None:
                     tc = replace(tc, name=f"{name} - {len(test_cases) + 1}")
@@ -228,7 +898,9 @@ class ExceptionTestFile(TestFile):
         test_cases = cls.resolve_test_file_points(points, test_cases)
 
         path = str(pathlib.Path(path).as_posix())
-        return cls(name, path, test_cases, all_or_nothing=False)
+        test_file = cls(name, path, test_cases, all_or_nothing=False)
+        test_file.fixtures = fixtures
+        return test_file
 
     @classmethod
     def from_string(cls, s, path="<string>"):
@@ -2,57 +2,149 @@
 
 import doctest
 import io
-import json
-import os
+import linecache
 import pathlib
+import pdb
+import sys
+import time
 
-from contextlib import redirect_stderr, redirect_stdout
+from contextlib import redirect_stderr
 from textwrap import dedent
+from typing import List
 
-from .abstract_test import TestFile, TestCase, TestCaseResult
+from .abstract_test import TestFile, TestCase, TestCaseResult, TestCaseTimeoutError, time_limit
 
 from ..utils import hide_outputs
 
 
-def run_doctest(name, doctest_string, global_environment):
+_PARSER = doctest.DocTestParser()
+"""the parser used to extract examples from doctests"""
+
+_TIMEOUT_BACKSTOP_DELAY = 1
+"""the number of seconds after a test case times out at which the timeout error starts being raised
+repeatedly, in case the code under test caught it"""
+
+
+def parse_doctest(name, doctest_string):
     """
-    Run a single test with given ``global_environment``. Returns ``(True, '')`` if the doctest passes. 
-    Returns ``(False, failure_message)`` if the doctest fails.
+    Parse a doctest string into the examples it contains.
 
     Args:
         name (``str``): name of doctest
         doctest_string (``str``): doctest in string form
-        global_environment (``dict``): global environment resulting from the execution of a python 
+
+    Returns:
+        ``list[doctest.Example]``: the examples in the doctest
+    """
+    return [e for e in _PARSER.parse(doctest_string, name) if isinstance(e, doctest.Example)]
+
+
+class _TimeLimitedDocTestRunner(doctest.DocTestRunner):
+    """
+    A ``DocTestRunner`` that stops running a doctest once its test case's time limit is exceeded.
+
+    ``doctest`` catches any exception raised by an example and continues with the next one, so the
+    ``TestCaseTimeoutError`` raised when the time limit is exceeded is raised again when the
+    example is reported. Examples are reported outside of the ``try`` block around each example, so
+    the error unwinds through ``DocTestRunner.run``, which restores ``sys.stdout`` and the other
+    globals it patches.
+
+    If the code under test catches the error, the time limit keeps raising it after a delay (see
+    ``time_limit``). Those errors can interrupt ``DocTestRunner.run``'s cleanup, so ``run`` restores
+    the patched globals again afterwards.
+    """
+
+    time_limit = None
+    """the time limit of the test case being run"""
+
+    def run(self, test, compileflags=None, out=None, clear_globs=True):
+        saved = sys.stdout, pdb.set_trace, linecache.getlines, sys.displayhook, sys.gettrace()
+        try:
+            return super().run(test, compileflags=compileflags, out=out, clear_globs=clear_globs)
+
+        finally:
+            # restoring the globals is idempotent, so retry it if it is interrupted
+            while True:
+                try:
+                    sys.stdout, pdb.set_trace, linecache.getlines, sys.displayhook = saved[:4]
+                    sys.settrace(saved[4])
+                    break
+                except TestCaseTimeoutError:
+                    pass
+
+    def _raise_if_timed_out(self):
+        if self.time_limit is not None and self.time_limit.timed_out:
+            raise TestCaseTimeoutError("Test case timed out")
+
+    def report_success(self, out, test, example, got):
+        self._raise_if_timed_out()
+        super().report_success(out, test, example, got)
+
+    def report_failure(self, out, test, example, got):
+        # examples that expect an exception are reported as failures
+        self._raise_if_timed_out()
+        super().report_failure(out, test, example, got)
+
+    def report_unexpected_exception(self, out, test, example, exc_info):
+        if issubclass(exc_info[0], TestCaseTimeoutError):
+            raise exc_info[1]
+        super().report_unexpected_exception(out, test, example, exc_info)
+
+
+def _run_examples(name, doctest_string, examples, global_environment, runner, output):
+    """
+    Run the parsed examples of a doctest with ``runner``, writing the runner's output to
+    ``output``, which is cleared first.
+
+    Args:
+        name (``str``): name of doctest
+        doctest_string (``str``): doctest in string form
+        examples (``list[doctest.Example]``): the parsed examples of the doctest
+        global_environment (``dict``): global environment resulting from the execution of a python
             script/notebook
+        runner (``doctest.DocTestRunner``): the runner to use
+        output (``io.StringIO``): the buffer to which the runner's output should be written
 
     Returns:
         ``tuple[bool, str]``: results from running the test
     """
-    examples = doctest.DocTestParser().parse(
-        doctest_string,
-        name
-    )
-    test = doctest.DocTest(
-        [e for e in examples if isinstance(e, doctest.Example)],
-        global_environment,
-        name,
-        None,
-        None,
-        doctest_string
-    )
-
-    doctestrunner = doctest.DocTestRunner(verbose=True)
+    test = doctest.DocTest(examples, global_environment, name, None, None, doctest_string)
+
+    output.seek(0)
+    output.truncate()
+    result = runner.run(test, out=output.write, clear_globs=False)
 
-    runresults = io.StringIO()
-    with redirect_stdout(runresults), redirect_stderr(runresults), hide_outputs():
-        doctestrunner.run(test, clear_globs=False)
-    with open(os.devnull, 'w') as f, redirect_stderr(f), redirect_stdout(f):
-        result = doctestrunner.summarize(verbose=True)
     # An individual test can only pass or fail
     if result.failed == 0:
         return (True, '')
     else:
-        return False, runresults.getvalue()
+        return False, output.getvalue()
+
+
+def run_doctest(name, doctest_string, global_environment):
+    """
+    Run a single test with given ``global_environment``. Returns ``(True, '')`` if the doctest passes. 
+    Returns ``(False, failure_message)`` if the doctest fails.
+
+    Args:
+        name (``str``): name of doctest
+        doctest_string (``str``): doctest in string form
+        global_environment (``dict``): global environment resulting from the execution of a python 
+            script/notebook
+
+    Returns:
+        ``tuple[bool, str]``: results from running the test
+    """
+    runresults = io.StringIO()
+    with redirect_stderr(runresults), hide_outputs():
+        return _run_examples(
+            name,
+            doctest_string,
+            parse_doctest(name, doctest_string),
+            global_environment,
+            doctest.DocTestRunner(verbose=True),
+            runresults,
+        )
 
 
 class OKTestFile(TestFile):
@@ -60,26 +152,67 @@ class OKTestFile(TestFile):
     A single OK-formatted test file for Otter.
     """
 
+    _examples: List[List[doctest.Example]]
+    """the parsed examples of the doctest of each test case"""
+
+    def __init__(self, name, path, test_cases, all_or_nothing=True):
+        super().__init__(name, path, test_cases, all_or_nothing=all_or_nothing)
+        self._examples = [
+            parse_doctest(self._get_doctest_name(i), tc.body) for i, tc in enumerate(test_cases)]
+
+    def _get_doctest_name(self, i):
+        """
+        Get the name of the doctest for the test case at index ``i``.
+        """
+        return self.name + ' ' + str(i)
+
     def run(self, global_environment):
         """
         Run the test cases on ``global_environment``, saving the results in 
         ``self.test_case_results``.
 
+        Output is captured once for the whole file and the doctests are run from the examples
+        parsed when this test file was created.
+
         Arguments:
             ``global_environment`` (``dict``): result of executing a Python notebook/script
         """
-        for i, test_case in enumerate(self.test_cases):
-            passed, result = run_doctest(self.name + ' ' + str(i), test_case.body, global_environment)
-            if passed:
-                result = '✅ Test case passed'
-            else:
-                result = '❌ Test case failed\n' + result
-
-            self.test_case_results.append(TestCaseResult(
-                test_case = test_case,
-                message = result,
-                passed = passed,
-            ))
+        runner = _TimeLimitedDocTestRunner(verbose=True)
+        runresults = io.StringIO()
+        with redirect_stderr(runresults), hide_outputs():
+            for i, (test_case, examples) in enumerate(zip(self.test_cases, self._examples)):
+                timeout = self.get_timeout(test_case)
+                start_wall, start_cpu = time.perf_counter(), time.process_time()
+                try:
+                    with time_limit(timeout, repeat_delay=_TIMEOUT_BACKSTOP_DELAY) as limit:
+                        runner.time_limit = limit
+                        passed, result = _run_examples(
+                            self._get_doctest_name(i),
+                            test_case.body,
+                            examples,
+                            global_environment,
+                            runner,
+                            runresults,
+                        )
+                except TestCaseTimeoutError:
+                    pass
+                wall_time = time.perf_counter() - start_wall
+                cpu_time = time.process_time() - start_cpu
+
+                if limit.timed_out:
+                    passed, result = False, self.get_timeout_message(timeout)
+                elif passed:
+                    result = '✅ Test case passed'
+                else:
+                    result = '❌ Test case failed\n' + result
+
+                self.test_case_results.append(TestCaseResult(
+                    test_case = test_case,
+                    message = result,
+                    passed = passed,
+                    wall_time = wall_time,
+                    cpu_time = cpu_time,
+                ))
 
     @classmethod
     def from_spec(cls, test_spec, path=""):
@@ -116,7 +249,8 @@ class OKTestFile(TestFile):
                 hidden = test_case.get('hidden', True),
                 points = test_case.get('points', None),
                 success_message = test_case.get('success_message', None),
-                failure_message = test_case.get('failure_message', None)
+                failure_message = test_case.get('failure_message', None),
+                timeout = test_case.get('timeout', None),
             ))
 
         # resolve point values for each test case
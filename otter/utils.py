@@ -5,13 +5,15 @@ import logging
 import logging.handlers
 import os
 import pathlib
+import pickle
 import random
 import re
 import string
 import shutil
+import struct
 import tempfile
+import threading
 import traceback
-import yaml
 
 from contextlib import contextmanager
 from functools import lru_cache
@@ -59,6 +61,37 @@ def hide_outputs():
         ipy.display_formatter.formatters = old_formatters
 
 
+def load_notebook(path, validate=False):
+    """
+    Read a notebook file, converting it to version ``NBFORMAT_VERSION`` of the notebook format.
+
+    Unlike ``nbformat.read``, the notebook is not validated against the notebook format schema
+    unless ``validate`` is true; ``nbformat.read`` only logs validation errors, so this has no
+    effect on whether the notebook can be read. Paths that read notebooks more than once should load
+    the notebook once and pass the ``NotebookNode`` along instead.
+
+    Args:
+        path (``str``): the path to the notebook
+        validate (``bool``): whether to validate the notebook, raising an error if it is invalid
+
+    Returns:
+        ``nbformat.NotebookNode``: the notebook
+
+    Raises:
+        ``nbformat.ValidationError``: if ``validate`` is true and the notebook is invalid
+    """
+    import nbformat
+
+    with open(path, encoding="utf-8") as f:
+        nb = nbformat.reader.reads(f.read())
+
+    nb = nbformat.convert(nb, NBFORMAT_VERSION)
+    if validate:
+        nbformat.validate(nb)
+
+    return nb
+
+
 def id_generator(size=6, chars=string.ascii_uppercase + string.digits):
     """
     Used to generate a dynamic variable name for grading functions
@@ -128,6 +161,25 @@ def chdir(new_dir):
         os.chdir(curr_dir)
 
 
+_WORKING_DIR_LOCK = threading.RLock()
+"""a lock that prevents threads using ``locked_chdir`` from changing the working directory at the
+same time"""
+
+
+@contextmanager
+def locked_chdir(new_dir):
+    """
+    Create a context with a different working directory, like ``chdir``, that is never entered by
+    two threads at the same time. Changing the working directory affects the whole process, so this
+    should be used by code that can run in concurrent gradings.
+
+    Args:
+        new_dir (path-like): the directory for the context
+    """
+    with _WORKING_DIR_LOCK, chdir(new_dir):
+        yield
+
+
 def get_source(cell):
     """
     Returns the source code of a cell in a way that works for both nbformat and JSON
@@ -253,6 +305,73 @@ def knit_rmd_file(rmd_path, pdf_path):
         rmarkdown.render(ntf.name, "pdf_document", pdf_path)
 
 
+class _BatchingSocketHandler(logging.handlers.SocketHandler):
+    """
+    A ``SocketHandler`` that buffers records and sends them over the socket in batches.
+
+    The buffer is sent when it reaches ``capacity`` records, when a record at or above
+    ``flush_level`` is emitted, ``flush_interval`` seconds after a record is added to an empty
+    buffer, and when the handler is flushed or closed. The timed flush bounds the number of records
+    lost if the emitting process is killed before the handler is flushed.
+    """
+
+    def __init__(self, host, port, capacity=64, flush_level=logging.ERROR, flush_interval=0.5):
+        super().__init__(host, port)
+        self.capacity = capacity
+        self.flush_level = flush_level
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self._timer = None
+
+    def emit(self, record):
+        try:
+            if record.exc_info:
+                # format the record to populate record.exc_text before the traceback is discarded
+                self.format(record)
+            d = dict(record.__dict__)
+            d["msg"] = record.getMessage()
+            d["args"] = None
+            d["exc_info"] = None
+            d.pop("message", None)
+            self.buffer.append(d)
+            if len(self.buffer) >= self.capacity or record.levelno >= self.flush_level:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self.buffer:
+                s = pickle.dumps(self.buffer, 1)
+                self.send(struct.pack(">L", len(s)) + s)
+                self.buffer = []
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+    def reset_after_fork(self):
+        """
+        Drop the buffered records and the socket inherited from the parent process so that a
+        forked child process opens its own connection instead of writing to the parent's.
+        """
+        self.buffer = []
+        self._timer = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
 class loggers:
 
     _instances = {}
@@ -267,13 +386,37 @@ class loggers:
     @classmethod
     def send_logs(cls, host, port):
         """
-        Add a ``SocketHandler`` to all loggers that sends their logs to a TCP socket at the
-        specified host and port.
+        Add a ``SocketHandler`` to all loggers that sends their logs in batches to a socket at the
+        specified host and port. If ``port`` is ``None``, ``host`` is the path to a Unix socket.
+
+        Any handler added by a previous call is flushed and replaced, so that a process that is
+        reused for another grading does not send its logs to more than one socket.
         """
-        cls._socket_handler = logging.handlers.SocketHandler(host, port)
+        if cls._socket_handler:
+            for logger in cls._instances.values():
+                logger.removeHandler(cls._socket_handler)
+            cls._socket_handler.close()
+
+        cls._socket_handler = _BatchingSocketHandler(host, port)
         for logger in cls._instances.values():
             logger.addHandler(cls._socket_handler)
 
+    @classmethod
+    def flush_logs(cls):
+        """
+        Send any logs buffered by the handler added by ``send_logs``.
+        """
+        if cls._socket_handler:
+            cls._socket_handler.flush()
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """
+        Reset the handler added by ``send_logs`` in a forked child process.
+        """
+        if cls._socket_handler:
+            cls._socket_handler.reset_after_fork()
+
     @classmethod
     def get_logger(cls, name):
         """
@@ -329,6 +472,10 @@ class loggers:
         cls.set_level(logging.WARNING)
 
 
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=loggers._reset_after_fork)
+
+
 class Loggable:
     """
     A class for inheriting from that provides a logger via a class- and instance-accessible field.
@@ -376,14 +523,9 @@ def import_or_raise(module):
         raise ImportError(f"Could not import required module: {module}")
 
 
-class _CorrectIndentationDumper(yaml.Dumper):
-    def increase_indent(self, flow=False, *args, **kwargs):
-        return super().increase_indent(flow=flow, indentless=False)
-
-
 def dump_yaml(o, **kwargs):
     """
-    Dump an object to a YAML string using the ``_CorrectIndentationDumper`` dumper.
+    Dump an object to a YAML string with list items indented under their keys.
 
     Args:
         o (``object``): the object to dump
@@ -392,7 +534,13 @@ def dump_yaml(o, **kwargs):
     Returns:
         ``str``: the YAML representation of ``o``
     """
-    return yaml.dump(o, sort_keys=False, Dumper=_CorrectIndentationDumper, **kwargs)
+    import yaml
+
+    class CorrectIndentationDumper(yaml.Dumper):
+        def increase_indent(self, flow=False, *args, **kwargs):
+            return super().increase_indent(flow=flow, indentless=False)
+
+    return yaml.dump(o, sort_keys=False, Dumper=CorrectIndentationDumper, **kwargs)
 
 
 class QuestionNotInLogException(Exception):
@@ -8,8 +8,8 @@ from otter.api import grade_submission
 
 
 @mock.patch("otter.api.run_grader")
-@mock.patch("otter.api.redirect_stdout")
-def test_grade_submission(mocked_redirect, mocked_run):
+@mock.patch("otter.api.capture_run_output")
+def test_grade_submission(mocked_capture, mocked_run):
     """
     Tests for ``otter.api.grade_submission``.
     """
@@ -24,8 +24,8 @@ def test_grade_submission(mocked_redirect, mocked_run):
         no_logo=True,
         debug=False,
     )
-    mocked_redirect.assert_not_called()
+    mocked_capture.assert_not_called()
 
     grade_submission(subm_path, quiet=True)
 
-    mocked_redirect.assert_called()
+    mocked_capture.assert_called()
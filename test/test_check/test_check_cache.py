@@ -0,0 +1,143 @@
+"""Tests for ``otter.check.check_cache``"""
+
+import numpy as np
+import os
+import pandas as pd
+import sys
+
+from textwrap import dedent
+from unittest import mock
+
+from otter import Notebook
+from otter.check.check_cache import get_referenced_names, hash_variables
+from otter.execute import Checker
+from otter.nbmeta_config import NBMetadataConfig
+from otter.test_files import create_test_file
+from otter.test_files.abstract_test import CACHED_RESULT_MESSAGE
+
+from ..utils import write_ok_test
+
+
+def test_get_referenced_names(tmp_path):
+    ok_path = str(tmp_path / "q1.py")
+    write_ok_test(ok_path, ">>> import math\n>>> y = f(x)\n>>> assert math.isclose(y, 4)")
+    ok_test = create_test_file(ok_path, NBMetadataConfig())
+    assert get_referenced_names(ok_test) == {"f", "x"}
+
+    exception_path = tmp_path / "q2.py"
+    exception_path.write_text(dedent("""\
+        from otter.test_files import fixture, test_case
+
+        OK_FORMAT = False
+        name = "q2"
+
+        @fixture()
+        def expected():
+            return 4
+
+        @test_case()
+        def test_1(f, x, expected):
+            assert f(x) == expected
+    """))
+    exception_test = create_test_file(str(exception_path), NBMetadataConfig())
+    assert get_referenced_names(exception_test) == {"f", "x"}
+
+    exception_path.write_text(dedent("""\
+        from otter.test_files import test_case
+
+        OK_FORMAT = False
+        name = "q2"
+
+        @test_case()
+        def test_1(env):
+            assert env["f"](2) == 4
+    """))
+    exception_test = create_test_file(str(exception_path), NBMetadataConfig())
+    assert get_referenced_names(exception_test) is None
+
+
+def test_hash_variables():
+    a = np.arange(10)
+    env = {"a": a, "df": pd.DataFrame({"a": a}), "l": [1, "2", {"x": 3.0}]}
+    exec("def f(x):\n    return x + a.sum()", env)
+    del env["__builtins__"]
+    names = set(env) | {"missing"}
+
+    digest = hash_variables(names, env)
+    assert digest == hash_variables(names, {k: v for k, v in env.items()})
+
+    for name, value in [
+        ("a", np.arange(1, 11)),
+        ("df", pd.DataFrame({"b": a})),
+        ("l", [1, "2", {"x": 4.0}]),
+        ("missing", None),
+    ]:
+        assert hash_variables(names, {**env, name: value}) != digest
+
+    # changing a variable read by a function changes the function's hash
+    f_digest = hash_variables({"f"}, env)
+    env["a"] = np.arange(1, 11)
+    assert hash_variables({"f"}, env) != f_digest
+
+    assert hash_variables({"g"}, {"g": (lambda: (yield))()}) is None
+
+    # functions nested too deeply to follow are not hashed
+    chain = {}
+    exec("def f1(): return 1", chain)
+    for i in range(2, 7):
+        exec(f"def f{i}(): return f{i - 1}()", chain)
+    assert hash_variables({"f4"}, chain) is not None
+    assert hash_variables({"f6"}, chain) is None
+
+    # recursive functions can be hashed
+    exec("def fact(n): return 1 if n == 0 else n * fact(n - 1)", chain)
+    assert hash_variables({"fact"}, chain) is not None
+
+
+def test_hash_notebook_classes(monkeypatch):
+    """
+    Tests that instances of classes defined in the notebook are hashed with their methods.
+    """
+    env = {"__name__": "__main__"}
+    exec("class Model:\n    def predict(self, x):\n        return x", env)
+    monkeypatch.setattr(sys.modules["__main__"], "Model", env["Model"], raising=False)
+    env["model"] = env["Model"]()
+    digest = hash_variables({"model"}, env)
+    assert digest is not None
+
+    exec("def predict(self, x):\n    return x + 1", env)
+    env["Model"].predict = env["predict"]
+    assert hash_variables({"model"}, env) != digest
+
+
+def test_cached_check(tmp_path):
+    tests_dir = tmp_path / "tests"
+    os.makedirs(tests_dir)
+    write_ok_test(str(tests_dir / "q1.py"), ">>> assert x == 1")
+
+    grader = Notebook(tests_dir=str(tests_dir), cache_checks=True)
+    env = {"x": 1, "y": 2}
+
+    with mock.patch("otter.check.check_cache.Checker.check", wraps=Checker.check) as mocked_check:
+        result = grader.check("q1", global_env=env)
+        assert result.grade == 1 and not result.from_cache
+
+        # variables the test does not read don't invalidate the cache
+        env["y"] = 3
+        result = grader.check("q1", global_env=env)
+        assert result.grade == 1 and result.from_cache
+        assert repr(result).endswith(CACHED_RESULT_MESSAGE)
+        assert CACHED_RESULT_MESSAGE in result._repr_html_()
+        assert mocked_check.call_count == 1
+
+        env["x"] = 2
+        result = grader.check("q1", global_env=env)
+        assert result.grade == 0 and not result.from_cache
+        assert mocked_check.call_count == 2
+
+        # checks are always run in grading mode
+        with mock.patch.object(Notebook, "_grading_mode", True):
+            grader.check("q1", global_env=env)
+            assert mocked_check.call_count == 3
+
+    os.remove(".OTTER_LOG")
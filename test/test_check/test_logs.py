@@ -1,14 +1,16 @@
 """Tests for ``otter.check.logs``"""
 
+import dill
 import os
 import pytest
 import sys
 
 from sklearn.linear_model import LinearRegression
 
+from otter.check import logs
 from otter.check.logs import Log
 from otter.check.notebook import Notebook, _OTTER_LOG_FILENAME
-from otter.check.logs import LogEntry, EventType, Log
+from otter.check.logs import LogEntry, EventType, Log, LOG_FORMAT_MAGIC, read_log_index
 
 from ..utils import TestFileManager
 
@@ -149,3 +151,103 @@ def test_log_iter():
     assert log_iter.questions == ["q1", "q2"]
     assert next(log_iter).question == entry2.question
     assert next(log_iter).question == entry3.question
+
+
+def test_shelve_appends_tombstones():
+    """
+    Tests that deleting old shelves appends to the log instead of rewriting it.
+    """
+    entries = []
+    for x in range(3):
+        entry = LogEntry(
+            event_type=EventType.CHECK,
+            results=[],
+            question="q1",
+            success=True,
+            error=None,
+        )
+        entry.shelve({"x": x, "y": "foo"}, delete=True, filename=_OTTER_LOG_FILENAME)
+        assert entry.shelved_variables == ["x", "y"]
+
+        before = open(_OTTER_LOG_FILENAME, "rb").read() if entries else b""
+        entry.flush_to_file(_OTTER_LOG_FILENAME)
+        entries.append(entry)
+
+        after = open(_OTTER_LOG_FILENAME, "rb").read()
+        assert after.startswith(LOG_FORMAT_MAGIC) and after.startswith(before)
+
+    index = read_log_index(_OTTER_LOG_FILENAME)
+    assert [r.kind for r in index] == ["entry", "tombstone", "entry", "tombstone", "entry"]
+    assert [r.question for r in index if r.kind == "entry"] == ["q1"] * 3
+    assert index[1].superseded == index[0].offset
+
+    log = Log.from_file(_OTTER_LOG_FILENAME)
+    assert [e.shelf is None for e in log] == [True, True, False]
+    assert log.get_question_entry("q1").unshelve() == {"x": 2, "y": "foo"}
+
+
+def test_shelve_compacts_log(monkeypatch):
+    """
+    Tests that the log is compacted once superseded shelves take up most of it.
+    """
+    monkeypatch.setattr(logs, "_MIN_COMPACTION_BYTES", 0)
+
+    for x in range(3):
+        entry = LogEntry(
+            event_type=EventType.CHECK,
+            results=[],
+            question="q1",
+            success=True,
+            error=None,
+        )
+        entry.shelve({"x": "a" * 1000 * (x + 1)}, delete=True, filename=_OTTER_LOG_FILENAME)
+        entry.flush_to_file(_OTTER_LOG_FILENAME)
+
+    index = read_log_index(_OTTER_LOG_FILENAME)
+    assert [r.kind for r in index] == ["entry"] * 3
+    assert [bool(r.shelf_size) for r in index] == [False, False, True]
+
+    log = Log.from_file(_OTTER_LOG_FILENAME)
+    assert log.get_question_entry("q1").unshelve() == {"x": "a" * 3000}
+
+
+def test_legacy_log():
+    """
+    Tests that logs written as streams of pickled entries can be read and are converted to the
+    indexed format when they are appended to.
+    """
+    entries = []
+    with open(_OTTER_LOG_FILENAME, "wb") as f:
+        for question in ["q1", "q2", "q1"]:
+            entry = LogEntry(
+                event_type=EventType.CHECK,
+                results=[],
+                question=question,
+                success=True,
+                error=None,
+            )
+            entry.shelf, _ = LogEntry.shelve_environment({"question": question})
+            dill.dump(entry, f)
+            entries.append(entry)
+
+    log = Log.from_file(_OTTER_LOG_FILENAME)
+    assert [e.timestamp for e in log] == [e.timestamp for e in entries]
+
+    entry = LogEntry(
+        event_type=EventType.CHECK,
+        results=[],
+        question="q1",
+        success=True,
+        error=None,
+    )
+    entry.shelve({"question": "q1", "x": 1}, delete=True, filename=_OTTER_LOG_FILENAME)
+    entry.flush_to_file(_OTTER_LOG_FILENAME)
+
+    with open(_OTTER_LOG_FILENAME, "rb") as f:
+        assert f.read(len(LOG_FORMAT_MAGIC)) == LOG_FORMAT_MAGIC
+
+    # only variables that were stored in the old shelves are stored
+    log = Log.from_file(_OTTER_LOG_FILENAME)
+    assert [e.question for e in log] == ["q1", "q2", "q1", "q1"]
+    assert [e.shelf is None for e in log] == [True, False, True, False]
+    assert log.get_question_entry("q1").unshelve() == {"question": "q1"}
@@ -5,6 +5,8 @@ import nbformat as nbf
 import os
 import pytest
 import shutil
+import subprocess
+import sys
 
 from glob import glob
 from textwrap import dedent
@@ -12,6 +14,7 @@ from unittest import mock
 
 from otter import Notebook
 from otter.check.notebook import _OTTER_LOG_FILENAME, _ZIP_NAME_FILENAME
+from otter.execute.preprocessor import INIT_CELL_SOURCE
 from otter.utils import (
     NO_PDF_EXPORT_MESSAGE_KEY,
     NOTEBOOK_METADATA_KEY,
@@ -181,10 +184,10 @@ def test_export_with_directory_in_files(mocked_zf, write_notebook):
         shutil.rmtree(dir_path)
 
 
-@mock.patch("otter.check.utils.Button")
-@mock.patch("otter.check.utils.HTML")
-@mock.patch("otter.check.utils.Output")
-@mock.patch("otter.check.utils.VBox")
+@mock.patch("ipywidgets.Button")
+@mock.patch("ipywidgets.HTML")
+@mock.patch("ipywidgets.Output")
+@mock.patch("ipywidgets.VBox")
 @mock.patch("otter.check.utils.display")
 @mock.patch("otter.check.notebook.dt")
 @mock.patch("otter.check.notebook.zipfile.ZipFile")
@@ -326,3 +329,26 @@ def test_grading_mode(mocked_resolve_nb_path, mocked_resolve_test_info, _):
     grader.export()
     # if export is called, this method would be called first
     mocked_resolve_nb_path.assert_not_called()
+
+
+def test_grading_mode_imports(tmp_path):
+    """
+    Check that the init cell executed in the kernel of each graded notebook does not import the
+    packages that are only needed outside of grading mode.
+    """
+    init_source = INIT_CELL_SOURCE.format(
+        notebook_name="grader",
+        test_dir=str(tmp_path / "tests"),
+        logging_server_host=str(tmp_path / "logs.sock"),
+        logging_server_port=None,
+        test_case_timeout=None,
+        fixture_values_path=None,
+        fixture_values_digest=None,
+    )
+    source = f"import sys\nexec({init_source!r})\nprint(','.join(sorted(sys.modules)))"
+    imported = subprocess.run(
+        [sys.executable, "-c", source], check=True, capture_output=True, text=True,
+    ).stdout.strip().split(",")
+
+    for module in ["ipylab", "ipywidgets", "nbclient", "nbconvert", "nbformat", "pandas", "yaml"]:
+        assert module not in imported, f"{module} was imported"
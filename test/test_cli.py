@@ -501,6 +501,14 @@ def test_grade(mocked_grade, run_cli):
     assert_cli_result(result, expect_error=False)
     mocked_grade.assert_called_with(**{**std_kwargs, "no_kill": True})
 
+    result = run_cli([*cmd_start, "--snapshot-environments"])
+    assert_cli_result(result, expect_error=False)
+    mocked_grade.assert_called_with(**{**std_kwargs, "snapshot_environments": True})
+
+    result = run_cli([*cmd_start, "--tests-only"])
+    assert_cli_result(result, expect_error=False)
+    mocked_grade.assert_called_with(**{**std_kwargs, "tests_only": True})
+
     # test invalid calls
     mocked_grade.reset_mock()
 
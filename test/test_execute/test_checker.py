@@ -1,4 +1,6 @@
+import os
 import pytest
+import threading
 
 from unittest.mock import patch
 
@@ -6,6 +8,8 @@ from otter.execute.checker import Checker
 from otter.nbmeta_config import NBMetadataConfig
 from otter.test_files import OKTestFile
 
+from ..utils import write_ok_test
+
 
 @pytest.fixture
 def mocked_create_test_file():
@@ -127,3 +131,64 @@ class TestChecker:
                 assert ret is mocked_check.return_value
             else:
                 mocked_check.assert_not_called()
+
+    def test_check_isolated_if_not_already_checked(self, tmp_path):
+        paths = [os.path.join(tmp_path, f"q{i}.py") for i in range(1, 4)]
+        for p in paths:
+            write_ok_test(p, ">>> x.append(1)\n>>> assert x == [1]")
+
+        Checker.enable_tracking()
+        Checker.check(paths[0], NBMetadataConfig(), global_env={"x": []})
+
+        global_env = {"x": []}
+        ret = Checker.check_isolated_if_not_already_checked(paths, 2, global_env)
+
+        assert [tf.path for tf in ret] == [p.replace(os.sep, "/") for p in paths[1:]]
+        assert all(tf.passed_all for tf in ret)
+        assert global_env == {"x": []}
+        assert [tf.name for tf in Checker.get_results()] == ["q1", "q2", "q3"]
+
+    def test_session(self, mocked_create_test_file, nbmeta_config):
+        Checker.enable_tracking()
+        Checker.check("", nbmeta_config)
+        res = Checker.get_results()
+
+        with Checker.session():
+            assert Checker.get_results() == []
+            Checker.check("", nbmeta_config)
+            assert Checker.get_results() == []
+
+            Checker.enable_tracking()
+            Checker.check("", nbmeta_config)
+            assert len(Checker.get_results()) == 1
+
+        assert Checker.get_results() is res
+        assert len(res) == 1
+
+    def test_sessions_in_threads(self, tmp_path):
+        paths = [os.path.join(tmp_path, f"q{i}.py") for i in range(1, 5)]
+        for p in paths:
+            write_ok_test(p, ">>> assert x == 1")
+
+        barrier, results, errors = threading.Barrier(2), {}, []
+        def grade(i):
+            try:
+                with Checker.session():
+                    Checker.enable_tracking()
+                    for p in paths[i::2]:
+                        Checker.check(p, NBMetadataConfig(), global_env={"x": 1})
+                        # interleave the checks run by each thread
+                        barrier.wait()
+                    results[i] = [tf.name for tf in Checker.get_results()]
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=grade, args=(i,)) for i in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert results == {0: ["q1", "q3"], 1: ["q2", "q4"]}
+        assert Checker.get_results() == []
@@ -0,0 +1,78 @@
+import os
+
+from otter.check.logs import EventType, Log, LogEntry
+from otter.execute.from_log import filter_variables, grade_log, grade_logs
+
+from ..utils import write_ok_test
+
+
+def make_log(*envs):
+    entries = [LogEntry(EventType.INIT)]
+    for i, env in enumerate(envs):
+        entry = LogEntry(EventType.CHECK, question=f"q{i + 1}")
+        entry.shelve(env)
+        entries.append(entry)
+
+    return Log(entries)
+
+
+def write_tests(tmp_path):
+    test_dir = tmp_path / "tests"
+    os.makedirs(test_dir)
+    write_ok_test(str(test_dir / "q1.py"), ">>> assert a == 1")
+    write_ok_test(str(test_dir / "q2.py"), ">>> assert math.isclose(f(2), 4)")
+    write_ok_test(str(test_dir / "q3.py"), ">>> assert a == 1")
+    return sorted(str(p) for p in test_dir.iterdir())
+
+
+def square(x):
+    return x ** 2
+
+
+def test_filter_variables(capsys):
+    shelf = {"a": 1, "b": "foo", "c": 2.0}
+    assert filter_variables(shelf, {"a": "builtins.int", "b": "builtins.int"}) == {"a": 1}
+    assert filter_variables({"a": 1}, None) == {"a": 1}
+
+    # removed variables are logged instead of printed from the grading workers
+    assert capsys.readouterr().out == ""
+
+
+def test_grade_log(tmp_path):
+    tests_glob = write_tests(tmp_path)
+
+    # q1's environment is not visible to q2, and q3 is not in the log
+    results = grade_log(
+        make_log({"a": 1}, {"f": square}),
+        tests_glob=tests_glob,
+        setup_source="import math",
+    )
+
+    assert results.get_score("q1") == 1
+    assert results.get_score("q2") == 1
+    assert results.get_score("q3") == 0
+
+
+def test_grade_logs(tmp_path):
+    tests_glob = write_tests(tmp_path)
+
+    log_paths = []
+    for i, a in enumerate([1, 2, 1]):
+        log_path = str(tmp_path / f"{i}.OTTER_LOG")
+        for entry in make_log({"a": a}, {"f": square}, {"a": a}).entries:
+            entry.flush_to_file(log_path)
+        log_paths.append(log_path)
+
+    log_paths.append(str(tmp_path / "missing.OTTER_LOG"))
+
+    results = grade_logs(
+        log_paths,
+        tests_glob=tests_glob,
+        variables={"a": "builtins.int"},
+        setup_source="import math",
+        max_workers=2,
+    )
+
+    assert list(results) == log_paths
+    assert [r.total for r in results.values() if not r.has_catastrophic_failure()] == [2, 0, 2]
+    assert results[log_paths[-1]].has_catastrophic_failure()
@@ -1,15 +1,25 @@
+import asyncio
 import json
 import nbformat as nbf
 import os
 import pytest
 import shutil
 import tempfile
+import time
 
 from glob import glob
+from textwrap import dedent
+from nbclient.exceptions import DeadKernelError
 from unittest import mock
 
 from otter.check.logs import EventType, Log, LogEntry
-from otter.execute import grade_notebook
+from otter.execute import _NotebookGrader, grade_notebook, grade_notebooks_async, grade_notebooks_with_shared_prefixes
+from otter.execute.fail_fast import ABORTED_MESSAGE, GradingAbortedError
+from otter.execute.recovery import KERNEL_CRASH_MESSAGE, KernelCrash
+from otter.execute.resources import can_sample_resources
+from otter.execute.results_stream import UNREACHED_MESSAGE
+from otter.execute.snapshot import get_snapshot_path, grade_snapshot
+from otter.test_files.exception_test import clear_fixture_values
 
 from ..utils import TestFileManager, write_ok_test
 
@@ -93,7 +103,14 @@ def test_log_execution(temp_dir):
     for d in expected_results.values():
         d["path"] = os.path.join(test_dir, os.path.split(d["path"])[1])
 
-    assert results.to_dict() == expected_results
+    # check the timing of each test case separately since it varies between runs
+    results_dict = results.to_dict()
+    for d in results_dict.values():
+        for tcr in d["test_case_results"]:
+            assert tcr.pop("wall_time") >= 0
+            assert tcr.pop("cpu_time") >= 0
+
+    assert results_dict == expected_results
 
 
 @mock.patch("otter.execute.pickle.load")
@@ -121,3 +138,549 @@ def test_results_load_failure_handling(mocked_pickle_load, temp_dir):
     )
 
     assert results.has_catastrophic_failure()
+
+
+def test_environment_snapshot(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebook`` persists the post-execution environment when
+    indicated and that ``otter.execute.snapshot.grade_snapshot`` can grade it with new tests.
+    """
+    nb = nbf.v4.new_notebook(cells=[
+        nbf.v4.new_code_cell("import math as m\nx = 2"),
+        nbf.v4.new_code_cell("def f(y):\n    return x * y"),
+    ])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> assert x == 2")
+
+    snapshot_dir = os.path.join(temp_dir, "snapshots")
+    results = grade_notebook(
+        subm_path,
+        test_dir=test_dir,
+        tests_glob=glob(os.path.join(test_dir, "*.py")),
+        ignore_errors=False,
+        snapshot_dir=snapshot_dir,
+    )
+
+    assert results.total == 1
+
+    snapshot_path = get_snapshot_path(snapshot_dir, subm_path)
+    assert os.path.isfile(snapshot_path)
+
+    write_ok_test(os.path.join(test_dir, "q2.py"), ">>> assert f(3) == 6\n>>> assert m.isclose(m.pi, 3.14159, abs_tol=1e-5)")
+    write_ok_test(os.path.join(test_dir, "q3.py"), ">>> assert x == 3")
+
+    results = grade_snapshot(snapshot_path, tests_glob=glob(os.path.join(test_dir, "*.py")))
+
+    assert results.test_files == ["q1", "q2", "q3"]
+    assert results.get_score("q1") == 1
+    assert results.get_score("q2") == 1
+    assert results.get_score("q3") == 0
+
+
+def test_isolated_tests(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebook`` runs each test in its own forked process when
+    ``test_workers`` is specified.
+    """
+    nb = nbf.v4.new_notebook(cells=[nbf.v4.new_code_cell("x = [1, 2]")])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> x.append(3)\n>>> assert len(x) == 3")
+    write_ok_test(os.path.join(test_dir, "q2.py"), ">>> x.append(3)\n>>> assert len(x) == 3")
+    write_ok_test(os.path.join(test_dir, "q3.py"), ">>> import os\n>>> os._exit(3)")
+
+    results = grade_notebook(
+        subm_path,
+        test_dir=test_dir,
+        tests_glob=sorted(glob(os.path.join(test_dir, "*.py"))),
+        ignore_errors=False,
+        test_workers=2,
+    )
+
+    assert results.test_files == ["q1", "q2", "q3"]
+    assert results.get_score("q1") == 1
+    assert results.get_score("q2") == 1
+    assert results.get_score("q3") == 0
+    assert "exited unexpectedly with code 3" in \
+        results.results["q3"].test_case_results[0].message
+
+
+def test_cell_timings(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebook`` records the time taken to execute each cell of the
+    submission.
+    """
+    nb = nbf.v4.new_notebook(cells=[
+        nbf.v4.new_code_cell("x = 2"),
+        nbf.v4.new_markdown_cell("foo"),
+        nbf.v4.new_code_cell("import time\ntime.sleep(0.2)"),
+    ])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> assert x == 2")
+
+    results = grade_notebook(
+        subm_path,
+        test_dir=test_dir,
+        tests_glob=glob(os.path.join(test_dir, "*.py")),
+        ignore_errors=False,
+        seed=42,
+    )
+
+    assert [ct.cell_index for ct in results.cell_timings] == [0, 2]
+    assert results.cell_timings[1].wall_time >= 0.2
+    assert results.cell_timings[1].cpu_time < 0.2
+
+
+@pytest.mark.skipif(not can_sample_resources(), reason="resources cannot be sampled on this platform")
+def test_resource_usage(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebook`` samples the resources used by the kernel when
+    indicated.
+    """
+    nb = nbf.v4.new_notebook(cells=[nbf.v4.new_code_cell(
+        "import subprocess, sys\n"
+        "x = bytearray(256 * 2 ** 20)\n"
+        "subprocess.run([sys.executable, '-c', 'pass'])",
+    )])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    results = grade_notebook(subm_path, test_dir=temp_dir, ignore_errors=False)
+    assert results.resource_usage is None
+
+    results = grade_notebook(subm_path, test_dir=temp_dir, ignore_errors=False, sample_resources=True)
+    assert results.resource_usage.peak_rss >= 256 * 2 ** 20
+    assert results.resource_usage.cpu_time > 0
+
+
+def test_test_case_timeout(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebook`` sets the default test case timeout.
+    """
+    nb = nbf.v4.new_notebook(cells=[nbf.v4.new_code_cell("def f():\n    while True:\n        pass")])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> f()")
+
+    results = grade_notebook(
+        subm_path,
+        test_dir=test_dir,
+        tests_glob=glob(os.path.join(test_dir, "*.py")),
+        ignore_errors=False,
+        test_case_timeout=0.5,
+    )
+
+    assert results.get_score("q1") == 0
+    assert results.results["q1"].test_case_results[0].message == \
+        "❌ Test case failed\nTest case timed out after 0.5 seconds"
+
+
+def test_persisted_fixtures(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebook`` computes persisted fixtures outside of the kernel
+    and reuses their values across gradings.
+    """
+    nb = nbf.v4.new_notebook(cells=[nbf.v4.new_code_cell("x = 2")])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    calls_path = os.path.join(temp_dir, "calls.txt")
+    with open(os.path.join(test_dir, "q1.py"), "w") as f:
+        f.write(dedent(f"""\
+            import os
+
+            from otter.test_files import fixture, test_case
+
+            OK_FORMAT = False
+
+            name = "q1"
+
+            @fixture(persist=True)
+            def reference():
+                with open({calls_path!r}, "a") as f:
+                    f.write(str(os.getpid()) + "\\n")
+                return 2
+
+            @test_case(points=1)
+            def test_1(x, reference):
+                assert x == reference
+        """))
+
+    cache_dir = os.path.join(temp_dir, "fixtures")
+    for _ in range(2):
+        clear_fixture_values()
+        results = grade_notebook(
+            subm_path,
+            test_dir=test_dir,
+            tests_glob=glob(os.path.join(test_dir, "*.py")),
+            fixture_cache_dir=cache_dir,
+        )
+
+        assert results.get_score("q1") == 1
+
+    clear_fixture_values()
+
+    with open(calls_path) as f:
+        assert f.read().split() == [str(os.getpid())]
+
+
+def test_partial_results_after_kernel_death(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebook`` returns the results of the checks that were run
+    before the kernel died.
+    """
+    nb = nbf.v4.new_notebook(cells=[
+        nbf.v4.new_code_cell("import otter\ngrader = otter.Notebook()"),
+        nbf.v4.new_code_cell("x = 2"),
+        nbf.v4.new_code_cell("grader.check(\"q1\")"),
+        nbf.v4.new_code_cell("import os\nos._exit(1)"),
+    ])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> assert x == 2")
+    write_ok_test(os.path.join(test_dir, "q2.py"), ">>> assert x == 3")
+
+    results = grade_notebook(
+        subm_path,
+        test_dir=test_dir,
+        tests_glob=sorted(glob(os.path.join(test_dir, "*.py"))),
+        ignore_errors=True,
+    )
+
+    assert isinstance(results.termination_error, DeadKernelError)
+    assert sorted(results.test_files) == ["q1", "q2"]
+    assert results.get_score("q1") == 1
+    assert results.get_score("q2") == 0
+    assert results.results["q2"].test_case_results[0].message == UNREACHED_MESSAGE
+
+
+def test_kernel_restart(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebook`` restarts the kernel and continues grading when the
+    kernel dies.
+    """
+    nb = nbf.v4.new_notebook(cells=[
+        nbf.v4.new_code_cell("import otter\ngrader = otter.Notebook()"),
+        nbf.v4.new_code_cell("x = 2"),
+        nbf.v4.new_code_cell("grader.check(\"q1\")"),
+        nbf.v4.new_code_cell("import os\nos._exit(1)"),
+        nbf.v4.new_code_cell("y = 3"),
+    ])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> assert x == 2")
+    write_ok_test(os.path.join(test_dir, "q2.py"), ">>> assert y == 3")
+    write_ok_test(os.path.join(test_dir, "q3.py"), ">>> assert x == 2")
+
+    results = grade_notebook(
+        subm_path,
+        test_dir=test_dir,
+        tests_glob=sorted(glob(os.path.join(test_dir, "*.py"))),
+        ignore_errors=True,
+        seed=42,
+        max_kernel_restarts=1,
+    )
+
+    assert results.termination_error is None
+    assert results.kernel_crashes == [KernelCrash(cell_index=3, message="Kernel died")]
+    assert "crashed 1 time(s)" in results.output
+
+    # the result of q1 was streamed before the crash, and x was lost when the kernel restarted
+    assert results.get_score("q1") == 1
+    assert results.get_score("q2") == 1
+    assert results.get_score("q3") == 0
+
+    crashed_cell = next(c for c in results.notebook.cells if "os._exit" in c.source)
+    assert crashed_cell.outputs[-1].text == KERNEL_CRASH_MESSAGE
+
+
+@pytest.mark.parametrize("rules, expected_message", [
+    ({"abort_on_critical_error": True}, "A cell tagged otter_critical raised ModuleNotFoundError"),
+    ({"max_consecutive_errors": 2}, "2 consecutive cells raised errors"),
+])
+def test_fail_fast_rules(rules, expected_message, temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebook`` stops executing a submission when a fail-fast rule
+    is triggered and fails the tests that were not run.
+    """
+    setup_cell = nbf.v4.new_code_cell("import otter\ngrader = otter.Notebook()\nx = 2")
+    import_cell = nbf.v4.new_code_cell("import not_a_real_module")
+    import_cell.metadata["tags"] = ["otter_critical"]
+    nb = nbf.v4.new_notebook(cells=[
+        setup_cell,
+        nbf.v4.new_code_cell("grader.check(\"q1\")"),
+        import_cell,
+        nbf.v4.new_code_cell("not_a_real_module.foo()"),
+        nbf.v4.new_code_cell("x = 3"),
+    ])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> assert x == 2")
+    write_ok_test(os.path.join(test_dir, "q2.py"), ">>> assert x == 2")
+
+    results = grade_notebook(
+        subm_path,
+        test_dir=test_dir,
+        tests_glob=sorted(glob(os.path.join(test_dir, "*.py"))),
+        ignore_errors=True,
+        **rules,
+    )
+
+    assert isinstance(results.termination_error, GradingAbortedError)
+    assert str(results.termination_error).startswith(expected_message)
+    assert results.get_score("q1") == 1
+    assert results.get_score("q2") == 0
+    assert results.results["q2"].test_case_results[0].message == ABORTED_MESSAGE
+
+    # the cells after the one that triggered the rule are not executed
+    assert results.notebook.cells[-2].execution_count is None
+
+
+def test_output_limits(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebook`` truncates and discards outputs when indicated.
+    """
+    nb = nbf.v4.new_notebook(cells=[
+        nbf.v4.new_code_cell("for i in range(10000):\n    print(i)"),
+        nbf.v4.new_code_cell("print('a' * 10)"),
+        nbf.v4.new_code_cell("print('b' * 1000)"),
+    ])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    def get_outputs(results):
+        outputs = {}
+        for cell in results.notebook.cells:
+            idx = cell.metadata.get("otter", {}).get("cell_index")
+            if idx is not None:
+                outputs[idx] = [(o.name, o.text) for o in cell.outputs]
+        return outputs
+
+    results = grade_notebook(
+        subm_path,
+        test_dir=temp_dir,
+        ignore_errors=False,
+        max_cell_output_size=100,
+        max_output_size=200,
+    )
+
+    outputs = get_outputs(results)
+    assert "".join(t for n, t in outputs[0] if n == "stdout") == \
+        "".join(f"{i}\n" for i in range(10000))[:100]
+    assert outputs[0][-1] == \
+        ("stderr", "\n[Output truncated: exceeded the limit of 100 characters per cell]\n")
+    assert outputs[1] == [("stdout", "a" * 10 + "\n")]
+    assert outputs[2] == [
+        ("stdout", "b" * 89),
+        ("stderr", "\n[Output truncated: exceeded the limit of 200 characters per notebook]\n"),
+    ]
+
+    results = grade_notebook(subm_path, test_dir=temp_dir, ignore_errors=False, discard_outputs=True)
+    assert all(cell.get("outputs", []) == [] for cell in results.notebook.cells)
+
+
+def test_grade_notebooks_async(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebooks_async`` grades submissions concurrently.
+    """
+    subm_paths = []
+    for i in range(3):
+        nb = nbf.v4.new_notebook(cells=[nbf.v4.new_code_cell(f"import time\ntime.sleep(1)\nx = {i}")])
+        subm_paths.append(os.path.join(temp_dir, f"submission{i}.ipynb"))
+        nbf.write(nb, subm_paths[-1])
+
+    subm_paths.append(os.path.join(temp_dir, "missing.ipynb"))
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> x % 2 == 0\nTrue")
+
+    async def grade_all():
+        return [r async for r in grade_notebooks_async(
+            subm_paths,
+            max_concurrency=3,
+            test_dir=test_dir,
+            tests_glob=glob(os.path.join(test_dir, "*.py")),
+            ignore_errors=False,
+        )]
+
+    results = dict(asyncio.run(grade_all()))
+
+    assert set(results) == set(subm_paths)
+    assert [results[p].get_score("q1") for p in subm_paths[:3]] == [1, 0, 1]
+    assert isinstance(results[subm_paths[3]]._catastrophic_error, FileNotFoundError)
+
+
+def test_grade_notebooks_async_setup_overlaps(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebooks_async`` sets up graders outside of the event loop so
+    that the setup of concurrent gradings overlaps.
+    """
+    subm_paths = []
+    for i in range(2):
+        nb = nbf.v4.new_notebook(cells=[nbf.v4.new_code_cell(f"x = {i}")])
+        subm_paths.append(os.path.join(temp_dir, f"submission{i}.ipynb"))
+        nbf.write(nb, subm_paths[-1])
+
+    intervals = []
+    init = _NotebookGrader.__init__
+    def slow_init(self, *args, **kwargs):
+        start = time.monotonic()
+        time.sleep(1)
+        init(self, *args, **kwargs)
+        intervals.append((start, time.monotonic()))
+
+    async def grade_all():
+        return [r async for r in grade_notebooks_async(
+            subm_paths, max_concurrency=2, test_dir=temp_dir)]
+
+    with mock.patch.object(_NotebookGrader, "__init__", slow_init):
+        results = dict(asyncio.run(grade_all()))
+
+    assert set(results) == set(subm_paths)
+    assert all(r._catastrophic_error is None for r in results.values())
+    assert len(intervals) == 2
+    (start1, end1), (start2, end2) = sorted(intervals)
+    assert start2 < end1
+
+
+def test_grade_notebooks_with_shared_prefixes(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebooks_with_shared_prefixes`` executes the cells shared by
+    submissions once.
+    """
+    counter_path = os.path.join(temp_dir, "counter.txt")
+    prefix_cell = nbf.v4.new_code_cell(f"with open({counter_path!r}, 'a') as f:\n    f.write('x')")
+
+    subm_paths = []
+    for i, cells in enumerate([
+        ["x = 0", "print(x)"],
+        ["x = 1", "x"],
+        ["x = 2", "1 / 0"],
+    ]):
+        nb = nbf.v4.new_notebook(
+            cells=[prefix_cell] + [nbf.v4.new_code_cell(source) for source in cells])
+        subm_paths.append(os.path.join(temp_dir, f"submission{i}.ipynb"))
+        nbf.write(nb, subm_paths[-1])
+
+    subm_paths.append(os.path.join(temp_dir, "missing.ipynb"))
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> x % 2 == 0\nTrue")
+
+    results = grade_notebooks_with_shared_prefixes(
+        subm_paths,
+        test_dir = test_dir,
+        tests_glob = glob(os.path.join(test_dir, "*.py")),
+        seed = 42,
+    )
+
+    with open(counter_path) as f:
+        assert f.read() == "x"
+
+    assert list(results) == subm_paths
+    assert [results[p].get_score("q1") for p in subm_paths[:3]] == [1, 0, 1]
+    assert isinstance(results[subm_paths[3]]._catastrophic_error, FileNotFoundError)
+
+    # the last cell of each submission is followed by the cell that exports the results
+    outputs = [results[p].notebook.cells[-2].outputs for p in subm_paths[:3]]
+    assert outputs[0] == [nbf.v4.new_output("stream", name="stdout", text="0\n")]
+    assert outputs[1][0]["data"]["text/plain"] == "1"
+    assert outputs[2][0]["ename"] == "ZeroDivisionError"
+
+
+def test_grade_notebooks_with_shared_prefixes_shared_cwd(temp_dir):
+    """
+    Tests that the submissions graded by ``otter.execute.grade_notebooks_with_shared_prefixes``
+    share the working directory after they diverge.
+    """
+    subm_paths = []
+    for i, source in enumerate([
+        "with open('out.txt', 'w') as f:\n    f.write('0')",
+        "with open('out.txt') as f:\n    print(f.read())",
+    ]):
+        nb = nbf.v4.new_notebook(
+            cells=[nbf.v4.new_code_cell("x = 0"), nbf.v4.new_code_cell(source)])
+        subm_paths.append(os.path.join(temp_dir, f"submission{i}.ipynb"))
+        nbf.write(nb, subm_paths[-1])
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> True\nTrue")
+
+    results = grade_notebooks_with_shared_prefixes(
+        subm_paths,
+        max_workers = 1,
+        cwd = temp_dir,
+        test_dir = test_dir,
+        tests_glob = glob(os.path.join(test_dir, "*.py")),
+    )
+
+    # the second submission reads the file written by the first
+    assert results[subm_paths[1]].notebook.cells[-2].outputs == \
+        [nbf.v4.new_output("stream", name="stdout", text="0\n")]
+    assert os.path.isfile(os.path.join(temp_dir, "out.txt"))
+
+
+def test_grade_notebooks_with_shared_prefixes_zygote_exit(temp_dir):
+    """
+    Tests that ``otter.execute.grade_notebooks_with_shared_prefixes`` fails only the submissions
+    that were not executed when the zygote exits with an error.
+    """
+    nb = nbf.v4.new_notebook(cells=[nbf.v4.new_code_cell("import os\nos._exit(1)")])
+    subm_path = os.path.join(temp_dir, "submission.ipynb")
+    nbf.write(nb, subm_path)
+
+    test_dir = os.path.join(temp_dir, "tests")
+    os.makedirs(test_dir)
+
+    write_ok_test(os.path.join(test_dir, "q1.py"), ">>> True\nTrue")
+
+    results = grade_notebooks_with_shared_prefixes(
+        [subm_path],
+        test_dir = test_dir,
+        tests_glob = glob(os.path.join(test_dir, "*.py")),
+    )
+
+    assert isinstance(results[subm_path]._catastrophic_error, RuntimeError)
+
+    with pytest.raises(ValueError, match="results_stream_path"):
+        grade_notebooks_with_shared_prefixes(
+            [subm_path], test_dir=test_dir, results_stream_path=os.path.join(temp_dir, "s.pkl"))
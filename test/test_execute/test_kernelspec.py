@@ -0,0 +1,43 @@
+"""Tests for ``otter.execute.kernelspec``"""
+
+import pytest
+
+from jupyter_client.kernelspec import NoSuchKernel
+from unittest import mock
+
+from otter.execute import kernelspec
+from otter.execute.kernelspec import (
+    CachedKernelSpecKernelManager,
+    clear_kernel_spec_cache,
+    resolve_kernel_spec,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_kernel_spec_cache()
+    yield
+    clear_kernel_spec_cache()
+
+
+def test_resolve_kernel_spec():
+    """
+    Tests that kernelspecs are only resolved once per process.
+    """
+    with mock.patch.object(
+        kernelspec, "_find_kernel_spec", wraps=kernelspec._find_kernel_spec,
+    ) as mocked_find:
+        spec = resolve_kernel_spec("python3")
+        assert "ipykernel_launcher" in spec.argv
+
+        # changes to the returned kernelspec don't affect the cache
+        spec.argv.append("--foo")
+        assert resolve_kernel_spec("python3").argv == spec.argv[:-1]
+
+        km = CachedKernelSpecKernelManager(kernel_name="python3")
+        assert km.kernel_spec.argv == spec.argv[:-1]
+
+        mocked_find.assert_called_once_with("python3")
+
+        with pytest.raises(NoSuchKernel):
+            resolve_kernel_spec("no-such-kernel")
@@ -0,0 +1,124 @@
+"""Tests for ``otter.execute.logging``"""
+
+import logging
+import subprocess
+import sys
+import time
+
+from unittest import mock
+
+from otter.execute.logging import get_shared_server_address, LogRecordStreamHandler, start_server
+from otter.utils import _BatchingSocketHandler, loggers
+
+
+def wait_for_calls(m, n, timeout=5):
+    start = time.time()
+    while m.call_count < n and time.time() - start < timeout:
+        time.sleep(0.01)
+
+
+@mock.patch.object(LogRecordStreamHandler, "handle_log_record")
+def test_batched_records_received(mocked_handle_log_record):
+    """
+    Tests that batches of records sent by ``otter.utils._BatchingSocketHandler`` are received and
+    that stopping the server is immediate.
+    """
+    (host, port), stop_server = start_server()
+
+    handler = _BatchingSocketHandler(host, port, capacity=3)
+    logger = logging.getLogger("otter.test.logging")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+
+    try:
+        logger.info("one")
+        logger.info("two")
+        assert mocked_handle_log_record.call_count == 0
+
+        logger.info("three")
+        logger.info("four")
+        wait_for_calls(mocked_handle_log_record, 3)
+        assert [c.args[0].getMessage() for c in mocked_handle_log_record.call_args_list] == \
+            ["one", "two", "three"]
+
+        handler.flush()
+        wait_for_calls(mocked_handle_log_record, 4)
+        assert mocked_handle_log_record.call_args_list[-1].args[0].getMessage() == "four"
+
+        # records at or above the flush level are sent immediately
+        logger.error("five")
+        wait_for_calls(mocked_handle_log_record, 5)
+        assert mocked_handle_log_record.call_args_list[-1].args[0].getMessage() == "five"
+
+        # buffered records are sent after the flush interval
+        logger.info("six")
+        wait_for_calls(mocked_handle_log_record, 6, timeout=handler.flush_interval + 5)
+        assert mocked_handle_log_record.call_args_list[-1].args[0].getMessage() == "six"
+
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+        start = time.time()
+        stop_server()
+        assert time.time() - start < 0.5
+
+
+def test_shared_server():
+    """
+    Tests that ``otter.execute.logging.get_shared_server_address`` reuses the same server.
+    """
+    assert get_shared_server_address() == get_shared_server_address()
+
+
+def test_flush_logs():
+    """
+    Tests that ``otter.utils.loggers.flush_logs`` flushes the socket handler.
+    """
+    with mock.patch.object(loggers, "_socket_handler") as mocked_handler:
+        loggers.flush_logs()
+        mocked_handler.flush.assert_called_once()
+
+
+@mock.patch.object(LogRecordStreamHandler, "handle_log_record")
+def test_records_received_from_killed_process(mocked_handle_log_record):
+    """
+    Tests that records buffered by ``otter.utils._BatchingSocketHandler`` are received even if the
+    process that emitted them is killed without flushing the handler.
+    """
+    (host, port), stop_server = start_server()
+    script = "\n".join([
+        "import logging, os, signal, time",
+        "from otter.utils import loggers",
+        f"loggers.send_logs({host!r}, {port})",
+        "loggers.set_level(logging.DEBUG)",
+        "logger = loggers.get_logger('otter.test.logging')",
+        "logger.info('one')",
+        "logger.debug('two')",
+        "time.sleep(2)",
+        "os.kill(os.getpid(), signal.SIGKILL)",
+    ])
+
+    try:
+        proc = subprocess.run([sys.executable, "-c", script], stderr=subprocess.DEVNULL)
+        assert proc.returncode == -9
+
+        wait_for_calls(mocked_handle_log_record, 2)
+        assert [c.args[0].getMessage() for c in mocked_handle_log_record.call_args_list] == \
+            ["one", "two"]
+
+    finally:
+        stop_server()
+
+
+def test_logs_flushed_after_each_cell():
+    """
+    Tests that the logs are flushed by the ``post_run_cell`` hook registered by
+    ``otter.execute.timing.record_cell_timings``.
+    """
+    from otter.execute.timing import _post_run_cell
+
+    with mock.patch.object(loggers, "flush_logs") as mocked_flush_logs:
+        _post_run_cell(mock.Mock(execution_count=None))
+        mocked_flush_logs.assert_called_once()
@@ -0,0 +1,63 @@
+import os
+
+from otter.execute.results_stream import (
+    append_to_results_stream,
+    read_results_stream,
+    recover_results,
+    start_results_stream,
+    UNREACHED_MESSAGE,
+)
+from otter.test_files import OKTestFile
+
+from ..utils import write_ok_test
+
+
+def make_test_files(tmp_path):
+    test_files = []
+    for name in ["q1", "q2", "q3"]:
+        path = os.path.join(tmp_path, f"{name}.py")
+        write_ok_test(path, ">>> assert x == 1")
+        test_files.append(OKTestFile.from_file(path))
+    return test_files
+
+
+def test_read_results_stream(tmp_path):
+    q1, q2, q3 = make_test_files(tmp_path)
+    stream_path = str(tmp_path / "stream.pkl")
+
+    start_results_stream(stream_path, [q1, q2, q3])
+    q1.run({"x": 1})
+    append_to_results_stream(stream_path, [q1])
+    q3.run({"x": 2})
+    append_to_results_stream(stream_path, [q3])
+
+    # simulate a record that was being written when the kernel died
+    with open(stream_path, "ab") as f:
+        f.write(b"\x80\x04\x95")
+
+    expected, run = read_results_stream(stream_path)
+    assert [tf.name for tf in expected] == ["q1", "q2", "q3"]
+    assert [tf.name for tf in run] == ["q1", "q3"]
+    assert run[0].passed_all and not run[1].passed_all
+
+
+def test_recover_results(tmp_path):
+    q1, q2, q3 = make_test_files(tmp_path)
+    stream_path = str(tmp_path / "stream.pkl")
+
+    assert recover_results(stream_path, RuntimeError("nope")) is None
+
+    start_results_stream(stream_path, [q1, q2, q3])
+    q2.run({"x": 1})
+    append_to_results_stream(stream_path, [q2])
+
+    error = RuntimeError("nope")
+    results = recover_results(stream_path, error)
+
+    assert results.termination_error is error
+    assert results.test_files == ["q1", "q2", "q3"]
+    assert results.get_score("q1") == 0
+    assert results.get_score("q2") == 1
+    assert results.get_score("q3") == 0
+    assert results.results["q3"].test_case_results[0].message == UNREACHED_MESSAGE
+    assert "RuntimeError: nope" in results.output
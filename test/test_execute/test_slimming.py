@@ -0,0 +1,52 @@
+import json
+import nbformat as nbf
+
+from otter.execute.slimming import slim_notebook, slim_notebook_file
+from otter.utils import NBFORMAT_VERSION
+
+
+def make_notebook():
+    code_cell = nbf.v4.new_code_cell("x = 1", execution_count=3, outputs=[
+        nbf.v4.new_output("display_data", data={"image/png": "a" * 100_000}),
+        nbf.v4.new_output("stream", text="hi\n"),
+    ])
+    code_cell.metadata = {"otter": {"tests": ["q1"]}, "big": "b" * 100_000, "tags": ["foo"]}
+
+    md_cell = nbf.v4.new_markdown_cell("![img](attachment:img.png)")
+    md_cell.attachments = {"img.png": {"image/png": "c" * 100}}
+
+    nb = nbf.v4.new_notebook(cells=[md_cell, code_cell])
+    nb.metadata = {
+        "kernelspec": {"name": "python3", "display_name": "Python 3", "language": "python"},
+        "otter": {"tests": {"q1": "d" * 100_000}},
+        "widgets": {"state": "e" * 100_000},
+    }
+    return nb
+
+
+def test_slim_notebook():
+    nb = slim_notebook(make_notebook())
+
+    md_cell, code_cell = nb.cells
+    assert "attachments" not in md_cell
+    assert code_cell.outputs == []
+    assert code_cell.execution_count is None
+    assert code_cell.metadata == {"otter": {"tests": ["q1"]}, "tags": ["foo"]}
+    assert set(nb.metadata) == {"kernelspec", "otter"}
+
+    nbf.validate(nb)
+
+
+def test_slim_notebook_file(tmp_path):
+    src, dst = tmp_path / "src.ipynb", tmp_path / "dst.ipynb"
+    nb = make_notebook()
+    nbf.write(nb, src)
+
+    assert slim_notebook_file(str(src), str(dst))
+    assert dst.stat().st_size < 110_000 < src.stat().st_size
+    assert nbf.read(dst, as_version=NBFORMAT_VERSION) == slim_notebook(nb)
+
+    # files that can't be parsed are copied unchanged
+    src.write_text("not a notebook")
+    assert not slim_notebook_file(str(src), str(dst))
+    assert dst.read_text() == "not a notebook"
@@ -0,0 +1,79 @@
+"""Tests for ``otter.execute.zygote``"""
+
+import multiprocessing
+import os
+import pickle
+import time
+
+from unittest import mock
+
+from otter.execute import zygote
+from otter.execute.zygote import build_prefix_tree, execute_prefix_tree
+
+
+def run_tree(tmp_path, cell_sources, max_workers, execute_cell):
+    """
+    Execute the prefix tree of ``cell_sources`` with ``execute_cell`` in place of the shell and
+    return the records written for each submission (or ``None`` if none were written).
+    """
+    records_paths = [str(tmp_path / f"{i}.pkl") for i in range(len(cell_sources))]
+    semaphore = multiprocessing.get_context("fork").Semaphore(max_workers)
+    semaphore.acquire()
+
+    with mock.patch.object(zygote, "execute_cell", side_effect=execute_cell):
+        execute_prefix_tree(None, build_prefix_tree(cell_sources), records_paths, True, semaphore)
+
+    records = []
+    for path in records_paths:
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                records.append(pickle.load(f))
+        else:
+            records.append(None)
+
+    return records
+
+
+def test_execute_prefix_tree_concurrency(tmp_path):
+    """
+    Tests that the number of processes executing cells at once is limited across the whole tree
+    instead of at each divergence.
+    """
+    ctx = multiprocessing.get_context("fork")
+    running, max_running = ctx.Value("i", 0), ctx.Value("i", 0)
+
+    def execute_cell(shell, source):
+        with running.get_lock():
+            running.value += 1
+            max_running.value = max(max_running.value, running.value)
+
+        time.sleep(0.05)
+
+        with running.get_lock():
+            running.value -= 1
+
+        return {"execution_count": 1, "outputs": [], "error": None, "source": source}
+
+    cell_sources = [
+        [f"a = {i}", f"b = {j}", f"c = {k}"] for i in range(3) for j in range(3) for k in range(3)]
+    records = run_tree(tmp_path, cell_sources, 2, execute_cell)
+
+    assert [[r["source"] for r in rs] for rs in records] == cell_sources
+    assert max_running.value == 2
+
+
+def test_execute_prefix_tree_killed_child(tmp_path):
+    """
+    Tests that the slot of a process killed by a cell is released and that the other submissions
+    are still executed.
+    """
+    def execute_cell(shell, source):
+        if source == "exit":
+            os._exit(1)
+        return {"execution_count": 1, "outputs": [], "error": None, "source": source}
+
+    cell_sources = [["a = 1", "exit"], ["a = 1", "b = 1"], ["a = 1", "b = 2"]]
+    records = run_tree(tmp_path, cell_sources, 1, execute_cell)
+
+    assert records[0] is None
+    assert [[r["source"] for r in rs] for rs in records[1:]] == cell_sources[1:]
@@ -118,3 +118,9 @@ def test_load_notebook():
 
     # check file contents
     assert filecmp.cmp(FILE_MANAGER.get_path("output.ipynb"), FILE_MANAGER.get_path(f"correct/{test_file}.ipynb"))
+
+    # check that an already-loaded notebook is filtered without being modified
+    orig_nb = nbformat.read(FILE_MANAGER.get_path(f"{test_file}.ipynb"), as_version=4)
+    nb = nbformat.read(FILE_MANAGER.get_path(f"{test_file}.ipynb"), as_version=4)
+    assert BaseExporter.load_notebook("", filtering=True, notebook=nb) == node
+    assert nb == orig_nb
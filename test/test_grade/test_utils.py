@@ -0,0 +1,62 @@
+"""Tests for ``otter.grade.utils``"""
+
+import math
+
+from otter.execute.resources import ResourceUsage
+from otter.grade.utils import (
+    merge_csv,
+    merge_scores_to_df,
+    POINTS_POSSIBLE_LABEL,
+    SCORES_DICT_CHILD_PROCESSES_KEY,
+    SCORES_DICT_CPU_TIME_KEY,
+    SCORES_DICT_PEAK_MEMORY_KEY,
+    summarize_resource_usage,
+)
+from otter.test_files import GradingResults, OKTestFile
+
+
+def make_results(file, peak_rss=None):
+    tf = OKTestFile.from_spec({
+        "name": "q1",
+        "points": 1,
+        "suites": [{"type": "doctest", "cases": [{"code": ">>> assert x == 1"}]}],
+    })
+    tf.run({"x": 1})
+
+    results = GradingResults([tf])
+    results.file = file
+    if peak_rss is not None:
+        results.resource_usage = \
+            ResourceUsage(peak_rss=peak_rss, cpu_time=peak_rss / 2 ** 20, num_child_processes=1)
+
+    return results
+
+
+def test_resource_usage():
+    """
+    Tests that the resources used to grade each submission are included in the scores dataframe
+    and summarized.
+    """
+    scores = [make_results(f"subm{i}", peak_rss=i * 2 ** 20) for i in range(1, 21)]
+    scores.append(make_results("subm21"))
+
+    df = merge_csv(merge_scores_to_df(scores))
+
+    assert df.loc[df["file"] == "subm3", SCORES_DICT_PEAK_MEMORY_KEY].item() == 3
+    assert df.loc[df["file"] == POINTS_POSSIBLE_LABEL, SCORES_DICT_CPU_TIME_KEY].item() == "NA"
+    assert math.isnan(df.loc[df["file"] == "subm21", SCORES_DICT_CHILD_PROCESSES_KEY].item())
+
+    assert summarize_resource_usage(df) == (
+        "Resource usage across submissions:\n"
+        "    peak_memory_mb: max=20, p95=19.05\n"
+        "    cpu_seconds: max=20, p95=19.05\n"
+        "    child_processes: max=1, p95=1"
+    )
+
+
+def test_no_resource_usage():
+    """
+    Tests that no summary is generated if no resource usage was recorded.
+    """
+    df = merge_csv(merge_scores_to_df([make_results("subm1")]))
+    assert summarize_resource_usage(df) is None
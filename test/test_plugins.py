@@ -0,0 +1,51 @@
+"""Tests for ``otter.plugins``"""
+
+import os
+import threading
+
+from otter.plugins import AbstractOtterPlugin, PluginCollection
+
+
+class WorkingDirPlugin(AbstractOtterPlugin):
+    """
+    A plugin that records the working directory of each event.
+    """
+
+    def before_grading(self, working_dirs):
+        working_dirs.append(os.getcwd())
+
+    def before_execution(self, submission):
+        return os.getcwd()
+
+
+def test_working_dir(tmp_path):
+    """
+    Tests that plugin events are run in the collection's working directory.
+    """
+    cwd = os.getcwd()
+    plugin_name = f"{__name__}.WorkingDirPlugin"
+
+    working_dirs = []
+    PluginCollection([plugin_name], "", {}).run("before_grading", working_dirs)
+    assert working_dirs == [cwd]
+
+    dirs = [tmp_path / f"subm{i}" for i in range(4)]
+    collections = []
+    for d in dirs:
+        d.mkdir()
+        collections.append(PluginCollection([plugin_name], "", {}, working_dir=str(d)))
+
+    # collections in different threads don't change the working directory at the same time
+    results = [[] for _ in dirs]
+    threads = [
+        threading.Thread(target=lambda c, r: [c.run("before_grading", r) for _ in range(20)],
+            args=(c, r))
+        for c, r in zip(collections, results)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [[os.path.realpath(d)] * 20 for d in dirs]
+    assert collections[0].before_execution(None) == os.path.realpath(dirs[0])
+    assert os.getcwd() == cwd
@@ -8,13 +8,14 @@ import os
 import pytest
 import re
 import shutil
+import threading
 
 from contextlib import contextmanager, nullcontext
 from textwrap import dedent
 from unittest import mock
 
 from otter.generate.token import APIClient
-from otter.run.run_autograder import main as run_autograder
+from otter.run.run_autograder import capture_run_output, main as run_autograder
 from otter.run.run_autograder.utils import OtterRuntimeError
 from otter.utils import NBFORMAT_VERSION
 
@@ -35,6 +36,7 @@ def cleanup_output(cleanup_enabled):
         delete_paths([
             FILE_MANAGER.get_path("autograder/results/results.json"),
             FILE_MANAGER.get_path("autograder/results/results.pkl"),
+            FILE_MANAGER.get_path("autograder/results/results_stream.pkl"),
             FILE_MANAGER.get_path("autograder/__init__.py"),
             FILE_MANAGER.get_path("autograder/submission/test"),
             FILE_MANAGER.get_path("autograder/submission/tests"),
@@ -239,6 +241,103 @@ def test_notebook(load_config, expected_results):
         f"Actual results did not matched expected:\n{actual_results}"
 
 
+def test_concurrent_runs(load_config, expected_results, tmp_path, capsys):
+    """
+    Tests that submissions can be graded in the same process by concurrent threads, each of which
+    captures its own output.
+    """
+    config = load_config()
+    ag_dirs = [tmp_path / f"autograder{i}" for i in range(2)]
+    for ag_dir in ag_dirs:
+        shutil.copytree(FILE_MANAGER.get_path("autograder"), ag_dir)
+
+    outputs, errors = {}, []
+    def grade(ag_dir):
+        try:
+            with capture_run_output() as output:
+                run_autograder(str(ag_dir))
+            outputs[ag_dir] = output.getvalue()
+        except Exception as e:
+            errors.append(e)
+
+    cwd = os.getcwd()
+    threads = [threading.Thread(target=grade, args=(ag_dir,)) for ag_dir in ag_dirs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert os.getcwd() == cwd
+    assert capsys.readouterr().out == ""
+    for ag_dir in ag_dirs:
+        assert "Total Score" in outputs[ag_dir]
+        with open(ag_dir / "results" / "results.json") as f:
+            actual_results = json.load(f)
+
+        assert actual_results == expected_results, \
+            f"Actual results did not matched expected:\n{actual_results}"
+
+
+def test_tests_only(tmp_path):
+    """
+    Tests that submissions graded from their environment snapshots in ``tests_only`` mode run their
+    tests in the submission directory, like submissions that are executed.
+    """
+    ag_dir = tmp_path / "autograder"
+    shutil.copytree(FILE_MANAGER.get_path("autograder"), ag_dir)
+
+    with open(ag_dir / "source" / "tests" / "q8.py", "w") as f:
+        f.write(dedent("""\
+            OK_FORMAT = True
+
+            test = {
+                "name": "q8",
+                "points": 1,
+                "suites": [
+                    {
+                        "cases": [
+                            {
+                                "code": ">>> open('data.csv').read().strip()\\n'1,2'",
+                                "hidden": False,
+                            },
+                        ],
+                        "scored": True,
+                        "setup": "",
+                        "teardown": "",
+                        "type": "doctest",
+                    },
+                ],
+            }
+        """))
+
+    with open(ag_dir / "submission" / "data.csv", "w") as f:
+        f.write("1,2\n")
+
+    config_path = ag_dir / "source" / "otter_config.json"
+    with open(config_path) as f:
+        config = json.load(f)
+
+    config.pop("plugins")
+    config.pop("token")
+
+    all_results = []
+    for key in ["save_environment_snapshot", "tests_only"]:
+        with open(config_path, "w") as f:
+            json.dump({**config, key: True}, f)
+
+        with capture_run_output() as output:
+            run_autograder(str(ag_dir))
+
+        with open(ag_dir / "results" / "results.json") as f:
+            all_results.append(json.load(f))
+
+    assert "No environment snapshot found" not in output.getvalue()
+    for results in all_results:
+        assert {"name": "q8", "score": 1.0, "max_score": 1.0, "visibility": "hidden",
+            "output": "q8 results: All test cases passed!"} in results["tests"]
+
+
 @mock.patch("otter.run.run_autograder.runners.python_runner.export_notebook")
 def test_pdf_generation_failure(mocked_export, get_config_path, load_config, expected_results):
     config = load_config()
@@ -289,7 +388,7 @@ def test_use_submission_pdf(
         config["course_id"],
         config["assignment_id"],
         "student@univ.edu", # from submission_metadata.json in autograder dir
-        "fails2and6H.pdf",
+        os.path.abspath(FILE_MANAGER.get_path("autograder/submission/fails2and6H.pdf")),
     )
     assert actual_results == expected_results, \
         f"Actual results did not matched expected:\n{actual_results}"
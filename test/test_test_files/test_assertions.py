@@ -0,0 +1,128 @@
+"""Tests for ``otter.test_files.assertions``"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from textwrap import dedent
+
+from otter.test_files import ExceptionTestFile, OKTestFile
+from otter.test_files.assertions import (
+    assert_array_close,
+    assert_frame_close,
+    assert_series_close,
+)
+
+
+def test_assert_array_close():
+    a = np.arange(10 ** 6, dtype=float)
+    b = a.copy()
+    assert_array_close(a, b + 1e-9, atol=1e-8)
+
+    b[[3, 7, 500_000]] += 1
+    with pytest.raises(AssertionError) as excinfo:
+        assert_array_close(a, b, max_reported=2)
+
+    assert str(excinfo.value) == dedent("""\
+        Arrays are not close (rtol=1e-07, atol=0): 3 of 1000000 elements differ (0.0003%)
+        First 2 mismatches:
+            at 3: actual 3.0, expected 4.0
+            at 7: actual 7.0, expected 8.0""")
+
+    with pytest.raises(AssertionError, match=r"at \(0, 3\): actual 3.0, expected 4.0"):
+        assert_array_close(a.reshape(1000, 1000), b.reshape(1000, 1000))
+
+    with pytest.raises(AssertionError, match=r"^Shape mismatch: actual \(2,\), expected \(3,\)$"):
+        assert_array_close([1, 2], [1, 2, 3])
+
+    with pytest.raises(AssertionError, match=r"^Dtype mismatch: actual int64, expected float64$"):
+        assert_array_close(np.array([1, 2]), np.array([1., 2.]), check_dtype=True)
+
+    assert_array_close([1, np.nan], [1, np.nan])
+    with pytest.raises(AssertionError):
+        assert_array_close([1, np.nan], [1, np.nan], equal_nan=False)
+
+    with pytest.raises(AssertionError, match="at 1: actual 'b', expected 'c'"):
+        assert_array_close(np.array(["a", "b"]), np.array(["a", "c"]))
+
+
+def test_assert_series_close():
+    s = pd.Series([1., 2., np.nan], index=["a", "b", "c"], name="x")
+    assert_series_close(s, s.copy())
+    assert_series_close(s, s.rename("y"))
+
+    with pytest.raises(AssertionError, match="^Name mismatch: actual 'x', expected 'y'$"):
+        assert_series_close(s, s.rename("y"), check_name=True)
+
+    with pytest.raises(AssertionError, match="^Index mismatch: 3 of 3 elements differ"):
+        assert_series_close(s, s.reset_index(drop=True))
+
+    assert_series_close(s, s.reset_index(drop=True), check_index=False)
+
+    with pytest.raises(AssertionError, match="at 'b': actual 2.0, expected 3.0"):
+        assert_series_close(s, pd.Series([1., 3., np.nan], index=["a", "b", "c"]))
+
+    with pytest.raises(AssertionError, match="^Expected a Series but got list$"):
+        assert_series_close([1., 2., np.nan], s)
+
+
+def test_assert_frame_close():
+    df = pd.DataFrame({"x": [1., 2., np.nan], "y": ["a", "b", "c"]}, index=[10, 11, 12])
+    assert_frame_close(df, df.copy())
+
+    other = df.copy()
+    other.loc[11, "x"] = 2.5
+    other.loc[12, "y"] = "z"
+    with pytest.raises(AssertionError) as excinfo:
+        assert_frame_close(df, other)
+
+    assert str(excinfo.value) == dedent("""\
+        DataFrames are not close (rtol=1e-07, atol=0): 2 of 6 values differ (33.3333%)
+        First 2 mismatches:
+            at column 'x', index 11: actual 2.0, expected 2.5
+            at column 'y', index 12: actual 'c', expected 'z'""")
+
+    with pytest.raises(AssertionError, match=r"^Shape mismatch: actual \(3, 2\), expected \(2, 2\)$"):
+        assert_frame_close(df, df.iloc[:2])
+
+    with pytest.raises(AssertionError, match="^Columns mismatch"):
+        assert_frame_close(df, df[["y", "x"]])
+
+    assert_frame_close(df, df[["y", "x"]], check_column_order=False)
+
+    with pytest.raises(AssertionError, match=r"^Column mismatch: missing \['z'\], unexpected \['y'\]$"):
+        assert_frame_close(df, df.rename(columns={"y": "z"}), check_column_order=False)
+
+
+def test_usable_in_test_files():
+    df = pd.DataFrame({"x": [1., 2.]})
+
+    ok_test = OKTestFile.from_spec({
+        "name": "q1",
+        "points": 1,
+        "suites": [{"type": "doctest", "cases": [{"code": dedent("""\
+            >>> import pandas as pd
+            >>> from otter.test_files.assertions import assert_frame_close
+            >>> assert_frame_close(df, pd.DataFrame({"x": [1., 2.]}))
+        """)}]}],
+    })
+    ok_test.run({"df": df})
+    assert ok_test.passed_all
+
+    exception_test = ExceptionTestFile.from_string(dedent("""\
+        import pandas as pd
+        from otter.test_files import test_case
+        from otter.test_files.assertions import assert_frame_close
+
+        OK_FORMAT = False
+
+        name = "q1"
+
+        @test_case(points=1)
+        def test_1(df):
+            assert_frame_close(df, pd.DataFrame({"x": [1., 3.]}))
+    """))
+    exception_test.run({"df": df})
+    assert not exception_test.passed_all
+    assert "at column 'x', index 1: actual 2.0, expected 3.0" in \
+        exception_test.test_case_results[0].message
@@ -0,0 +1,157 @@
+"""Tests for ``otter.test_files.create_test_file``"""
+
+import os
+import pytest
+
+from textwrap import dedent
+from unittest import mock
+
+from otter import test_files
+from otter.nbmeta_config import NBMetadataConfig
+from otter.test_files import (
+    clear_test_file_cache,
+    create_test_file,
+    ExceptionTestFile,
+    NotebookMetadataOKTestFile,
+    OKTestFile,
+)
+
+from ..utils import write_ok_test
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_test_file_cache()
+    yield
+    clear_test_file_cache()
+
+
+def write_exception_test(path, body):
+    with open(path, "w+") as f:
+        f.write(dedent(f"""\
+            from otter.test_files import test_case
+
+            OK_FORMAT = False
+
+            name = "q1"
+
+            @test_case(points=1)
+            def test_1(x):
+                {body}
+        """))
+
+
+class TestCreateTestFile:
+    """
+    Tests for ``otter.test_files.create_test_file``.
+    """
+
+    def test_ok_test_parsed_once(self, tmp_path):
+        path = os.path.join(tmp_path, "q1.py")
+        write_ok_test(path, ">>> assert x == 1")
+
+        with mock.patch.object(
+                test_files, "_parse_test_file", wraps=test_files._parse_test_file) as m:
+            tf1 = create_test_file(path, NBMetadataConfig())
+            tf2 = create_test_file(path, NBMetadataConfig())
+
+        m.assert_called_once_with(path)
+        assert isinstance(tf1, OKTestFile) and isinstance(tf2, OKTestFile)
+        assert tf1 is not tf2
+        assert tf1.test_cases == tf2.test_cases
+
+        # results are not shared between test files created from the cache
+        tf1.run({"x": 1})
+        assert tf1.score == 1
+        assert tf2.test_case_results == []
+
+        tf2.run({"x": 2})
+        assert tf1.score == 1 and tf2.score == 0
+
+    def test_exception_test_compiled_once(self, tmp_path):
+        path = os.path.join(tmp_path, "q1.py")
+        write_exception_test(path, "assert x == 1")
+
+        with mock.patch("otter.test_files.compile", create=True, wraps=compile) as m:
+            tf1 = create_test_file(path, NBMetadataConfig())
+            tf2 = create_test_file(path, NBMetadataConfig())
+
+        assert m.call_count == 1
+        assert isinstance(tf1, ExceptionTestFile)
+        assert tf1.source == tf2.source
+
+        tf1.run({"x": 1})
+        tf2.run({"x": 2})
+        assert tf1.score == 1 and tf2.score == 0
+        assert "Error at line 9 in test q1" in tf2.test_case_results[0].message
+
+    def test_exception_test_module_state(self, tmp_path):
+        """
+        Tests that the module-level state of an exception-based test file is not shared between
+        the test files created from the cache.
+        """
+        path = os.path.join(tmp_path, "q1.py")
+        with open(path, "w+") as f:
+            f.write(dedent("""\
+                from otter.test_files import test_case
+
+                OK_FORMAT = False
+
+                name = "q1"
+
+                calls = []
+
+                @test_case(points=1)
+                def test_1(x):
+                    calls.append(x)
+                    assert len(calls) == 1
+            """))
+
+        tf1 = create_test_file(path, NBMetadataConfig())
+        tf1.run({"x": 1})
+        tf2 = create_test_file(path, NBMetadataConfig())
+        tf2.run({"x": 2})
+
+        assert tf1.score == 1 and tf2.score == 1
+        assert tf1.test_cases[0].body is not tf2.test_cases[0].body
+        assert tf2.test_cases[0].body.test_func.__globals__["calls"] == [2]
+
+    def test_cache_invalidated_on_change(self, tmp_path):
+        path = os.path.join(tmp_path, "q1.py")
+        write_ok_test(path, ">>> assert x == 1")
+        tf = create_test_file(path, NBMetadataConfig())
+        tf.run({"x": 2})
+        assert tf.score == 0
+
+        write_ok_test(path, ">>> assert x == 2  # changed")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        tf = create_test_file(path, NBMetadataConfig())
+        tf.run({"x": 2})
+        assert tf.score == 1
+
+    def test_notebook_metadata_test(self):
+        spec = {
+            "name": "q1",
+            "points": 1,
+            "suites": [{"cases": [{"code": ">>> assert x == 1"}], "type": "doctest"}],
+        }
+        nbmeta_config = NBMetadataConfig({"tests": {"q1": spec}, "OK_FORMAT": True})
+
+        tf1 = create_test_file("nb.ipynb", nbmeta_config, test_name="q1")
+        tf2 = create_test_file("nb.ipynb", nbmeta_config, test_name="q1")
+
+        assert isinstance(tf1, NotebookMetadataOKTestFile)
+        assert tf1 is not tf2
+
+        with pytest.raises(ValueError, match="Test q2 not found"):
+            create_test_file("nb.ipynb", nbmeta_config, test_name="q2")
+
+    def test_missing_ok_format(self, tmp_path):
+        path = os.path.join(tmp_path, "q1.py")
+        with open(path, "w+") as f:
+            f.write("test = {}")
+
+        with pytest.raises(RuntimeError, match="does not define the global variable"):
+            create_test_file(path, NBMetadataConfig())
@@ -0,0 +1,275 @@
+"""Tests for ``otter.test_files.exception_test``"""
+
+import os
+
+from textwrap import dedent
+
+from otter.test_files import ExceptionTestFile
+from otter.test_files.exception_test import (
+    clear_fixture_values, load_fixture_values, write_fixture_values)
+
+
+class TestExceptionTestFile:
+    """
+    Tests for ``otter.test_files.exception_test.ExceptionTestFile``.
+    """
+
+    def test_timeout(self):
+        tf = ExceptionTestFile.from_string(dedent("""\
+            from otter.test_files import test_case
+
+            OK_FORMAT = False
+
+            name = "q1"
+
+            @test_case(points=1, timeout=0.2)
+            def test_1(f):
+                f()
+
+            @test_case(points=1)
+            def test_2(x):
+                assert x == 1
+        """), path="q1.py")
+
+        def f():
+            while True:
+                try:
+                    pass
+                except Exception:
+                    pass
+
+        tf.run({"f": f, "x": 1})
+
+        assert [tcr.passed for tcr in tf.test_case_results] == [False, True]
+        assert tf.test_case_results[0].message == \
+            "❌ Test case failed\nTest case timed out after 0.2 seconds"
+        assert tf.test_case_results[0].wall_time < 1
+        assert tf.test_cases[0].timeout == 0.2
+
+    def test_parametrized_test_case(self):
+        tf = ExceptionTestFile.from_string(dedent("""\
+            import pandas as pd
+
+            from otter.test_files import parametrized_test_case, test_case
+
+            OK_FORMAT = False
+
+            name = "q1"
+
+            points = 6
+
+            @parametrized_test_case(
+                inputs = {"x": list(range(10)), "y": [1] * 10},
+                expected = [x ** 2 + 1 for x in range(10)],
+                prorate = True,
+            )
+            def test_1(f, x, y):
+                return f(x) + y
+
+            @parametrized_test_case(
+                inputs = pd.DataFrame({"x": [0.5, 1.5, 2.5]}),
+                expected = [0.25, 2.25, 6.25],
+                vectorized = True,
+                points = 2,
+            )
+            def test_2(h, x):
+                return h(x)
+
+            @parametrized_test_case(inputs=[{"x": 1}, {"x": 0}])
+            def test_3(g, x):
+                assert g(x) > 0, "not positive"
+        """), path="q1.py")
+
+        def f(x):
+            if x == 7:
+                raise ValueError("no sevens")
+            return x ** 2 if x != 3 else 10
+
+        tf.run({"f": f, "g": lambda x: x, "h": lambda x: x ** 2})
+
+        assert [tc.points for tc in tf.test_cases] == [2, 2, 2]
+        assert [tcr.passed for tcr in tf.test_case_results] == [False, True, False]
+
+        tcr = tf.test_case_results[0]
+        assert tcr.message == dedent("""\
+            ❌ Test case failed
+            2 of 10 inputs failed
+            First 2 failures:
+                x=3, y=1: expected 10, got 11
+                x=7, y=1: raised ValueError: no sevens""")
+        assert tcr.partial_credit == 0.8
+        assert tcr.points_earned == 1.6
+
+        assert tf.test_case_results[1].message == "✅ Test case passed\nAll 3 inputs passed"
+        assert tf.test_case_results[2].message.endswith(
+            "x=0: raised AssertionError: not positive")
+        assert tf.test_case_results[2].points_earned == 0
+        assert tf.score == 3.6
+        assert tf.grade == 0.6
+
+    def test_fixtures(self, tmp_path):
+        source = dedent("""\
+            from otter.test_files import fixture, test_case
+
+            OK_FORMAT = False
+
+            name = "q1"
+
+            calls = []
+
+            @fixture()
+            def reference():
+                calls.append("reference")
+                return 4
+
+            @fixture(name="table", persist=True)
+            def load_table():
+                calls.append("table")
+                return [1, 2, 3]
+
+            @fixture()
+            def broken():
+                raise ValueError("nope")
+
+            @test_case(points=1)
+            def test_1(f, reference):
+                assert f(2) == reference
+
+            @test_case(points=1)
+            def test_2(reference, table):
+                assert reference == 4 and table == [1, 2, 3]
+
+            @test_case(points=1)
+            def test_3(broken):
+                pass
+        """)
+
+        clear_fixture_values()
+        tf = ExceptionTestFile.from_string(source, path="q1.py")
+        calls = tf.test_cases[0].body.test_func.__globals__["calls"]
+
+        # fixtures take precedence over global variables with the same name
+        tf.run({"f": lambda x: x ** 2, "reference": 5})
+        tf.run({"f": lambda x: x ** 2})
+
+        assert calls == ["reference", "table"]
+        assert [tcr.passed for tcr in tf.test_case_results] == [True, True, False]
+        assert tf.test_case_results[2].message == \
+            "❌ Test case failed\nError computing fixture broken in test q1: ValueError: nope"
+
+        clear_fixture_values()
+
+    def test_persisted_fixtures(self, tmp_path):
+        source = dedent("""\
+            from otter.test_files import fixture, test_case
+
+            OK_FORMAT = False
+
+            name = "q1"
+
+            calls = []
+
+            @fixture()
+            def reference():
+                calls.append("reference")
+                return 4
+
+            @fixture(name="table", persist=True)
+            def load_table():
+                calls.append("table")
+                return [1, 2, 3]
+
+            @test_case(points=1)
+            def test_1(reference, table):
+                assert reference == 4 and table == [1, 2, 3]
+        """)
+        cache_dir, values_path = tmp_path / "cache", str(tmp_path / "values.pkl")
+
+        # the grading process computes and persists the value
+        clear_fixture_values()
+        tf = ExceptionTestFile.from_string(source, path="q1.py")
+        calls = tf.test_cases[0].body.test_func.__globals__["calls"]
+        digest = write_fixture_values([tf], str(cache_dir), values_path)
+
+        assert calls == ["table"]
+        assert len(os.listdir(cache_dir)) == 1
+
+        # another grading process loads the value from the cache
+        clear_fixture_values()
+        tf = ExceptionTestFile.from_string(source, path="q1.py")
+        calls = tf.test_cases[0].body.test_func.__globals__["calls"]
+        assert write_fixture_values([tf], str(cache_dir), values_path) == digest
+        assert calls == []
+
+        # the kernel loads the values written by the grading process instead of computing them
+        clear_fixture_values()
+        load_fixture_values(values_path, digest)
+        tf.run({})
+
+        assert calls == ["reference"]
+        assert tf.test_case_results[0].passed
+
+        # values whose digest doesn't match are not loaded
+        with open(values_path, "ab") as f:
+            f.write(b"\0")
+
+        clear_fixture_values()
+        load_fixture_values(values_path, digest)
+        tf.run({})
+
+        assert calls == ["reference", "reference", "table"]
+        assert tf.test_case_results[0].passed
+
+        clear_fixture_values()
+
+    def test_fixture_copies(self):
+        tf = ExceptionTestFile.from_string(dedent("""\
+            from otter.test_files import fixture, test_case
+
+            OK_FORMAT = False
+
+            name = "q1"
+
+            import numpy as np
+            import pandas as pd
+
+            @fixture()
+            def table():
+                return [1, 2, 3]
+
+            @fixture()
+            def nested():
+                return {"a": [1]}
+
+            @fixture()
+            def arr():
+                return np.zeros(3)
+
+            @fixture()
+            def df():
+                return pd.DataFrame({"a": [0, 0]})
+
+            @test_case(points=1)
+            def test_1(table, nested, arr, df):
+                table.append(4)
+                nested["a"].append(2)
+                arr[0] = 1
+                df.loc[0, "a"] = 1
+                assert table == [1, 2, 3, 4]
+
+            @test_case(points=1)
+            def test_2(table, nested, arr, df):
+                assert table == [1, 2, 3]
+                assert nested == {"a": [1]}
+                assert arr.tolist() == [0, 0, 0]
+                assert df["a"].tolist() == [0, 0]
+        """), path="q1.py")
+
+        clear_fixture_values()
+        tf.run({})
+        tf.run({})
+
+        assert [tcr.passed for tcr in tf.test_case_results] == [True, True], \
+            [tcr.message for tcr in tf.test_case_results]
+
+        clear_fixture_values()
@@ -2,8 +2,9 @@
 
 import traceback
 
+from otter.execute.timing import CellTiming
 from otter.run.run_autograder.autograder_config import AutograderConfig
-from otter.test_files import GradingResults
+from otter.test_files import GradingResults, OKTestFile
 
 
 class TestGradingResults:
@@ -44,3 +45,33 @@ class TestGradingResults:
             ],
             "score": 0,
         }
+
+    def test_timing_data(self):
+        """
+        Tests for ``otter.test_files.GradingResults.get_timing_data`` and the inclusion of timing
+        data in the Gradescope results.
+        """
+        tf = OKTestFile.from_spec({
+            "name": "q1",
+            "points": 1,
+            "suites": [{"type": "doctest", "cases": [{"code": ">>> assert x == 1"}]}],
+        })
+        tf.run({"x": 1})
+
+        r = GradingResults([tf])
+        r.cell_timings = [CellTiming(execution_count=2, wall_time=1.5, cpu_time=1, cell_index=0)]
+
+        tcr = tf.test_case_results[0]
+        assert tcr.wall_time >= 0 and tcr.cpu_time >= 0
+
+        timing_data = r.get_timing_data()
+        assert timing_data == {
+            "cells": [{"execution_count": 2, "wall_time": 1.5, "cpu_time": 1, "cell_index": 0}],
+            "tests": {
+                "q1": [{"name": "q1 - 1", "wall_time": tcr.wall_time, "cpu_time": tcr.cpu_time}],
+            },
+        }
+
+        assert "extra_data" not in r.to_gradescope_dict(AutograderConfig())
+        assert r.to_gradescope_dict(AutograderConfig({"include_timing_data": True}))["extra_data"] \
+            == {"timing": timing_data}
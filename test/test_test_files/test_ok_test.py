@@ -0,0 +1,181 @@
+"""Tests for ``otter.test_files.ok_test``"""
+
+import signal
+import sys
+import time
+
+from unittest import mock
+
+from otter.test_files import OKTestFile, TestFile
+from otter.test_files.ok_test import run_doctest
+
+
+SPEC = {
+    "name": "q1",
+    "points": 2,
+    "suites": [
+        {
+            "type": "doctest",
+            "cases": [
+                {"code": ">>> x\n1", "hidden": False},
+                {"code": ">>> import sys\n>>> print('err', file=sys.stderr)\n>>> x + 1\n3", "hidden": False},
+            ],
+        },
+    ],
+}
+
+
+class TestOKTestFile:
+    """
+    Tests for ``otter.test_files.ok_test.OKTestFile``.
+    """
+
+    def test_run(self):
+        tf = OKTestFile.from_spec(SPEC)
+        tf.run({"x": 1})
+
+        assert [tcr.passed for tcr in tf.test_case_results] == [True, False]
+        assert tf.test_case_results[0].message == "✅ Test case passed"
+
+        message = tf.test_case_results[1].message
+        assert "Expecting nothing\nerr\nok\n" in message
+        assert "Expected:\n    3\nGot:\n    2\n" in message
+
+        # the failure message matches that of running the doctest on its own
+        passed, result = run_doctest("q1 1", SPEC["suites"][0]["cases"][1]["code"], {"x": 1})
+        assert not passed
+        assert message == "❌ Test case failed\n" + result
+
+    def test_examples_reused(self):
+        tf = OKTestFile.from_spec(SPEC)
+        examples = tf._examples
+
+        tf.run({"x": 2})
+        assert [tcr.passed for tcr in tf.test_case_results] == [False, True]
+
+        copy = tf.copy_without_results()
+        copy.run({"x": 1})
+        assert copy._examples is examples
+        assert [tcr.passed for tcr in copy.test_case_results] == [True, False]
+
+    def test_timeout(self):
+        spec = {
+            "name": "q1",
+            "points": 3,
+            "suites": [
+                {
+                    "type": "doctest",
+                    "cases": [
+                        {"code": ">>> while True:\n...     pass", "timeout": 0.2},
+                        {
+                            "code": ">>> while True:\n...     try:\n...         pass\n...     " \
+                                "except Exception:\n...         pass\n>>> while True:\n...     pass",
+                            "timeout": 0.2,
+                        },
+                        {"code": ">>> x\n1"},
+                    ],
+                },
+            ],
+        }
+
+        tf = OKTestFile.from_spec(spec)
+        tf.run({"x": 1})
+
+        assert [tcr.passed for tcr in tf.test_case_results] == [False, False, True]
+        for tcr in tf.test_case_results[:2]:
+            assert tcr.message == "❌ Test case failed\nTest case timed out after 0.2 seconds"
+            assert tcr.wall_time < 1
+
+        # the default timeout is used for cases without their own
+        tf = OKTestFile.from_spec({**spec, "suites": [{
+            "type": "doctest", "cases": [{"code": ">>> while True:\n...     pass"}]}]})
+        with mock.patch.object(TestFile, "default_timeout", 0.1):
+            tf.run({})
+
+        assert tf.test_case_results[0].message == \
+            "❌ Test case failed\nTest case timed out after 0.1 seconds"
+
+        # the default timeout can be overridden in a context
+        with mock.patch.object(TestFile, "default_timeout", 5), \
+                TestFile.default_timeout_context(0.1):
+            tf.run({})
+
+        assert tf.test_case_results[0].message == \
+            "❌ Test case failed\nTest case timed out after 0.1 seconds"
+
+    def test_timeout_cleanup(self):
+        """
+        Tests that a doctest that times out is stopped without leaving doctest's patches or an alarm
+        behind.
+        """
+        spec = {
+            "name": "q1",
+            "points": 1,
+            "suites": [
+                {
+                    "type": "doctest",
+                    "cases": [
+                        {
+                            "code": ">>> while True:\n...     pass\nTraceback (most recent call " \
+                                "last):\nValueError\n>>> ran.append(1)",
+                            "timeout": 0.2,
+                        },
+                    ],
+                },
+            ],
+        }
+
+        stdout, displayhook = sys.stdout, sys.displayhook
+        env = {"ran": []}
+
+        tf = OKTestFile.from_spec(spec)
+        tf.run(env)
+
+        assert tf.test_case_results[0].message == \
+            "❌ Test case failed\nTest case timed out after 0.2 seconds"
+        assert env["ran"] == []
+        assert sys.stdout is stdout and sys.displayhook is displayhook
+        assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+    def test_timeout_bare_except(self):
+        """
+        Tests that a doctest whose code catches the timeout error with a bare ``except`` is still
+        stopped.
+        """
+        spec = {
+            "name": "q1",
+            "points": 2,
+            "suites": [
+                {
+                    "type": "doctest",
+                    "cases": [
+                        {
+                            "code": ">>> while True:\n...     try:\n...         f()\n...  " \
+                                "   except:\n...         pass\n>>> ran.append(1)",
+                            "timeout": 0.2,
+                        },
+                        {
+                            "code": ">>> while True:\n...     try:\n...         " \
+                                "time.sleep(0.01)\n...     except:\n...         pass\n" \
+                                ">>> ran.append(2)",
+                            "timeout": 0.2,
+                        },
+                        {"code": ">>> ran.append(3)"},
+                    ],
+                },
+            ],
+        }
+
+        stdout, displayhook = sys.stdout, sys.displayhook
+        env = {"ran": [], "f": lambda: [sum(range(100)) for _ in range(100)], "time": time}
+
+        tf = OKTestFile.from_spec(spec)
+        tf.run(env)
+
+        assert [tcr.passed for tcr in tf.test_case_results] == [False, False, True]
+        for tcr in tf.test_case_results[:2]:
+            assert tcr.message == "❌ Test case failed\nTest case timed out after 0.2 seconds"
+            assert tcr.wall_time < 5
+        assert env["ran"] == [3]
+        assert sys.stdout is stdout and sys.displayhook is displayhook
+        assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
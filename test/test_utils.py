@@ -1,10 +1,13 @@
 """Tests for ``otter.utils``"""
 
+import json
+import nbformat as nbf
 import pandas as pd
+import pytest
 
 from unittest import mock
 
-from otter.utils import get_variable_type, hide_outputs
+from otter.utils import get_variable_type, hide_outputs, load_notebook, NBFORMAT_VERSION
 
 
 @mock.patch("otter.utils.get_ipython")
@@ -28,3 +31,23 @@ def test_get_variable_type():
     """
     assert get_variable_type(Foo()) == "test.test_utils.Foo"
     assert get_variable_type(pd.DataFrame()) == "pandas.core.frame.DataFrame"
+
+
+def test_load_notebook(tmp_path):
+    """
+    Tests for ``otter.utils.load_notebook``.
+    """
+    nb = nbf.v4.new_notebook(cells=[nbf.v4.new_code_cell("x = 1"), nbf.v4.new_markdown_cell("hi")])
+    nb_path = tmp_path / "nb.ipynb"
+    nbf.write(nb, nb_path)
+
+    assert load_notebook(nb_path) == nbf.read(nb_path, as_version=NBFORMAT_VERSION)
+    assert load_notebook(nb_path, validate=True) == nb
+
+    # invalid notebooks are only rejected if they are validated
+    nb.cells[0].cell_type = "foo"
+    nb_path.write_text(json.dumps(nb))
+
+    assert load_notebook(nb_path).cells[0].cell_type == "foo"
+    with pytest.raises(nbf.ValidationError):
+        load_notebook(nb_path, validate=True)